@@ -1,9 +1,15 @@
-from dataclasses import InitVar, dataclass, field
-from typing import Any
+from dataclasses import InitVar, dataclass
+from typing import Any, ClassVar
 
 from llama.pylib.base_field import BaseField
 
 
 @dataclass
 class CalculatedField(BaseField):
-    record: InitVar[dict[str, Any]] = field(default_factory=dict)
+    # --------------
+    # The other columns that this field reads from the record
+    inputs: ClassVar[tuple[str, ...]] = ()
+    # --------------
+
+    # An InitVar cannot have a default factory
+    record: InitVar[dict[str, Any] | None] = None
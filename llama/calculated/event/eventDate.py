@@ -1,19 +1,18 @@
 from dataclasses import dataclass
-from typing import Any
+from typing import Any, ClassVar
 
 from llama.calculated.calculated_field import CalculatedField
-from llama.pylib import fix_parses
+from llama.pylib import fix_parses, label_dates
 
 
 @dataclass
 class EventDate(CalculatedField):
+    # --------------
+    inputs: ClassVar[tuple[str, ...]] = ("verbatimEventDate",)
+    # --------------
+
     eventDate: str = ""
 
     def __post_init__(self, record: dict[str, Any]) -> None:
         event_date = fix_parses.to_str(record.get("verbatimEventDate"))
-
-        # Handle date ranges
-        dates = event_date.split("|")
-        dates = [fix_parses.date_to_iso(d) for d in dates]
-
-        self.eventDate = self.eventDate.replace("|", " to ")
+        self.eventDate = label_dates.range_to_iso(event_date)
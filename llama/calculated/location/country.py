@@ -1,12 +1,20 @@
+import re
 from dataclasses import dataclass
-from typing import Any
+from typing import Any, ClassVar
 
 from llama.calculated.calculated_field import CalculatedField
+from llama.vocab import gazetteer
 from llama.vocab.administrative_unit import US_COUNTY, US_STATE, USA
 
+WORD = re.compile(r"\w")
+
 
 @dataclass
 class Country(CalculatedField):
+    # --------------
+    inputs: ClassVar[tuple[str, ...]] = ("county", "stateProvince")
+    # --------------
+
     country: str = ""
 
     def __post_init__(self, record: dict[str, Any]) -> None:
@@ -15,7 +23,25 @@ class Country(CalculatedField):
         us_county = record.get("county", "")
         us_county = us_county.lower() in US_COUNTY
         us_state = record.get("stateProvince", "")
-        us_state = us_state.lower() in US_STATE
+        us_state = us_state.lower() in US_STATE or is_us_state(us_state)
         if not self.country and (us_county or us_state):
             self.country = "United States"
         self.country = self.country
+
+
+def is_us_state(value: str) -> bool:
+    """
+    Look for a state in values like "Calif., USA" or "Nevada (NV)".
+
+    The state must be the whole value apart from punctuation and the USA itself. Names
+    of states are inside other names, like "Baja California Sur" in Mexico.
+    """
+    mentions = gazetteer.admin_units().find(value)
+    us_mentions = [
+        m
+        for m in mentions
+        if m.label == "us_state" or (m.label == "country" and m.replace == "USA")
+    ]
+    if not any(m.label == "us_state" for m in us_mentions):
+        return False
+    return not WORD.search(gazetteer.strip(value, us_mentions))
@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import Any
+from typing import Any, ClassVar
 
 from llama.calculated.calculated_field import CalculatedField
 from llama.pylib import fix_parses
@@ -14,6 +14,10 @@ class Pair:
 
 @dataclass
 class Elevation(CalculatedField):
+    # --------------
+    inputs: ClassVar[tuple[str, ...]] = ("verbatimElevation",)
+    # --------------
+
     elevation: float | str = ""
     minimumElevationInMeters: float | str = ""
     maximumElevationInMeters: float | str = ""
@@ -2,27 +2,37 @@ import re
 from dataclasses import dataclass
 from typing import Any, ClassVar
 
-from rapidfuzz import fuzz
-
 from llama.calculated.calculated_field import CalculatedField
 from llama.pylib import fix_parses
+from llama.vocab import gazetteer
 
 
 @dataclass
 class Locality(CalculatedField):
     # --------------
     scoring_method: ClassVar[str] = "FPR"
+    inputs: ClassVar[tuple[str, ...]] = ("country", "stateProvince", "county")
     # --------------
 
     locality: str = ""
 
     def __post_init__(self, record: dict[str, Any]) -> None:
         """Remove country, state/province, and county."""
-        for field_name in ("country", "stateProvince", "county"):
-            if value := record.get(field_name):
-                # Remove the field from this string
-                pattern = re.escape(str(value))
-                self.locality = re.sub(pattern, "", self.locality, flags=re.IGNORECASE)
+        values = {str(v) for f in self.inputs if (v := record.get(f))}
+
+        if values:
+            # Also remove other spellings of them, like "Calif." for "California"
+            lower = {v.lower() for v in values}
+            mentions = [
+                m
+                for m in gazetteer.admin_units().find(self.locality)
+                if m.text.lower() in lower or m.replace.lower() in lower
+            ]
+            self.locality = gazetteer.strip(self.locality, mentions)
+
+            # And the values themselves, when the gazetteer doesn't have them
+            pattern = "|".join(re.escape(v) for v in sorted(values, key=len)[::-1])
+            self.locality = re.sub(pattern, "", self.locality, flags=re.IGNORECASE)
 
         self.locality = re.sub(
             r"\b(co\.?|county)\b", "", self.locality, flags=re.IGNORECASE
@@ -30,10 +40,3 @@ class Locality(CalculatedField):
 
         self.locality = fix_parses.clean_str_ends(self.locality)
         self.locality = " ".join(self.locality.split())
-
-    @staticmethod
-    def score(expect: Any, actual: Any, record: dict[str, Any]) -> float:
-        del record
-
-        expect = str(expect)
-        return fuzz.partial_ratio(expect, actual) / 100.0
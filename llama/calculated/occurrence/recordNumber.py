@@ -1,6 +1,6 @@
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import Any, ClassVar
 
 from rapidfuzz import fuzz
 
@@ -11,6 +11,10 @@ SOURCE_THRESHOLD = 75.0
 
 @dataclass
 class RecordNumber(CalculatedField):
+    # --------------
+    inputs: ClassVar[tuple[str, ...]] = ("source",)
+    # --------------
+
     recordNumber: str = ""
 
     def __post_init__(self, record: dict[str, Any]) -> None:
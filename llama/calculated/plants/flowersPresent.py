@@ -1,14 +1,19 @@
 from dataclasses import dataclass
-from typing import Any
+from typing import Any, ClassVar
 
 from llama.calculated.calculated_field import CalculatedField
 
 
 @dataclass
 class FlowersPresent(CalculatedField):
+    # --------------
+    inputs: ClassVar[tuple[str, ...]] = ("flowerColor", "flowerFacts")
+    # --------------
+
     flowersPresent: bool | str = ""
 
     def __post_init__(self, record: dict[str, Any]) -> None:
         """Set flowersPresent to True if there are flower colors or facts."""
-        if not self.flowersPresent and (record["flowerColor"] or record["flowerFacts"]):
+        color, facts = record.get("flowerColor"), record.get("flowerFacts")
+        if not self.flowersPresent and (color or facts):
             self.flowersPresent = True
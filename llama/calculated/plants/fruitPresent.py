@@ -1,14 +1,19 @@
 from dataclasses import dataclass
-from typing import Any
+from typing import Any, ClassVar
 
 from llama.calculated.calculated_field import CalculatedField
 
 
 @dataclass
 class FruitPresent(CalculatedField):
+    # --------------
+    inputs: ClassVar[tuple[str, ...]] = ("fruitColor", "fruitFacts")
+    # --------------
+
     fruitPresent: bool | str = ""
 
     def __post_init__(self, record: dict[str, Any]) -> None:
         """Set fruitPresent to True if there are fruit colors."""
-        if not self.fruitPresent and (record["fruitColor"] or record["fruitFacts"]):
+        color, facts = record.get("fruitColor"), record.get("fruitFacts")
+        if not self.fruitPresent and (color or facts):
             self.fruitPresent = True
@@ -2,13 +2,14 @@ from dataclasses import dataclass
 from typing import Any, ClassVar
 
 from llama.calculated.calculated_field import CalculatedField
-from llama.vocab.taxon import GENUS_TO_FAMILY
+from llama.vocab import taxon
 
 
 @dataclass
 class Family(CalculatedField):
     # --------------
     scoring_method: ClassVar[str] = "CUST"
+    inputs: ClassVar[tuple[str, ...]] = ("scientificName",)
     # --------------
 
     family: str = ""
@@ -19,7 +20,7 @@ class Family(CalculatedField):
             sci_name = record.get("scientificName", "")
             words = sci_name.split()
             genus = words[0] if len(words) > 0 else ""
-            self.family = GENUS_TO_FAMILY.get(genus, "")
+            self.family = taxon.genus_to_family(genus)
 
     @staticmethod
     def score(expect: Any, actual: Any, record: dict[str, Any]) -> float:
@@ -27,7 +28,7 @@ class Family(CalculatedField):
         genus = genus[0] if len(genus) > 0 else ""
 
         # OK if expect is empty and the sci name genus is in the family
-        if not expect and GENUS_TO_FAMILY.get(genus) == actual:
+        if not expect and actual and taxon.genus_to_family(genus) == actual:
             return 1.0
 
         return CalculatedField.score(expect, actual, record)  # Default to edit distance
@@ -1,15 +1,26 @@
 from dataclasses import dataclass
-from typing import Any
+from typing import Any, ClassVar
 
 from llama.calculated.calculated_field import CalculatedField
+from llama.vocab import taxon
 
 
 @dataclass
 class Genus(CalculatedField):
+    # --------------
+    inputs: ClassVar[tuple[str, ...]] = ("scientificName",)
+    # --------------
+
     genus: str = ""
 
     def __post_init__(self, record: dict[str, Any]) -> None:
-        """Get the genus from the scientific name if it is missing here."""
+        """
+        Get the genus from the scientific name if it is missing here.
+
+        Fix the spelling if it is close to a known genus.
+        """
         if not self.genus:
-            words = record["scientificName"].split()
-            self.genus = words[0].capitalize() if len(words) > 0 else ""
+            words = record.get("scientificName", "").split()
+            genus = words[0].capitalize() if len(words) > 0 else ""
+            closest, _ = taxon.closest_genus(genus)
+            self.genus = closest or genus
@@ -1,60 +1,269 @@
 #!/usr/bin/env python3
 
 import argparse
+import logging
 import textwrap
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 import pandas as pd
 from tqdm import tqdm
 
-from llama.pylib import log, prompt_util
+from llama.pylib import (
+    field_graph,
+    lineage,
+    log,
+    pool_util,
+    prompt_util,
+    record_schema,
+    table_io,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    import pyarrow as pa
+
+FIRST_COLUMNS = ("source", "text", "elapsed", "status")
+
+# Lineage keys for calculated fields, they can have the same name as other fields
+CALCULATED = "calculated:"
+
+# Each worker process fills this in once, see init_worker
+WORKER: dict[str, Any] = {}
+
+
+@dataclass
+class Cleaners:
+    """The field classes that clean the columns and the calculated fields to run."""
+
+    field_classes: dict[str, Any]
+    columns: list[str]
+    calculated: dict[str, Any]
+    order: list[str]
+
+    @classmethod
+    def load(
+        cls, prompt_path: Path, columns: list[str], wanted: list[str] | None = None
+    ) -> Cleaners:
+        prompt = prompt_util.Prompt.load(prompt_path)
+        field_classes = prompt.field_classes
+        calculated = prompt.calculated_classes
+
+        if wanted:
+            _, needed = field_graph.ancestors(calculated, wanted)
+            columns = [c for c in columns if c in needed]
+        columns = [c for c in columns if c not in FIRST_COLUMNS]
+        columns = [c for c in columns if c in prompt.column_names]
+        columns = [c for c in columns if c in field_classes]
+
+        return cls(
+            field_classes=field_classes,
+            columns=columns,
+            calculated=calculated,
+            order=field_graph.evaluation_order(calculated, wanted),
+        )
+
+    @property
+    def digest(self) -> str:
+        """Digest every cleaner module, calculated fields get a prefix."""
+        classes = {c: self.field_classes[c] for c in self.columns}
+        classes |= {CALCULATED + n: self.calculated[n] for n in self.order}
+        return lineage.digest_cleaners(classes)
+
+    @property
+    def types(self) -> dict[str, pa.DataType]:
+        """Get the column types for typed tables from the field annotations."""
+        classes = [self.field_classes[c] for c in self.columns]
+        classes += [self.calculated[n] for n in self.order]
+        return record_schema.field_types(classes)
 
 
 def postprocess_fields(args: argparse.Namespace) -> None:
     job_began = log.job_began(args.log_file, args=args)
 
-    df = pd.read_csv(args.parse_file, dtype=str).fillna("")
+    columns = table_io.read_column_names(args.parse_file)
+    cleaners = Cleaners.load(args.prompt, columns, args.column)
 
-    prompt = prompt_util.Prompt.load(args.prompt)
-    field_classes = prompt.field_classes
+    if args.incremental and args.clean_file.exists():
+        clean_incremental(args, cleaners)
+        log.job_elapsed(job_began)
+        return
 
-    columns = df.columns
-    if args.column:
-        columns = args.column
-    columns = [c for c in columns if c not in ("source", "text", "elapsed", "status")]
-    columns = [c for c in columns if c in prompt.column_names and c in field_classes]
+    chunks = success_chunks(args.parse_file, args.chunk_size, args.limit)
+    chunks = (c for df in chunks for c in pool_util.chunk(df, args.workers))
 
-    input_rows = [r for r in df.to_dict("records") if r["status"] == "success"]
-    input_rows = input_rows[: args.limit]
+    cleaned = pool_util.stream_chunks(
+        clean_chunk,
+        chunks,
+        workers=args.workers,
+        initializer=init_worker,
+        initargs=(args.prompt, columns, args.column),
+    )
+
+    with table_io.ChunkWriter(args.clean_file, cleaners.types) as writer:
+        for df, out in tqdm(cleaned, desc="clean"):
+            writer.write(out)
 
-    output_rows = []
+            if debugging(args):
+                for in_row, out_row in zip(
+                    df.to_dict("records"), out.to_dict("records"), strict=True
+                ):
+                    print_debug_info(in_row, out_row)
 
-    for in_row in tqdm(input_rows):
-        out_row = {"source": in_row["source"], "text": in_row["text"]}
+    log.job_elapsed(job_began)
 
-        for column in columns:
-            field_action = field_classes[column]
 
-            in_data = {k: in_row.get(k) for k in field_action.get_field_names()}
+def success_chunks(
+    parse_file: Path, chunk_size: int | None, limit: int | None
+) -> Iterator[pd.DataFrame]:
+    """Read chunks of the records that the LM parsed successfully."""
+    for df in table_io.read_chunks(parse_file, chunk_size):
+        df = df.loc[df["status"] == "success"]
+        if limit is not None:
+            df = df.iloc[:limit]
+            limit -= len(df)
+        yield df.reset_index(drop=True)
+        if limit is not None and limit <= 0:
+            return
 
-            out_field = field_action(**in_data)
-            out_field.cross_field_update(in_row)
 
-            out_data = {
-                k: getattr(out_field, k) for k in out_field.get_visible_fields()
-            }
-            out_row |= out_data
+def init_worker(
+    prompt_path: Path, columns: list[str], wanted: list[str] | None
+) -> None:
+    """Load the field classes and their vocabularies once per worker process."""
+    WORKER["cleaners"] = Cleaners.load(prompt_path, columns, wanted)
 
-            if debugging(args):
-                print_debug_info(in_row, out_data)
 
-        output_rows.append(out_row)
+def clean_chunk(df: pd.DataFrame) -> pd.DataFrame:
+    cleaners = WORKER["cleaners"]
+    out = clean_columns(df, cleaners.field_classes, cleaners.columns)
+    out = calculate(out, cleaners.calculated, cleaners.order)
+    return add_lineage(out, df, cleaners.digest)
 
-    df = pd.DataFrame(output_rows)
-    df.to_csv(args.clean_file, index=False)
 
-    log.job_elapsed(job_began)
+def add_lineage(out: pd.DataFrame, df: pd.DataFrame, digest: str) -> pd.DataFrame:
+    """Carry the parse lineage forward and add the parse and cleaner digests."""
+    for column in lineage.PARSE_COLUMNS:
+        if column in df.columns:
+            out[column] = df[column]
+    out[lineage.PARSE] = [lineage.digest_record(r) for r in df.to_dict("records")]
+    out[lineage.CLEANERS] = digest
+    return out
+
+
+def clean_incremental(args: argparse.Namespace, cleaners: Cleaners) -> None:
+    """
+    Only clean the records and columns that changed since the last run.
+
+    A record is cleaned again when its parse record changed. Otherwise only the
+    columns with a cleaner module that changed are cleaned again, and the calculated
+    fields are run again if any of them changed. This reads both whole files.
+    """
+    df = next(success_chunks(args.parse_file, None, args.limit))
+    old = table_io.read_table(args.clean_file)
+    old = lineage.latest(old).set_index("source", drop=False)
+
+    digests = [lineage.digest_record(r) for r in df.to_dict("records")]
+    prev = old.reindex(df["source"]).fillna("").reset_index(drop=True)
+    if lineage.PARSE not in prev.columns:
+        prev[lineage.PARSE] = ""
+    if lineage.CLEANERS not in prev.columns:
+        prev[lineage.CLEANERS] = ""
+    stale = prev[lineage.PARSE].to_numpy() != digests
+
+    # Records that changed get all of their columns cleaned
+    out = clean_columns(df.loc[stale], cleaners.field_classes, cleaners.columns)
+    out = calculate(out, cleaners.calculated, cleaners.order)
+    parts = [add_lineage(out, df.loc[stale], cleaners.digest)]
+
+    # Records that didn't change only get the columns with changed cleaners
+    fresh = prev.loc[~stale]
+    redone = 0
+    for old_digest, group in fresh.groupby(lineage.CLEANERS, sort=False):
+        part = group.copy()
+        redo = lineage.stale_columns(old_digest, cleaners.digest)
+        if redo:
+            redone += len(group)
+            columns = [c for c in redo if c in cleaners.columns]
+            cleaned = clean_columns(
+                df.loc[group.index], cleaners.field_classes, columns
+            )
+            for column in cleaned.columns:
+                part[column] = cleaned[column]
+            part = calculate(part, cleaners.calculated, cleaners.order)
+        part[lineage.CLEANERS] = cleaners.digest
+        parts.append(part)
+
+    logging.info(
+        f"{stale.sum()} records changed, {redone} records had cleaners that changed, "
+        f"and {len(df) - stale.sum() - redone} records were already clean"
+    )
+
+    out = pd.concat(parts).sort_index()
+    out = out.reindex(columns=parts[0].columns, fill_value="")
+    table_io.write_table(args.clean_file, out, cleaners.types)
+
+
+def calculate(
+    out: pd.DataFrame, calculated: dict[str, Any], order: list[str]
+) -> pd.DataFrame:
+    """Run the calculated fields, in dependency order, on the cleaned records."""
+    if not order:
+        return out
+
+    columns = out.columns.tolist()
+    for name in order:
+        columns += [
+            c for c in calculated[name].get_visible_fields() if c not in columns
+        ]
+
+    records = out.to_dict("records")
+    for record in records:
+        for name in order:
+            field_action = calculated[name]
+            visible = field_action.get_visible_fields()
+            in_data = {k: record[k] for k in visible if k in record}
+            out_field = field_action(**in_data, record=record)
+            record |= {k: getattr(out_field, k) for k in visible}
+
+    # Keep the columns even when there are no records
+    return pd.DataFrame(records, index=out.index, columns=columns)
+
+
+def clean_columns(
+    df: pd.DataFrame, field_classes: dict[str, Any], columns: list[str]
+) -> pd.DataFrame:
+    out = df[["source", "text"]].copy()
+
+    for column in columns:
+        field_action = field_classes[column]
+
+        cleaned = None
+        if field_action.get_visible_fields() == [column]:
+            cleaned = field_action.clean_column(df[column], df)
+
+        if cleaned is not None:
+            out[column] = cleaned
+        else:
+            cleaned = clean_by_row(df, field_action)
+            for name in cleaned.columns:
+                out[name] = cleaned[name]
+
+    return out
+
+
+def clean_by_row(df: pd.DataFrame, field_action: type) -> pd.DataFrame:
+    """Clean a field one record at a time when it has no column version."""
+    names = field_action.get_field_names()
+    visible = field_action.get_visible_fields()
+    rows = []
+    for in_row in df.to_dict("records"):
+        in_data = {k: in_row.get(k) for k in names}
+        out_field = field_action(**in_data, text=in_row["text"])
+        rows.append({k: getattr(out_field, k) for k in visible})
+    return pd.DataFrame(rows, columns=visible, index=df.index)
 
 
 def debugging(args: argparse.Namespace) -> bool:
@@ -63,7 +272,11 @@ def debugging(args: argparse.Namespace) -> bool:
 
 def print_debug_info(in_row: dict[str, Any], out_row: dict[str, Any]) -> None:
     print(in_row["source"])
-    trimmed = {k: v for k, v in out_row.items() if k not in ("source", "text")}
+    trimmed = {
+        k: v
+        for k, v in out_row.items()
+        if k not in ("source", "text") and not lineage.is_lineage(k)
+    }
     for column, value in trimmed.items():
         if column in in_row:
             print(f"{'before ' + column:>40}: {in_row[column]}")
@@ -84,14 +297,24 @@ def parse_args(args: list[str] | None = None) -> argparse.Namespace:
         type=Path,
         required=True,
         metavar="path",
-        help="""Clean the LM in this results CSV file.""",
+        help="""Clean the LM in this results file. It is a CSV file unless the name
+            ends with ".parquet" or ".arrows".""",
     )
     io_group.add_argument(
         "--clean-file",
         type=Path,
         required=True,
         metavar="path",
-        help="""Write the cleaned data to this CSV file.""",
+        help="""Write the cleaned data to this file. It is a CSV file unless the name
+            ends with ".parquet" or ".arrows". Those are typed tables where the column
+            types come from the field classes.""",
+    )
+    io_group.add_argument(
+        "--incremental",
+        action="store_true",
+        help="""Only clean the records that changed since the clean file was written
+            and the columns with cleaner modules that changed. This reads whole files
+            and ignores --chunk-size.""",
     )
     prompt_group = arg_parser.add_argument_group("prompt options")
     prompt_group.add_argument(
@@ -115,12 +338,29 @@ def parse_args(args: list[str] | None = None) -> argparse.Namespace:
         metavar="string",
         help="""Notes for logging. They only appear in the log file.""",
     )
+    settings_group = arg_parser.add_argument_group("program settings")
+    settings_group.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        metavar="int",
+        help="""Clean the records in chunks using this many processes.
+            (default: %(default)s)""",
+    )
+    settings_group.add_argument(
+        "--chunk-size",
+        type=int,
+        metavar="int",
+        help="""Read, clean, and write this many records at a time so that memory use
+            stays flat for large files. By default the whole file is read at once.""",
+    )
     debugging_group = arg_parser.add_argument_group("debugging options")
     debugging_group.add_argument(
         "--column",
         action="append",
         metavar="string",
-        help="""Just parse one column.""",
+        help="""Just clean this column. Any columns that it is calculated from are
+            also cleaned. You may use this more than once.""",
     )
     debugging_group.add_argument(
         "--limit",
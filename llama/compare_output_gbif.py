@@ -28,20 +28,35 @@ import argparse
 import logging
 import textwrap
 from collections import defaultdict
-from dataclasses import asdict, dataclass, field
 from enum import Enum, auto
+from itertools import islice
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
+import numpy as np
 import pandas as pd
-from rapidfuzz import fuzz
+from rapidfuzz import fuzz, process
 from tqdm import tqdm
 
-from llama.pylib import log
+from llama.pylib import (
+    html_report,
+    join_util,
+    lineage,
+    log,
+    pool_util,
+    report_writer,
+    sampling,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
 
 FIRST_COLUMNS = ["text", "image_path", "row_group", "row_type", "source"]
 GBIF_SEARCH_MD = Path(__file__).resolve().parent / "pylib" / "gbif_search.md"
 
+# Each worker process fills this in once, see init_worker
+WORKER: dict[str, Any] = {}
+
 
 # ----------------------------------------------------------------------------------
 class ScoreCat(Enum):
@@ -53,362 +68,620 @@ class ScoreCat(Enum):
     search_success = auto()
 
 
-@dataclass
-class Tally:
-    aligned_both_full_count: int = 0
-    aligned_both_empty_count: int = 0
-    aligned_parse_empty_count: int = 0
-    aligned_search_fail_count: int = 0
-    aligned_search_success_count: int = 0
-    not_aligned_parse_empty_count: int = 0
-    not_aligned_search_fail_count: int = 0
-    not_aligned_search_success_count: int = 0
-    score_sum: float = 0.0
-
-    @property
-    def total_scoreable(self) -> int:
-        return (
-            self.aligned_both_full_count
-            + self.aligned_both_empty_count
-            + self.aligned_parse_empty_count
-            + self.aligned_search_fail_count
-            + self.aligned_search_success_count
-            + self.not_aligned_search_success_count
+# The tally column for every category and whether the GBIF column is aligned
+TALLIES: dict[tuple[str, bool], str] = {
+    ("aligned_both_full", True): "aligned_both_full_count",
+    ("aligned_both_empty", True): "aligned_both_empty_count",
+    ("aligned_parse_empty", True): "aligned_parse_empty_count",
+    ("search_fail", True): "aligned_search_fail_count",
+    ("search_success", True): "aligned_search_success_count",
+    ("not_aligned_parse_empty", False): "not_aligned_parse_empty_count",
+    ("search_fail", False): "not_aligned_search_fail_count",
+    ("search_success", False): "not_aligned_search_success_count",
+}
+TALLY_COLUMNS = [
+    "aligned_both_full_count",
+    "aligned_both_empty_count",
+    "aligned_parse_empty_count",
+    "aligned_search_fail_count",
+    "aligned_search_success_count",
+    "not_aligned_parse_empty_count",
+    "not_aligned_search_fail_count",
+    "not_aligned_search_success_count",
+]
+
+SCORE_COLUMNS = [
+    "source",
+    "file",
+    "column",
+    "cat",
+    "score",
+    "method",
+    "gbif_field",
+    "gbif_data",
+    "is_aligned",
+]
+
+# These don't count towards the average score
+NOT_SCOREABLE = ["not_aligned_parse_empty_count", "not_aligned_search_fail_count"]
+
+
+# ----------------------------------------------------------------------------------
+def score_against_gbif(args: argparse.Namespace) -> None:
+    """Compare LLM outputs against gbif data and write an HTML report."""
+    job_began = log.job_began(args.log_file, args=args)
+
+    joined = join_util.join(
+        args.ocr_file, args.parse_file, args.gbif_file, limit=args.limit
+    )
+
+    # Get common columns in the original order
+    columns = [
+        k
+        for k in joined.parse_columns
+        if k not in FIRST_COLUMNS and not lineage.is_lineage(k)
+    ]
+
+    # If the gbif cells do not match the llm cells then search for aligned data in gbif
+    gbif_search = get_gbif_search()
+
+    # Everything a worker needs to score one image
+    items = [
+        (
+            source,
+            joined.expects[i],
+            {stem: parses[i] for stem, parses in joined.parses.items()},
         )
+        for i, source in enumerate(joined.sources)
+    ]
+
+    stems = list(joined.parses)
+    rows = list(range(len(joined.sources)))
+    tables = {}
+    if args.sample:
+        scores, tables["confidence"] = sample_scores(args, items, columns, stems)
+        sampled = set(scores["source"])
+        rows = [i for i in rows if joined.sources[i] in sampled]
+    else:
+        scores = concat_scores(score_chunks(args, items, columns), stems, columns)
+
+    if args.sweep_threshold:
+        logging.info("Sweep success thresholds")
+        tables["threshold_sweep"] = sweep(scores, args.sweep_threshold)
+        scores = apply_threshold(scores, args.success_threshold)
+
+    logging.info("Tally scores")
+    stats_df = tally(scores)
+
+    groups = detail_groups(
+        scores,
+        joined=joined,
+        rows=rows,
+        columns=columns,
+        output_type=args.output_csv.suffix.lower(),
+    )
+
+    write_output(
+        args.output_csv,
+        stats_df=stats_df,
+        groups=groups,
+        columns=columns,
+        gbif_search=gbif_search,
+        tables=tables,
+    )
+
+    log.job_elapsed(job_began)
+
+
+def score_chunks(
+    args: argparse.Namespace, items: list[tuple], columns: list[str]
+) -> list[pd.DataFrame]:
+    """Score the images in the worker processes, one table per chunk."""
+    # A sweep needs every search's best score, the thresholds are applied later
+    threshold = 0.0 if args.sweep_threshold else args.success_threshold
+
+    chunks = pool_util.chunk(items, args.workers)
+    return pool_util.run_chunks(
+        score_items,
+        chunks,
+        workers=args.workers,
+        initializer=init_worker,
+        # With one process rapidfuzz uses every core, otherwise the processes do
+        initargs=(columns, threshold, -1 if args.workers == 1 else 1),
+        desc="score",
+    )
+
+
+def sample_scores(
+    args: argparse.Namespace, items: list[tuple], columns: list[str], stems: list[str]
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Score a stratified sample of the images and get the confidence intervals.
 
-    @property
-    def total_count(self) -> int:
-        return (
-            self.total_scoreable
-            + self.not_aligned_search_fail_count
-            + self.not_aligned_parse_empty_count
+    In sequential mode the sample grows until the intervals are settled.
+    """
+    strata = sampling.stratify([item[1] for item in items], args.stratify)
+    order = sampling.stratified_order(strata, args.seed)
+
+    scored = []
+    sampled = []
+    for batch in sampling.batches(order, args.sample, sequential=args.sequential):
+        scored += score_chunks(args, [items[i] for i in batch], columns)
+        sampled += batch
+
+        scores = concat_scores(scored, stems, columns)
+        values = score_matrix(apply_threshold(scores, args.success_threshold))
+        values = values.reindex([items[i][0] for i in sampled])
+        confidence = sampling.confidence_table(
+            values,
+            [strata[i] for i in sampled],
+            resamples=args.resamples,
+            confidence=args.confidence,
+            seed=args.seed,
         )
+        logging.info(f"Scored a sample of {len(sampled)} of {len(items)} images")
+        if sampling.settled(confidence, args.ci_width):
+            break
 
-    @property
-    def average_score(self) -> float:
-        if self.total_scoreable == 0:
-            return 0.0
-        return self.score_sum / self.total_scoreable
-
-
-@dataclass
-class Score:
-    cat: ScoreCat
-    score: float = 0.0
-    method: str = ""
-    gbif_field: str = ""
-    gbif_data: str = ""
-    is_aligned: bool = False
-
-    def __gt__(self, other: Score) -> bool:
-        return (self.score, -len(self.gbif_data)) > (other.score, -len(other.gbif_data))
-
-    @staticmethod
-    def tally(row_groups: list[RowGroup]) -> dict:
-        # The tally is a 3-level dict
-        tallies = defaultdict(lambda: defaultdict(Tally))
-
-        # Accumulate the scores
-        for group in row_groups:
-            for score_row in group.score_rows:
-                row_type = ""
-                for col, score in score_row.items():
-                    if col == "row_type":
-                        row_type = score  # Score is the row_type in this case
-                        continue
-                    tally = tallies[row_type][col]
-                    match score.cat:
-                        case ScoreCat.aligned_both_full:
-                            tally.aligned_both_full_count += 1
-                            tally.score_sum += score.score
-
-                        case ScoreCat.aligned_both_empty:
-                            tally.aligned_both_empty_count += 1
-                            tally.score_sum += score.score
-
-                        case ScoreCat.aligned_parse_empty:
-                            tally.aligned_parse_empty_count += 1
-                            tally.score_sum += score.score
-
-                        case ScoreCat.not_aligned_parse_empty:
-                            tally.not_aligned_parse_empty_count += 1
-
-                        case ScoreCat.search_fail if score.is_aligned:
-                            tally.aligned_search_fail_count += 1
-                            tally.score_sum += score.score
-
-                        case ScoreCat.search_fail if not score.is_aligned:
-                            tally.not_aligned_search_fail_count += 1
-
-                        case ScoreCat.search_success if score.is_aligned:
-                            tally.aligned_search_success_count += 1
-                            tally.score_sum += score.score
-
-                        case ScoreCat.search_success if not score.is_aligned:
-                            tally.not_aligned_search_success_count += 1
-                            tally.score_sum += score.score
-
-        # Make score sums an average
-        stats = defaultdict(lambda: defaultdict(dict))
-        for row_type, columns in tallies.items():
-            for col, tally in columns.items():
-                row = {k: v or "" for k, v in asdict(tally).items() if k != "score_sum"}
-                row["total_scoreable"] = tally.total_scoreable
-                row["total_count"] = tally.total_count
-                row["average_score"] = tally.average_score
-                stats[row_type][col] = row
-
-        return stats
+    return scores, confidence
 
 
 # ----------------------------------------------------------------------------------
-@dataclass
-class RowGroup:
+def init_worker(
+    columns: list[str], success_threshold: float, score_workers: int
+) -> None:
+    """Load the GBIF search fields once per worker process."""
+    WORKER["columns"] = columns
+    WORKER["success_threshold"] = success_threshold
+    WORKER["gbif_search"] = get_gbif_search()
+    WORKER["score_workers"] = score_workers
+
+
+def score_items(items: list[tuple]) -> pd.DataFrame:
     """
-    A group of rows that get displayed together.
-
-    The entire group is indexed by the image source. So, for each OCRed image or other
-    source like CSV we have:
-        - The "first" columns. Which are handled differently, see above.
-        - A golden row with the expected values for each image.
-        - A set of LLM runs against the OCRed data. Each run tries a different model,
-          or other parameters in an attempt to get as close to the expected golden
-          values as possible.
-        - A set of scores for each LLM run. How well did the model actually do?
+    Score a chunk of images, a whole column at a time.
+
+    The scores are a long table with a row for every image, parse file, and column.
     """
+    if not items:
+        return pd.DataFrame()
+    sources = [item[0] for item in items]
+    gbif_inputs = [item[1] for item in items]
+    tables = []
+    for stem in items[0][2]:
+        parses = [item[2][stem] for item in items]
+        for col in WORKER["columns"]:
+            scores = score_column(
+                col,
+                [p[col] for p in parses],
+                gbif_inputs,
+                WORKER["gbif_search"],
+                WORKER["success_threshold"],
+            )
+            tables.append(
+                pd.DataFrame({"source": sources, "file": stem, "column": col} | scores)
+            )
+    return pd.concat(tables, ignore_index=True)
 
-    first_columns: dict[str, str] = field(default_factory=dict)
-    gbif_row: dict[str, Any] = field(default_factory=dict)
-    parse_rows: list[dict[str, str]] = field(default_factory=list)
-    score_rows: list[dict[str, Any]] = field(default_factory=list)
 
-    def format(self, output_type: str) -> RowGroup:
-        self.format_gbif_row(output_type)
-        self.format_score_rows(output_type)
-        return self
+def score_column(
+    col: str,
+    actuals: list[str],
+    gbif_inputs: list[dict],
+    gbif_search: dict,
+    success_threshold: float,
+) -> dict[str, list]:
+    """
+    Calculate the scores of a column of LLM/parsed cells against the GBIF cells.
 
-    def format_gbif_row(self, output_type: str) -> None:
-        for col, scores in self.gbif_row.items():
-            if col == "row_type":
+    All of the fuzzy matches against a GBIF field are done in one rapidfuzz call.
+    Cells that can't match, because one side is empty, are never sent to rapidfuzz.
+    The scores are columns: the category, score, method, GBIF field and data, and
+    whether the GBIF data has the same column.
+    """
+    # If the GBIF column has a value then we score against that. The GBIF records
+    # all come from one table so they all have the same columns.
+    is_aligned = bool(gbif_inputs) and col in gbif_inputs[0]
+    expects = [g[col].strip() for g in gbif_inputs] if is_aligned else []
+
+    size = len(actuals)
+    cats = [ScoreCat.search_fail.name] * size
+    scores = [0.0] * size
+    methods = [""] * size
+    gbif_fields = [""] * size
+    gbif_data = [""] * size
+
+    both_full: list[int] = []
+    search: list[int] = []
+    for i, actual in enumerate(actuals):
+        if is_aligned and not actual and not expects[i]:
+            cats[i] = ScoreCat.aligned_both_empty.name
+            scores[i] = 1.0
+            methods[i] = "EQ"
+            gbif_fields[i] = col
+        elif is_aligned and not actual:
+            cats[i] = ScoreCat.aligned_parse_empty.name
+        elif not actual:
+            # If there is not value to score against then we can't search for a value
+            cats[i] = ScoreCat.not_aligned_parse_empty.name
+            methods[i] = "BLANK"
+        elif is_aligned and expects[i]:
+            both_full.append(i)
+        else:
+            search.append(i)
+
+    matches = partial_ratios(
+        [expects[i] for i in both_full], [actuals[i] for i in both_full]
+    )
+    for i, score in zip(both_full, matches, strict=True):
+        cats[i] = ScoreCat.aligned_both_full.name
+        scores[i] = score
+        methods[i] = "FPR"
+        gbif_fields[i] = col
+        gbif_data[i] = expects[i]
+
+    # Try searching for a matching value in gbif_search columns and pick the best one
+    for search_field in gbif_search.get(col, []):
+        rows = [i for i in search if gbif_inputs[i].get(search_field, "")]
+        found = [gbif_inputs[i][search_field] for i in rows]
+        matches = partial_ratios(found, [actuals[i] for i in rows])
+        for i, expect, score in zip(rows, found, matches, strict=True):
+            # On a tie in score and length the later search field wins
+            if score < success_threshold or (score, -len(expect)) < (
+                scores[i],
+                -len(gbif_data[i]),
+            ):
                 continue
-            match output_type:
-                case ".html":
-                    values = [
-                        f"<span class='label'>{s.gbif_field}</span> {s.gbif_data}"
-                        for s in scores
-                    ]
-                    self.gbif_row[col] = "<br/>".join(values)
-                case ".ods":
-                    self.gbif_row[col] = ",\n".join(
-                        [f"{s.gbif_field} {s.gbif_data}" for s in scores]
-                    )
-
-    def format_score_rows(self, output_type: str) -> None:
-        for score_row in self.score_rows:
-            for col, score in score_row.items():
-                if col == "row_type":
-                    continue
-                match output_type:
-                    case ".html":
-                        score_row[col] = (
-                            f"<span class='label'>{score.gbif_field}</span> "
-                            f"{score.method} {score.score:0.2f}"
-                        )
-                    case ".ods":
-                        value = f"{score.score:0.2f}"
-                        score_row[col] = f"{score.gbif_field} {score.method} {value}"
+            cats[i] = ScoreCat.search_success.name
+            scores[i] = score
+            methods[i] = "FPR"
+            gbif_fields[i] = search_field
+            gbif_data[i] = expect
+
+    return {
+        "cat": cats,
+        "score": scores,
+        "method": methods,
+        "gbif_field": gbif_fields,
+        "gbif_data": gbif_data,
+        "is_aligned": [is_aligned] * size,
+    }
+
+
+def partial_ratios(expects: list[str], actuals: list[str]) -> list[float]:
+    """Fuzzy match each expected value to its actual value, scores are 0 to 1."""
+    if not expects:
+        return []
+    # Doubles so the scores are exactly what fuzz.partial_ratio gives
+    matches = process.cpdist(
+        expects,
+        actuals,
+        scorer=fuzz.partial_ratio,
+        dtype="float64",
+        workers=WORKER["score_workers"],
+    )
+    return (matches / 100.0).tolist()
+
+
+def concat_scores(
+    scored: list[pd.DataFrame], stems: list[str], columns: list[str]
+) -> pd.DataFrame:
+    """Put the chunks together, the repeated strings are stored once as categories."""
+    scores = pd.concat([s for s in scored if not s.empty], ignore_index=True)
+    if scores.empty:
+        scores = pd.DataFrame(columns=SCORE_COLUMNS)
+    scores["file"] = pd.Categorical(scores["file"], categories=stems, ordered=True)
+    scores["column"] = pd.Categorical(
+        scores["column"], categories=columns, ordered=True
+    )
+    for col in ("source", "cat", "method", "gbif_field"):
+        scores[col] = scores[col].astype("category")
+    return scores
 
 
 # ----------------------------------------------------------------------------------
-def score_against_gbif(args: argparse.Namespace) -> None:
-    """Compare LLM outputs against gbif data and write an HTML report."""
-    job_began = log.job_began(args.log_file, args=args)
+def tallies(scores: pd.DataFrame) -> pd.Series:
+    """
+    Get the tally column for every cell from its category and whether it's aligned.
 
-    # Read OCR data
-    ocr_df = pd.read_csv(args.ocr_file, dtype=str).fillna("")
-    ocr_by_image = {o["source"]: o for o in ocr_df.to_dict("records")}
+    There are only a few categories, so I look up each category's tally once, for
+    aligned and not aligned columns, and then pick one for every cell by its codes.
+    """
+    cats = scores["cat"].astype("category").cat
+    lookup = {
+        aligned: np.array(
+            [
+                TALLY_COLUMNS.index(t) if (t := TALLIES.get((c, aligned))) else -1
+                for c in cats.categories
+            ]
+            + [-1]  # A missing category has a code of -1
+        )
+        for aligned in (True, False)
+    }
+    codes = cats.codes.to_numpy()
+    tally_codes = np.where(
+        scores["is_aligned"].to_numpy(dtype=bool),
+        lookup[True][codes],
+        lookup[False][codes],
+    )
+    return pd.Series(
+        pd.Categorical.from_codes(tally_codes, categories=TALLY_COLUMNS),
+        index=scores.index,
+    )
 
-    # Read GBIF data
-    gbif_df = pd.read_csv(args.gbif_file, dtype=str).fillna("")
-    gbif_by_image = {g["source"]: g for g in gbif_df.to_dict("records")}
 
-    # Init 2 of the 3 indexes for the quasi 3D struct, see this script's doc string
-    image_paths = set(gbif_by_image)
-    column_keys = {}
+def tally(scores: pd.DataFrame) -> pd.DataFrame:
+    """Count the score categories and average the scores for every file and column."""
+    scores = scores.assign(tally=tallies(scores))
 
-    # Get parsed data
-    parsed_data = {}
-    for parse_file in args.parse_file:
-        llm_df = pd.read_csv(parse_file, dtype=str).fillna("")
-        column_keys |= dict.fromkeys(llm_df.columns)
-        image_paths &= set(llm_df["source"])
+    counts = scores.pivot_table(
+        index=["file", "column"],
+        columns="tally",
+        values="score",
+        aggfunc="size",
+        fill_value=0,
+        observed=True,
+    ).reindex(columns=TALLY_COLUMNS, fill_value=0)
 
-        llm_list = llm_df.to_dict("records")
-        parsed_data[parse_file.stem] = {r["source"]: r for r in llm_list}
+    scoreable = scores[~scores["tally"].isin(NOT_SCOREABLE)]
+    score_sum = scoreable.groupby(["file", "column"], observed=True)["score"].sum()
 
-    # Finish building the row index
-    image_paths = sorted(image_paths)
-    image_paths = image_paths[: args.limit]
+    stats = counts.replace(0, "").astype(object)
+    stats["total_scoreable"] = counts.drop(columns=NOT_SCOREABLE).sum(axis="columns")
+    stats["total_count"] = counts.sum(axis="columns")
+    average = score_sum.reindex(counts.index, fill_value=0.0) / stats["total_scoreable"]
+    stats["average_score"] = average.where(stats["total_scoreable"] > 0, 0.0)
 
-    # Get common columns in the original order
-    columns = [k for k in column_keys if k not in FIRST_COLUMNS]
+    stats = stats.reset_index()
+    stats["file"] = stats["file"].astype(str) + " score"
+    stats["column"] = stats["column"].astype(str)
+    stats.columns.name = None
+    return stats
 
-    # If the gbif cells do not match the llm cells then search for aligned data in gbif
-    gbif_search = get_gbif_search()
 
-    output_type = args.output_csv.suffix.lower()
-
-    # Build report lines
-    row_groups: list[RowGroup] = []
-    for i, image_path in enumerate(image_paths, 1):
-        row_group = RowGroup(
-            first_columns={
-                "text": ocr_by_image[image_path]["text"],
-                "image_path": image_path,
-                "href": gbif_by_image[image_path]["identifier"],
-                "row_group": str(i),
-            }
-        )
+def score_matrix(scores: pd.DataFrame) -> pd.DataFrame:
+    """
+    Get the scores with a row per image and a column per file and column.
 
-        # Build skeleton of the GBIF row. It gets filled in during scoring.
-        # It will ultimately contain a list of score results.
-        gbif_input = gbif_by_image[image_path]
-        gbif_row: dict[str, Any] = {"row_type": "GBIF"} | {c: [] for c in columns}
-        row_group.gbif_row = gbif_row
-
-        # Build the parse and score rows
-        for parse_file in args.parse_file:
-            # Build LLM row. It just holds the LLM results as is
-            parse_row: dict[str, str] = {"row_type": parse_file.stem} | {
-                c: parsed_data[parse_file.stem][image_path][c] for c in columns
-            }
-            row_group.parse_rows.append(parse_row)
-
-            # Build score row by scoring each column. This also fills in the GBIF cell
-            score_row: dict[str, str | Score] = {"row_type": f"{parse_file.stem} score"}
-            for col in columns:
-                actual = parse_row[col]
-                score = calc_score(
-                    col, actual, gbif_input, gbif_search, args.success_threshold
-                )
-                score_row[col] = score
-                if score.gbif_field:
-                    gbif_row[col].append(score)
-            row_group.score_rows.append(score_row)
-
-        row_groups.append(row_group)
+    Cells that don't count towards the average score are NaN.
+    """
+    scoreable = ~tallies(scores).isin(NOT_SCOREABLE)
+    table = pd.DataFrame(
+        {
+            "source": scores["source"].astype(str),
+            "file": scores["file"],
+            "column": scores["column"],
+            "score": scores["score"].where(scoreable).astype("float64"),
+        }
+    )
+    return table.pivot_table(
+        index="source",
+        columns=["file", "column"],
+        values="score",
+        aggfunc="first",
+        dropna=False,
+        observed=True,
+    )
 
-    logging.info("Tally scores")
-    stats = Score.tally(row_groups)
 
-    for row_group in tqdm(row_groups, desc="format"):
-        row_group.format(output_type)
+def apply_threshold(scores: pd.DataFrame, threshold: float) -> pd.DataFrame:
+    """
+    Fail the successful searches that score below the threshold.
 
-    write_ods(
-        ods_file=args.output_csv,
-        row_groups=row_groups,
-        gbif_search=gbif_search,
-        stats=stats,
+    This gives the same scores as scoring with the threshold because the best candidate
+    of a search is only kept when it's at or above the threshold.
+    """
+    failed = (scores["cat"] == ScoreCat.search_success.name) & (
+        scores["score"] < threshold
     )
+    if not failed.any():
+        return scores
+
+    scores = scores.copy()
+    for col, value in [
+        ("cat", ScoreCat.search_fail.name),
+        ("method", ""),
+        ("gbif_field", ""),
+    ]:
+        if value not in scores[col].cat.categories:
+            scores[col] = scores[col].cat.add_categories(value)
+        scores.loc[failed, col] = value
+    scores.loc[failed, "score"] = 0.0
+    scores.loc[failed, "gbif_data"] = ""
+    return scores
+
+
+def sweep(scores: pd.DataFrame, thresholds: list[float]) -> pd.DataFrame:
+    """
+    Tally the GBIF searches for every success threshold at once.
 
-    log.job_elapsed(job_began)
+    The scores must come from a threshold of zero so that a search has the score of
+    its best candidate. At a higher threshold the search succeeds if that score is at
+    or above it, otherwise it fails with a score of zero. I compare every searched
+    cell with all of the thresholds in one array and sum them by file and column.
 
+    - success_rate: The share of the searches that succeed, like recall.
+    - success_mean: The mean score of the successes, like precision.
+    - average_score: The average score in the statistics for the threshold.
+    """
+    thresholds = np.array(sorted(set(thresholds)), dtype=np.float64)
+
+    not_scoreable = tallies(scores).isin(NOT_SCOREABLE).to_numpy()
+    cats = scores["cat"]
+    searched = cats.isin(
+        [ScoreCat.search_success.name, ScoreCat.search_fail.name]
+    ).to_numpy()
+    success = (cats == ScoreCat.search_success.name).to_numpy()
+    aligned = scores["is_aligned"].to_numpy(dtype=bool)
+    raw = scores["score"].to_numpy(dtype=np.float64)
+
+    # Every cell that isn't a search scores the same for all thresholds
+    fixed = ~searched & ~not_scoreable
+    passed = success[:, None] & (raw[:, None] >= thresholds[None, :])
+
+    cells = scores.groupby(["file", "column"], observed=True, sort=True)
+    codes = cells.ngroup().to_numpy()
+    fixed_count, fixed_sum, aligned_searches, searches = group_sum(
+        np.column_stack(
+            [fixed, np.where(fixed, raw, 0.0), searched & aligned, searched]
+        ),
+        codes,
+    ).T
+    passed_count = group_sum(passed, codes)
+    passed_sum = group_sum(np.where(passed, raw[:, None], 0.0), codes)
+
+    # A failed search only counts towards the average when GBIF has the column
+    scoreable = (fixed_count + aligned_searches)[:, None] + group_sum(
+        passed & ~aligned[:, None], codes
+    )
 
-# ----------------------------------------------------------------------------------
-def calc_score(
-    col: str, actual: str, gbif_input: dict, gbif_search: dict, success_threshold: float
-) -> Score:
-    """Calculate the score of a LLM/parsed cell against a matching GBIF cell."""
-    is_aligned = False
-
-    # If the GBIF column has a value then we score against that
-    if col in gbif_input:
-        expect = gbif_input.get(col).strip()
-        if not expect and not actual:
-            return Score(
-                cat=ScoreCat.aligned_both_empty,
-                score=1.0,
-                method="EQ",
-                gbif_field=col,
-                is_aligned=True,
-            )
-        if not expect:
-            is_aligned = True
-            # return Score(cat=ScoreCat.aligned_gbif_empty)
-        if not actual:
-            return Score(cat=ScoreCat.aligned_parse_empty, is_aligned=True)
-        if expect and actual:
-            score = fuzz.partial_ratio(expect, actual) / 100.0
-            return Score(
-                cat=ScoreCat.aligned_both_full,
-                score=score,
-                method="FPR",
-                gbif_field=col,
-                gbif_data=expect,
-                is_aligned=True,
-            )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        success_rate = passed_count / searches[:, None]
+        success_mean = passed_sum / passed_count
+        average = (fixed_sum[:, None] + passed_sum) / scoreable
+    average = np.where(scoreable > 0, average, 0.0)
+
+    index = cells.size().index
+    size = len(thresholds)
+    files = index.get_level_values("file").astype(str) + " score"
+    return pd.DataFrame(
+        {
+            "file": np.repeat(files, size),
+            "column": np.repeat(index.get_level_values("column").astype(str), size),
+            "threshold": np.tile(thresholds, len(index)),
+            "search_count": np.repeat(searches, size).astype(int),
+            "search_success_count": passed_count.ravel().astype(int),
+            "search_fail_count": (searches[:, None] - passed_count).ravel().astype(int),
+            "success_rate": success_rate.ravel(),
+            "success_mean": success_mean.ravel(),
+            "average_score": average.ravel(),
+        }
+    )
 
-    # If there is not value to score against then we can't search for a value
-    if not actual:
-        return Score(
-            cat=ScoreCat.not_aligned_parse_empty, method="BLANK", is_aligned=is_aligned
-        )
 
-    # Try searching for a matching value in gbif_search columns and pick the best one
-    max_score = Score(cat=ScoreCat.search_fail, is_aligned=is_aligned)
+def group_sum(values: np.ndarray, codes: np.ndarray) -> np.ndarray:
+    """Sum the rows of an array that are in the same group."""
+    return pd.DataFrame(values).groupby(codes).sum().to_numpy(dtype=np.float64)
 
-    for search_field in gbif_search.get(col, []):
-        expect = gbif_input.get(search_field, "")
-        if not expect:
-            continue
-
-        score = fuzz.partial_ratio(expect, actual) / 100.0
-        current = Score(
-            cat=ScoreCat.search_success,
-            score=score,
-            method="FPR",
-            gbif_field=search_field,
-            gbif_data=expect,
-            is_aligned=is_aligned,
-        )
-        if score >= success_threshold:
-            max_score = max(current, max_score)
 
-    return max_score
+# ----------------------------------------------------------------------------------
+def detail_groups(
+    scores: pd.DataFrame,
+    *,
+    joined: join_util.Joined,
+    rows: list[int],
+    columns: list[str],
+    output_type: str,
+) -> Iterator[dict[str, Any]]:
+    """
+    Build the row groups of the joined records in rows as they are written.
+
+    The groups are the GBIF row with every GBIF field that was scored, a row with
+    each parse file's values, and a row with their scores.
+    """
+    image_paths = [joined.sources[i] for i in rows]
+    parsed_data = joined.parses
+
+    # Every image has a score for each parse file and column, so after sorting an
+    # image's scores are the next block of rows
+    block = len(parsed_data) * len(columns)
+    source = pd.Categorical(scores["source"], categories=image_paths, ordered=True)
+    ordered = scores.assign(source=source).sort_values(
+        ["source", "file", "column"], kind="stable"
+    )
+    records = ordered.itertuples(index=False)
+
+    for row_group, (row, image_path) in enumerate(
+        zip(rows, image_paths, strict=True), 1
+    ):
+        group = list(islice(records, block))
+
+        found = defaultdict(list)
+        for score in group:
+            if score.gbif_field:
+                found[score.column].append((score.gbif_field, score.gbif_data))
+        group_rows = [
+            {"row_type": "GBIF"}
+            | {c: format_gbif_cell(found[c], output_type) for c in columns}
+        ]
+
+        for stem, parses in parsed_data.items():
+            parse = parses[row]
+            group_rows.append({"row_type": stem} | {c: parse[c] for c in columns})
+
+        for i, stem in enumerate(parsed_data):
+            score_row = {"row_type": f"{stem} score"}
+            for score in group[i * len(columns) : (i + 1) * len(columns)]:
+                score_row[score.column] = format_score_cell(score, output_type)
+            group_rows.append(score_row)
+
+        yield {
+            "text": joined.texts[row],
+            "image_path": image_path,
+            "href": joined.expects[row]["identifier"],
+            "row_group": str(row_group),
+            "rows": group_rows,
+            "scores": [(s.file, s.column, s.cat, s.score) for s in group],
+        }
+
+
+def detail_rows(groups: Iterator[dict[str, Any]]) -> Iterator[dict[str, Any]]:
+    """Flatten the row groups into the rows of the detail sheet."""
+    for group in groups:
+        first_columns = {
+            k: group[k] for k in ("text", "image_path", "href", "row_group")
+        }
+        for row in group["rows"]:
+            yield first_columns | row
+
+
+def format_gbif_cell(
+    fields: list[tuple[str, str]], output_type: str
+) -> str | list[tuple[str, str]]:
+    # The HTML report shows (label, text) pairs as labeled lines
+    if output_type == ".html":
+        return fields
+    return ",\n".join(f"{f} {d}" for f, d in fields)
+
+
+def format_score_cell(score: tuple, output_type: str) -> str | list[tuple[str, str]]:
+    if output_type == ".html":
+        return [(score.gbif_field, f"{score.method} {score.score:0.2f}")]
+    return f"{score.gbif_field} {score.method} {score.score:0.2f}"
 
 
 # ----------------------------------------------------------------------------------
-def write_ods(
-    ods_file: Path,
-    row_groups: list[RowGroup],
+def write_output(
+    path: Path,
+    *,
+    stats_df: pd.DataFrame,
+    groups: Iterator[dict[str, Any]],
+    columns: list[str],
     gbif_search: dict,
-    stats: dict,
+    tables: dict[str, pd.DataFrame] | None = None,
 ) -> None:
-    logging.info("Building stats tab")
-    stats_rows = []
-    for stem, fields in stats.items():
-        for col, data in fields.items():
-            stats_rows.append({"file": stem, "column": col, **data})
-    stats_df = pd.DataFrame(stats_rows)
-
-    rows = []
-    for row_group in tqdm(row_groups, desc="build detail"):
-        rows.append(row_group.first_columns | row_group.gbif_row)
-        rows += [row_group.first_columns | row for row in row_group.parse_rows]
-        rows += [row_group.first_columns | row for row in row_group.score_rows]
-    group_df = pd.DataFrame(rows)
-
-    logging.info("Building GBIF search tab")
+    """Write the report, any extra tables go after the statistics."""
     gbif_rows = [
         {"field": k, "search fields": ", ".join(v)} for k, v in gbif_search.items()
     ]
-    gbif_df = pd.DataFrame(gbif_rows)
-
-    logging.info(f"Write {ods_file.name}")
-    with pd.ExcelWriter(ods_file, engine="odf") as writer:
-        stats_df.to_excel(writer, sheet_name="statistics", index=False)
-        group_df.to_excel(writer, sheet_name="detail", index=False)
-        gbif_df.to_excel(writer, sheet_name="gbif_search_fields", index=False)
+    tables = {"statistics": stats_df} | (tables or {})
+
+    # The row groups are written as they are built
+    logging.info(f"Write {path.name}")
+    groups = tqdm(groups, desc="write detail")
+    if path.suffix.lower() == ".html":
+        html_report.write_html(
+            path,
+            title=f"GBIF comparison: {path.stem}",
+            columns=columns,
+            groups=groups,
+            tables=tables | {"gbif_search_fields": gbif_rows},
+        )
+    else:
+        report_writer.write_report(
+            path,
+            tables | {"detail": detail_rows(groups), "gbif_search_fields": gbif_rows},
+        )
 
 
 # ----------------------------------------------------------------------------------
@@ -478,7 +751,9 @@ def parse_args(args: list[str] | None = None) -> argparse.Namespace:
         type=Path,
         required=True,
         metavar="path",
-        help="""Write the comparison results to this CSV file.""",
+        help="""Write the comparison results to this report. The type is taken from
+            the suffix: .ods, .xlsx, a bundle of .csv or .parquet files, one per
+            sheet, or .html for a paged report that can be filtered in a browser.""",
     )
     settings_group = arg_parser.add_argument_group("program settings")
     settings_group.add_argument(
@@ -490,6 +765,77 @@ def parse_args(args: list[str] | None = None) -> argparse.Namespace:
             to be considered a success. We don't want to match on single characters
             or other trash matches. (default %(default)s)""",
     )
+    settings_group.add_argument(
+        "--sweep-threshold",
+        type=float,
+        action="append",
+        metavar="float",
+        help="""Also tally the GBIF searches for this success threshold and add them
+            to the report as a "threshold_sweep" sheet. You may use this option more
+            than once. The cells are scored once for all of the thresholds and the
+            rest of the report uses --success-threshold.""",
+    )
+    settings_group.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        metavar="int",
+        help="""Score the row groups in chunks using this many processes.
+            (default %(default)s)""",
+    )
+    sampling_group = arg_parser.add_argument_group("sampling options")
+    sampling_group.add_argument(
+        "--sample",
+        type=int,
+        metavar="int",
+        help="""Only score a stratified random sample of this many images. The mean
+            score of every parse file and column with its bootstrap confidence
+            interval is added to the report as a "confidence" sheet.""",
+    )
+    sampling_group.add_argument(
+        "--stratify",
+        choices=sampling.STRATIFY_BY,
+        default=sampling.STRATIFY_BY[0],
+        help="""Stratify the sample by the institution code at the front of the image
+            names or by how many fields are filled in on the GBIF records.
+            (default: %(default)s)""",
+    )
+    sampling_group.add_argument(
+        "--sequential",
+        action="store_true",
+        help="""Keep adding another --sample images to the sample until every
+            column is settled. That is, until one parse file's interval is above the
+            others or until all of the intervals are narrower than --ci-width.""",
+    )
+    sampling_group.add_argument(
+        "--ci-width",
+        type=float,
+        default=0.05,
+        metavar="float",
+        help="""Intervals this narrow are good enough to stop sequential sampling.
+            (default: %(default)s)""",
+    )
+    sampling_group.add_argument(
+        "--confidence",
+        type=float,
+        default=0.95,
+        metavar="float",
+        help="""The confidence level of the intervals. (default: %(default)s)""",
+    )
+    sampling_group.add_argument(
+        "--resamples",
+        type=int,
+        default=1000,
+        metavar="int",
+        help="""Resample the scores this many times for the bootstrap.
+            (default: %(default)s)""",
+    )
+    sampling_group.add_argument(
+        "--seed",
+        type=int,
+        metavar="int",
+        help="""Random seed for picking the sample and resampling.""",
+    )
     logging_group = arg_parser.add_argument_group("logging options")
     logging_group.add_argument(
         "--log-file",
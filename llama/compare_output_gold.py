@@ -21,17 +21,34 @@ Output format: more or less
 """
 
 import argparse
+import logging
 import textwrap
 from dataclasses import dataclass, field
 from pathlib import Path
+from typing import TYPE_CHECKING, Any
 
 import pandas as pd
 
 from llama.fields.extracted_field import ExtractedField
-from llama.pylib import log, prompt_util
+from llama.pylib import (
+    join_util,
+    lineage,
+    log,
+    pool_util,
+    prompt_util,
+    report_writer,
+    sampling,
+    table_io,
+)
+
+if TYPE_CHECKING:
+    import numpy as np
 
 FIRST_COLUMNS = ["text", "source", "row_group", "row_type"]
 
+# Each worker process fills this in once, see init_worker
+WORKER: dict[str, Any] = {}
+
 
 @dataclass
 class Score:
@@ -58,6 +75,7 @@ class RowGroup:
     gold_row: dict = field(default_factory=dict)
     parse_rows: list[dict] = field(default_factory=list)
     score_rows: list[dict] = field(default_factory=list)
+    scores: dict[str, dict[str, float]] = field(default_factory=dict)
 
     def flatten(self) -> list[dict]:
         rows = [self.first_columns | self.gold_row]
@@ -75,84 +93,180 @@ def score_against_gold(args: argparse.Namespace) -> None:
     """
     job_began = log.job_began(args.log_file, args=args)
 
-    # Read OCR data
-    ocr_df = pd.read_csv(args.ocr_file, dtype=str).fillna("")
-    ocr_by_image = {o["source"]: o for o in ocr_df.to_dict("records")}
+    joined = join_util.join(
+        args.ocr_file, args.parse_file, args.gold_file, limit=args.limit
+    )
 
-    # Read Gold data
-    gold_df = pd.read_csv(args.gold_file, dtype=str).fillna("")
-    gold_by_image = {g["source"]: g for g in gold_df.to_dict("records")}
+    # Get common rows in the original order
+    columns = dict.fromkeys(joined.expect_columns) | dict.fromkeys(joined.parse_columns)
+    columns = [
+        k for k in columns if k not in FIRST_COLUMNS and not lineage.is_lineage(k)
+    ]
+
+    # Everything a worker needs to build one group of rows
+    items = [
+        (
+            i + 1,
+            joined.texts[i],
+            joined.expects[i],
+            {stem: parses[i] for stem, parses in joined.parses.items()},
+        )
+        for i in range(len(joined.sources))
+    ]
 
-    # Init row and column indexes
-    image_paths = set(gold_by_image)
-    columns = dict.fromkeys(gold_by_image)
+    if args.sample:
+        row_groups, confidence = sample_groups(args, items, columns)
+        path = report_writer.bundle_path(args.output_csv, "confidence")
+        table_io.write_table(path, confidence)
+    else:
+        row_groups = score_groups(args, items, columns)
 
-    # Get parsed data
-    parsed_data = {}
-    for parse_file in args.llm_file:
-        llm_df = pd.read_csv(parse_file, dtype=str).fillna("")
-        columns |= dict.fromkeys(llm_df.columns)
-        image_paths &= set(llm_df["source"])
+    rows = []
+    for group in row_groups:
+        rows += group.flatten()
 
-        llm_list = llm_df.to_dict("records")
-        parsed_data[parse_file.stem] = {r["source"]: r for r in llm_list}
+    df = pd.DataFrame(rows)
+    table_io.write_table(args.output_csv, df)
 
-    # Finish building the row index
-    image_paths = sorted(image_paths)
-    image_paths = image_paths[: args.limit]
+    log.job_elapsed(job_began)
 
-    # Get common rows in the original order
-    columns = [k for k in columns if k not in FIRST_COLUMNS]
 
-    # Load scoring classes
-    field_classes = prompt_util.Prompt.load(args.prompt).field_classes()
+def score_groups(
+    args: argparse.Namespace, items: list[tuple], columns: list[str]
+) -> list[RowGroup]:
+    """Build and score the row groups in the worker processes."""
+    chunks = pool_util.chunk(items, args.workers)
+    groups = pool_util.run_chunks(
+        build_groups,
+        chunks,
+        workers=args.workers,
+        initializer=init_worker,
+        initargs=(args.prompt, columns),
+        desc="score",
+    )
+    return [g for chunk in groups for g in chunk]
+
+
+def sample_groups(
+    args: argparse.Namespace, items: list[tuple], columns: list[str]
+) -> tuple[list[RowGroup], pd.DataFrame]:
+    """
+    Score a stratified sample of the row groups and get the confidence intervals.
+
+    In sequential mode the sample grows until the intervals are settled.
+    """
+    strata = sampling.stratify([item[2] for item in items], args.stratify)
+    order = sampling.stratified_order(strata, args.seed)
 
-    # Build rows for each group
     row_groups = []
-    for i, image_path in enumerate(image_paths, 1):
-        gold = gold_by_image[image_path]
-
-        group = RowGroup(
-            first_columns={
-                "text": ocr_by_image[image_path]["text"],
-                "source": gold["source"],
-                "row_group": str(i),
-            },
-            gold_row={
-                "row_type": "GOLD",
-                **{f: gold.get(f, "") for f in columns},
-            },
+    sampled = []
+    for batch in sampling.batches(order, args.sample, sequential=args.sequential):
+        row_groups += score_groups(args, [items[i] for i in batch], columns)
+        sampled += batch
+
+        scores = pd.DataFrame(
+            [
+                {
+                    (stem, c): s
+                    for stem, cols in g.scores.items()
+                    for c, s in cols.items()
+                }
+                for g in row_groups
+            ]
+        )
+        confidence = sampling.confidence_table(
+            scores,
+            [strata[i] for i in sampled],
+            resamples=args.resamples,
+            confidence=args.confidence,
+            seed=args.seed,
         )
+        logging.info(f"Scored a sample of {len(sampled)} of {len(items)} row groups")
+        if sampling.settled(confidence, args.ci_width):
+            break
 
-        # Build parse rows and score rows
-        for parse_file in args.parse_file:
-            stem = parse_file.stem
-            # Build an LLM row
-            group.parse_rows.append(
-                {"row_type": stem, **{c: parsed_data[stem].get(c, "") for c in columns}}
-            )
-            # Build a score row
-            score_row = {"row_type": f"score {stem}"}
-            for col in columns:
-                field_class = field_classes.get(col, ExtractedField)
-                score = field_class.score(
-                    str(gold.get(col, "")),
-                    str(parsed_data[stem].get(col, "")),
-                    parsed_data[stem],
-                )
-                score_row[col] = f"{score:0.2f}"
-            group.score_rows.append(score_row)
-
-        row_groups.append(group)
+    row_groups.sort(key=lambda g: int(g.first_columns["row_group"]))
+    return row_groups, confidence
 
-    rows = []
-    for group in row_groups:
-        rows += group.flatten()
 
-    df = pd.DataFrame(rows)
-    df.to_csv(args.output_csv, index=False)
+def init_worker(prompt_path: Path, columns: list[str]) -> None:
+    """Load the scoring classes once per worker process."""
+    WORKER["field_classes"] = prompt_util.Prompt.load(prompt_path).field_classes
+    WORKER["columns"] = columns
 
-    log.job_elapsed(job_began)
+
+def build_groups(items: list[tuple]) -> list[RowGroup]:
+    """Score a chunk of row groups a whole column at a time, then build the groups."""
+    scores = score_items(items)
+    return [
+        build_group(
+            *item,
+            scores={
+                stem: {c: s[i] for c, s in cols.items()}
+                for stem, cols in scores.items()
+            },
+        )
+        for i, item in enumerate(items)
+    ]
+
+
+def score_items(items: list[tuple]) -> dict[str, dict[str, np.ndarray]]:
+    """Score every parse file's columns against the gold rows in a chunk."""
+    if not items:
+        return {}
+    field_classes = WORKER["field_classes"]
+    golds = [item[2] for item in items]
+    scores = {}
+    for stem in items[0][3]:
+        parses = [item[3][stem] for item in items]
+        scores[stem] = {
+            col: field_classes.get(col, ExtractedField).score_batch(
+                [str(g.get(col, "")) for g in golds],
+                [str(p.get(col, "")) for p in parses],
+                parses,
+            )
+            for col in WORKER["columns"]
+        }
+    return scores
+
+
+def build_group(
+    row_group: int,
+    text: str,
+    gold: dict[str, str],
+    parsed: dict[str, dict],
+    *,
+    scores: dict[str, dict[str, float]],
+) -> RowGroup:
+    """Build the rows for one image and score each parse against the gold row."""
+    columns = WORKER["columns"]
+
+    group = RowGroup(
+        first_columns={
+            "text": text,
+            "source": gold["source"],
+            "row_group": str(row_group),
+        },
+        gold_row={
+            "row_type": "GOLD",
+            **{f: gold.get(f, "") for f in columns},
+        },
+        scores=scores,
+    )
+
+    # Build parse rows and score rows
+    for stem, parse in parsed.items():
+        # Build an LLM row
+        group.parse_rows.append(
+            {"row_type": stem, **{c: parse.get(c, "") for c in columns}}
+        )
+        # Build a score row
+        score_row = {"row_type": f"score {stem}"}
+        for col in columns:
+            score_row[col] = f"{scores[stem][col]:0.2f}"
+        group.score_rows.append(score_row)
+
+    return group
 
 
 def parse_args(args: list[str] | None = None) -> argparse.Namespace:
@@ -192,7 +306,8 @@ def parse_args(args: list[str] | None = None) -> argparse.Namespace:
         type=Path,
         required=True,
         metavar="path",
-        help="""Write the comparison results to this CSV file.""",
+        help="""Write the comparison results to this CSV file. If the file name ends
+            with ".parquet" or ".arrows" then write a Parquet or Arrow file.""",
     )
     prompt_group = arg_parser.add_argument_group("prompt options")
     prompt_group.add_argument(
@@ -203,6 +318,69 @@ def parse_args(args: list[str] | None = None) -> argparse.Namespace:
         help="""A markdown file with a prompt and list of fields to parse.
             It is used to get the scoring functions.""",
     )
+    settings_group = arg_parser.add_argument_group("program settings")
+    settings_group.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        metavar="int",
+        help="""Score the row groups in chunks using this many processes.
+            (default: %(default)s)""",
+    )
+    sampling_group = arg_parser.add_argument_group("sampling options")
+    sampling_group.add_argument(
+        "--sample",
+        type=int,
+        metavar="int",
+        help="""Only score a stratified random sample of this many row groups. The mean
+            score of every parse file and column with its bootstrap confidence
+            interval is written next to the output file, like "output.confidence.csv".
+            """,
+    )
+    sampling_group.add_argument(
+        "--stratify",
+        choices=sampling.STRATIFY_BY,
+        default=sampling.STRATIFY_BY[0],
+        help="""Stratify the sample by the institution code at the front of the image
+            names or by how many fields are filled in on the gold rows.
+            (default: %(default)s)""",
+    )
+    sampling_group.add_argument(
+        "--sequential",
+        action="store_true",
+        help="""Keep adding another --sample row groups to the sample until every
+            column is settled. That is, until one parse file's interval is above the
+            others or until all of the intervals are narrower than --ci-width.""",
+    )
+    sampling_group.add_argument(
+        "--ci-width",
+        type=float,
+        default=0.05,
+        metavar="float",
+        help="""Intervals this narrow are good enough to stop sequential sampling.
+            (default: %(default)s)""",
+    )
+    sampling_group.add_argument(
+        "--confidence",
+        type=float,
+        default=0.95,
+        metavar="float",
+        help="""The confidence level of the intervals. (default: %(default)s)""",
+    )
+    sampling_group.add_argument(
+        "--resamples",
+        type=int,
+        default=1000,
+        metavar="int",
+        help="""Resample the scores this many times for the bootstrap.
+            (default: %(default)s)""",
+    )
+    sampling_group.add_argument(
+        "--seed",
+        type=int,
+        metavar="int",
+        help="""Random seed for picking the sample and resampling.""",
+    )
     logging_group = arg_parser.add_argument_group("logging options")
     logging_group.add_argument(
         "--log-file",
@@ -216,6 +394,13 @@ def parse_args(args: list[str] | None = None) -> argparse.Namespace:
         metavar="string",
         help="""Notes for logging.""",
     )
+    debugging_group = arg_parser.add_argument_group("debugging options")
+    debugging_group.add_argument(
+        "--limit",
+        type=int,
+        metavar="int",
+        help="""Limit to this many row groups.""",
+    )
     ns = arg_parser.parse_args(args)
     return ns
 
@@ -13,7 +13,9 @@ trying this because I really really need training data.
 
 I am going to mark the most common parse value, if there is one. I will allow you to
 limit the most common value to a majority. Obviously, you need at least 3 models run
-against the same text to be useful.
+against the same text to be useful. Values that are nearly the same, like "Mt. Hood"
+and "mt hood", are votes for the same value and the winner is the one that is most
+like the others, see llama/pylib/consensus.py.
 
 Output format: more or less
     Index: <row_group>.<column>.<llm_index>
@@ -41,7 +43,7 @@ from typing import Any
 
 import pandas as pd
 
-from llama.pylib import log
+from llama.pylib import consensus, join_util, lineage, log, report_writer
 
 FIRST_COLUMNS = ["text", "source", "row_group", "row_type"]
 
@@ -62,92 +64,69 @@ def compare_model_winner(args: argparse.Namespace) -> None:
     """Compare LLM outputs against each other and choose a winner."""
     job_began = log.job_began(args.log_file, args=args)
 
-    # Read OCR data
-    ocr_df = pd.read_csv(args.ocr_file, dtype=str).fillna("")
-    ocr_by_image = {o["source"]: o for o in ocr_df.to_dict("records")}
-
-    # Init 2 of the 3 indexes for the quasi 3D struct, see this script's doc string
-    image_paths = set(ocr_by_image)
-    column_keys = {}
-
-    # Get parsed data
-    parsed_data = {}
-    for parse_file in args.parse_file:
-        llm_df = pd.read_csv(parse_file, dtype=str).fillna("")
-        column_keys |= dict.fromkeys(llm_df.columns)
-        image_paths &= set(llm_df["source"])
-
-        llm_list = llm_df.to_dict("records")
-        parsed_data[parse_file.stem] = {r["source"]: r for r in llm_list}
-
-    # Finish building the row index
-    image_paths = sorted(image_paths)
-    image_paths = image_paths[: args.limit]
-    logging.info(f"Reporting on {len(image_paths)} images")
+    joined = join_util.join(args.ocr_file, args.parse_file, limit=args.limit)
+    logging.info(f"Reporting on {len(joined.sources)} images")
 
     # Get common columns in the original order
-    columns = [k for k in column_keys if k not in FIRST_COLUMNS]
+    columns = [
+        k
+        for k in joined.parse_columns
+        if k not in FIRST_COLUMNS and not lineage.is_lineage(k)
+    ]
+
+    stems = [p.stem for p in args.parse_file]
+    records = [joined.parses[stem] for stem in stems]
+
+    # Vote on a whole column at a time
+    winner_rows = [{} for _ in joined.sources]
+    tally = defaultdict(lambda: dict.fromkeys(stems, 0))
+    for col in columns:
+        values = [[r.get(col, "") for r in recs] for recs in records]
+        winners, members = consensus.vote(
+            values, threshold=args.similarity, majority=args.majority
+        )
+        for i, winner in enumerate(winners.tolist()):
+            if winner == consensus.NO_WINNER:
+                winner_rows[i][col] = "<no_winner>"
+                continue
+            winner_rows[i][col] = values[winner][i] or "<empty>"
+        for stem, count in zip(stems, members.sum(axis=0).tolist(), strict=True):
+            tally[col][stem] += count
 
-    tally = defaultdict(lambda: {p.stem: 0 for p in args.parse_file})
     row_groups = []
-    for i, image_path in enumerate(image_paths, 1):
+    for i, image_path in enumerate(joined.sources):
         group = RowGroup(
             first_columns={
-                "text": ocr_by_image[image_path]["text"],
+                "text": joined.texts[i],
                 "image_path": image_path,
-                "row_group": str(i),
-            }
+                "row_group": str(i + 1),
+            },
+            winner_row=winner_rows[i],
         )
-        # Build parse rows
-        for parse_file in args.parse_file:
-            stem = parse_file.stem
-            row = parsed_data[stem][image_path]
+        for stem, recs in zip(stems, records, strict=True):
             group.parse_rows.append(
-                {"row_type": stem, **{c: row.get(c, "") for c in columns}}
+                {"row_type": stem, **{c: recs[i].get(c, "") for c in columns}}
             )
-
-        # Get the winners
-        for col in columns:
-            values = defaultdict(list)
-            for row in group.parse_rows:
-                values[row[col]].append(row["row_type"])
-            counts = sorted(values.items(), key=lambda v: len(v[1]))
-            winner = counts[0]
-            result = winner[0]
-            if len(counts) > 1 and len(winner[1]) == len(counts[1][1]):
-                result = "<no_winner>"
-            if args.majority and float(len(winner[1])) < len(values) / 2.0:
-                result = "<no_winner>"
-            result = result or "<empty>"
-            group.winner_row[col] = result
-            if result != "<no_winner>":
-                for w in winner[1]:
-                    tally[col][w] += 1
-
         row_groups.append(group)
 
     rows = []
     for group in row_groups:
         rows += group.flatten()
 
-    detail_df = pd.DataFrame(rows)
-
     totals: dict[str, dict[str, Any]] = {
         f.stem: {"row_group": "Total", "row_type": f.stem, "average": 0.0}
         for f in args.parse_file
     }
     for col, counts in tally.items():
         for stem, count in counts.items():
-            totals[stem][col] = count / len(image_paths)
+            totals[stem][col] = count / len(joined.sources)
             totals[stem]["average"] += totals[stem][col]
     for counts in totals.values():
         counts["average"] /= len(tally)
 
     summary_df = pd.DataFrame(totals.values())
 
-    with pd.ExcelWriter(args.output_ods, engine="odf") as writer:
-        detail_df.to_excel(writer, sheet_name="detail", index=False)
-        summary_df.to_excel(writer, sheet_name="summary", index=False)
+    report_writer.write_report(args.output_ods, {"detail": rows, "summary": summary_df})
 
     log.job_elapsed(job_began)
 
@@ -187,13 +166,23 @@ def parse_args(args: list[str] | None = None) -> argparse.Namespace:
         type=Path,
         required=True,
         metavar="path",
-        help="""Write the comparison results to this spreadsheet.""",
+        help="""Write the comparison results to this spreadsheet. The type is taken
+            from the suffix: .ods, .xlsx, or a bundle of .csv or .parquet files.""",
     )
     winner_group = arg_parser.add_argument_group("Majority options")
     winner_group.add_argument(
         "--majority",
         action="store_true",
-        help="""Only report the a majority result as the winner.""",
+        help="""Only report a winner that more than half of the models agree on.""",
+    )
+    winner_group.add_argument(
+        "--similarity",
+        type=float,
+        default=0.9,
+        metavar="float",
+        help="""Values that score at least this much against each other are votes
+            for the same value. Values are compared with an edit distance ratio after
+            folding their case, punctuation, and spaces. (default: %(default)s)""",
     )
     logging_group = arg_parser.add_argument_group("logging options")
     logging_group.add_argument(
@@ -1,8 +1,6 @@
 import re
 from dataclasses import dataclass
-from typing import Any, ClassVar
-
-from rapidfuzz import fuzz
+from typing import ClassVar
 
 from llama.fields.extracted_field import ExtractedField
 from llama.pylib import fix_parses
@@ -25,10 +23,3 @@ class Habitat(ExtractedField):
         self.habitat = re.sub(
             r"^habitat[:,.;\s]*", "", self.habitat, flags=re.IGNORECASE
         ).strip()
-
-    @staticmethod
-    def score(expect: Any, actual: Any, record: dict[str, Any]) -> float:
-        del record
-
-        expect = str(expect)
-        return fuzz.partial_ratio(expect, actual) / 100.0
@@ -1,8 +1,12 @@
 from dataclasses import dataclass
+from typing import TYPE_CHECKING
 
 from llama.fields.extracted_field import ExtractedField
 from llama.pylib import fix_parses
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 
 @dataclass
 class DecimalLatitude(ExtractedField):
@@ -12,3 +16,9 @@ class DecimalLatitude(ExtractedField):
         del text
         lat = fix_parses.to_float(self.decimalLatitude)
         self.decimalLatitude = lat if lat is not None else ""
+
+    @classmethod
+    def clean_column(cls, column: pd.Series, rows: pd.DataFrame) -> pd.Series:
+        del rows
+        value = fix_parses.column_to_float(column)
+        return value.astype(object).where(value.notna(), "")
@@ -1,8 +1,12 @@
 from dataclasses import dataclass
+from typing import TYPE_CHECKING
 
 from llama.fields.extracted_field import ExtractedField
 from llama.pylib import fix_parses
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 
 @dataclass
 class DecimalLongitude(ExtractedField):
@@ -12,3 +16,9 @@ class DecimalLongitude(ExtractedField):
         del text
         long = fix_parses.to_float(self.decimalLongitude)
         self.decimalLongitude = long if long is not None else ""
+
+    @classmethod
+    def clean_column(cls, column: pd.Series, rows: pd.DataFrame) -> pd.Series:
+        del rows
+        value = fix_parses.column_to_float(column)
+        return value.astype(object).where(value.notna(), "")
@@ -1,7 +1,5 @@
 from dataclasses import dataclass
-from typing import Any, ClassVar
-
-from rapidfuzz import fuzz
+from typing import ClassVar
 
 from llama.fields.extracted_field import ExtractedField
 from llama.pylib import fix_parses
@@ -11,6 +9,7 @@ from llama.pylib import fix_parses
 class Locality(ExtractedField):
     # --------------
     scoring_method: ClassVar[str] = "FPR"
+    column_cleaner: ClassVar[str] = "str"
     # --------------
 
     locality: str = ""
@@ -18,10 +17,3 @@ class Locality(ExtractedField):
     def __post_init__(self, text: str) -> None:
         del text
         self.locality = fix_parses.to_str(self.locality)
-
-    @staticmethod
-    def score(expect: Any, actual: Any, record: dict[str, Any]) -> float:
-        del record
-
-        expect = str(expect)
-        return fuzz.partial_ratio(expect, actual) / 100.0
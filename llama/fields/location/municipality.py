@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from typing import ClassVar
 
 from llama.fields.extracted_field import ExtractedField
 from llama.pylib import fix_parses
@@ -6,6 +7,10 @@ from llama.pylib import fix_parses
 
 @dataclass
 class Municipality(ExtractedField):
+    # --------------
+    column_cleaner: ClassVar[str] = "hallucinated_str"
+    # --------------
+
     municipality: str = ""
 
     def __post_init__(self, text: str) -> None:
@@ -1,8 +1,12 @@
 from dataclasses import dataclass
+from typing import TYPE_CHECKING
 
 from llama.fields.extracted_field import ExtractedField
 from llama.pylib import fix_parses
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 
 @dataclass
 class Abundance(ExtractedField):
@@ -11,3 +15,8 @@ class Abundance(ExtractedField):
     def __post_init__(self, text: str) -> None:
         self.abundance = fix_parses.hallucinated_str(self.abundance, text)
         self.abundance = fix_parses.remove_trailing_punct(self.abundance)
+
+    @classmethod
+    def clean_column(cls, column: pd.Series, rows: pd.DataFrame) -> pd.Series:
+        column = fix_parses.column_hallucinated_str(column, rows["text"])
+        return fix_parses.column_remove_trailing_punct(column)
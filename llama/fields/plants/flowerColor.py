@@ -1,8 +1,12 @@
 from dataclasses import dataclass
+from typing import TYPE_CHECKING
 
 from llama.fields.extracted_field import ExtractedField
 from llama.pylib import fix_parses
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 
 @dataclass
 class FlowerColor(ExtractedField):
@@ -11,3 +15,8 @@ class FlowerColor(ExtractedField):
     def __post_init__(self, text: str) -> None:
         self.flowerColor = fix_parses.hallucinated_str(self.flowerColor, text)
         self.flowerColor = fix_parses.remove_trailing_punct(self.flowerColor)
+
+    @classmethod
+    def clean_column(cls, column: pd.Series, rows: pd.DataFrame) -> pd.Series:
+        column = fix_parses.column_hallucinated_str(column, rows["text"])
+        return fix_parses.column_remove_trailing_punct(column)
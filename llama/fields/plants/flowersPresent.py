@@ -1,9 +1,13 @@
 import re
 from dataclasses import dataclass
+from typing import TYPE_CHECKING
 
 from llama.fields.extracted_field import ExtractedField
 from llama.pylib import fix_parses
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 
 @dataclass
 class FlowersPresent(ExtractedField):
@@ -21,3 +25,9 @@ class FlowersPresent(ExtractedField):
             )
 
         self.flowersPresent = self.flowersPresent or ""
+
+    @classmethod
+    def clean_column(cls, column: pd.Series, rows: pd.DataFrame) -> pd.Series:
+        del rows
+        present = fix_parses.column_to_bool(column)
+        return present.map({True: True, False: ""})
@@ -3,7 +3,7 @@ from typing import Any, ClassVar
 
 from llama.fields.extracted_field import ExtractedField
 from llama.pylib import fix_parses
-from llama.vocab.taxon import GENUS_TO_FAMILY
+from llama.vocab import taxon
 
 
 @dataclass
@@ -24,7 +24,7 @@ class Family(ExtractedField):
         genus = genus[0] if len(genus) > 0 else ""
 
         # OK if expect is empty and the sci name genus is in the family
-        if not expect and GENUS_TO_FAMILY.get(genus) == actual:
+        if not expect and actual and taxon.genus_to_family(genus) == actual:
             return 1.0
 
         return ExtractedField.score(expect, actual, record)  # Default to edit distance
@@ -3,6 +3,7 @@ from dataclasses import dataclass
 
 from llama.fields.extracted_field import ExtractedField
 from llama.pylib import fix_parses
+from llama.vocab import taxon_names
 
 
 @dataclass
@@ -22,3 +23,8 @@ class ScientificName(ExtractedField):
         else:
             genus, species, *_ = words
             self.scientificName = f"{genus.capitalize()} {species.lower()}"
+
+            # Fix misspellings if the local name database has been built
+            match = taxon_names.correct(self.scientificName)
+            if match and match.specific_epithet:
+                self.scientificName = f"{match.genus} {match.specific_epithet}"
@@ -1,7 +1,15 @@
 from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from rapidfuzz import fuzz, process
 
 from llama.fields.extracted_field import ExtractedField
+from llama.fields.taxon.scientificName import ScientificName
 from llama.pylib import fix_parses
+from llama.vocab import taxon_names
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 @dataclass
@@ -14,3 +22,23 @@ class ScientificNameAuthorship(ExtractedField):
         self.scientificNameAuthorship = fix_parses.clean_str_ends(
             self.scientificNameAuthorship
         )
+
+    @classmethod
+    def clean_column(cls, column: pd.Series, rows: pd.DataFrame) -> pd.Series | None:
+        """Replace an author that is nearly right with the form in the name database."""
+        if "scientificName" not in rows or not taxon_names.is_available():
+            return None
+
+        return column.combine(rows["scientificName"], cls.clean_authorship)
+
+    @classmethod
+    def clean_authorship(cls, value: str, name: str) -> str:
+        author = cls(scientificNameAuthorship=value).scientificNameAuthorship
+        name = ScientificName(scientificName=name).scientificName
+        authors = [
+            fix_parses.clean_str_ends(n.authorship) for n in taxon_names.exact(name)
+        ]
+        best = process.extractOne(
+            author, authors, scorer=fuzz.ratio, score_cutoff=taxon_names.MIN_FUZZY_SCORE
+        )
+        return best[0] if author and best else author
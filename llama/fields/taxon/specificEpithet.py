@@ -1,7 +1,20 @@
 from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from rapidfuzz.distance import Levenshtein
 
 from llama.fields.extracted_field import ExtractedField
+from llama.fields.taxon.scientificName import ScientificName
 from llama.pylib import fix_parses
+from llama.vocab import taxon, taxon_names
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    import pandas as pd
+
+# A genus and a specific epithet
+BINOMIAL = 2
 
 
 @dataclass
@@ -11,3 +24,35 @@ class SpecificEpithet(ExtractedField):
     def __post_init__(self, text: str) -> None:
         del text
         self.specificEpithet = fix_parses.to_str(self.specificEpithet).lower()
+
+    @classmethod
+    def clean_column(cls, column: pd.Series, rows: pd.DataFrame) -> pd.Series | None:
+        """Use the epithet from a known scientific name when it is close."""
+        if "scientificName" not in rows or not taxon_names.is_available():
+            return None
+
+        return column.combine(rows["scientificName"], cls.clean_epithet)
+
+    @classmethod
+    def clean_epithet(
+        cls, value: str, name: str, db_path: Path = taxon_names.NAMES_DB
+    ) -> str:
+        """
+        Replace the epithet with the one from the name database.
+
+        The scientific name is only a hint, it can be as misspelled as the epithet, so
+        the name must be in the database or be corrected to a name that is.
+        """
+        epithet = cls(specificEpithet=value).specificEpithet
+        words = ScientificName(scientificName=name).scientificName.split()
+        if not epithet or len(words) != BINOMIAL:
+            return epithet
+
+        match = taxon_names.correct(" ".join(words), db_path=db_path)
+        if not match or not match.specific_epithet:
+            return epithet
+
+        known = match.specific_epithet.lower()
+        if Levenshtein.distance(epithet, known) <= taxon.MAX_DISTANCE:
+            return known
+        return epithet
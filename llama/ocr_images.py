@@ -2,7 +2,6 @@
 
 import argparse
 import base64
-import csv
 import logging
 import textwrap
 from collections import defaultdict
@@ -10,16 +9,23 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
 
-import pandas as pd
 import requests
 from requests.adapters import HTTPAdapter
 from tqdm import tqdm
 
-from llama.pylib import fix_ocr, image_util, log, prompt_util
+from llama.pylib import (
+    fix_ocr,
+    image_util,
+    lineage,
+    log,
+    plan_util,
+    prompt_util,
+    table_io,
+)
 
 MIN_SIZE = 1024
 
-COLUMN_NAMES = ["status", "source", "text", "elapsed"]
+COLUMN_NAMES = ["status", "source", "text", "elapsed", *lineage.OCR_COLUMNS]
 
 
 DEFAULT_POOL = 10
@@ -28,61 +34,82 @@ DEFAULT_POOL = 10
 def ocr_images(args: argparse.Namespace) -> None:
     job_began = log.job_began(args.log_file, args=args)
 
-    mode = "w"  # Used as a flag for writing the header elsewise "a" would work
+    prompt = prompt_util.Prompt.load(args.prompt)
+    prompt.log_size()
+
+    image_paths = image_util.get_images(args.image_dir, args.limit)
+
+    append = False
     already_read = set()
-    if args.ocr_file.exists() and args.ocr_file.stat().st_size >= MIN_SIZE:
-        mode = "a"
-        records = pd.read_csv(args.ocr_file, dtype=str).fillna("").to_dict("records")
-        already_read = {
-            r["source"]
+    if table_io.exists(args.ocr_file, MIN_SIZE):
+        append = True
+        lineage.upgrade_header(args.ocr_file, COLUMN_NAMES)
+        records = table_io.read_table(args.ocr_file).to_dict("records")
+        read = {
+            r["source"]: r
             for r in records
             if r.get("source") and r.get("status") == "success"
         }
+        already_read = set(read)
 
-    image_paths = image_util.get_images(args.image_dir, args.limit)
+        # Redo images that changed or that were OCRed with another model or prompt
+        if args.incremental:
+            current = {
+                lineage.OCR_PROMPT: lineage.digest_text(prompt.system_prompt),
+                lineage.OCR_MODEL: args.model,
+            }
+            already_read = {
+                str(path)
+                for path in image_paths
+                if str(path) in read
+                and lineage.is_current(
+                    read[str(path)],
+                    current | {lineage.IMAGE: lineage.digest_file(path)},
+                )
+            }
 
     total, done = len(image_paths), len(already_read)
     logging.info(f"There are {total} images to OCR")
     logging.info(f"{done} images were already done.")
     logging.info(f"There are {total - done} images left to OCR.")
 
-    prompt = prompt_util.Prompt.load(args.prompt)
-    prompt.log_size()
-
     tasks = [path for path in image_paths if str(path) not in already_read]
 
+    if args.plan:
+        plan_ocr(args, tasks, prompt)
+        log.job_elapsed(job_began)
+        return
+
     statuses = defaultdict(int)
 
-    with args.ocr_file.open(mode) as ocr_file:
-        writer = csv.DictWriter(ocr_file, COLUMN_NAMES)
-        if mode == "w":
-            writer.writeheader()
-
-        with (
-            tqdm(total=len(tasks)) as pbar,
-            ThreadPoolExecutor(max_workers=args.threads) as executor,
-            requests.Session() as session,
-        ):
-            if args.threads > DEFAULT_POOL:
-                adapter = HTTPAdapter(
-                    pool_connections=args.threads, pool_maxsize=args.threads
-                )
-                session.mount("http://", adapter)
-                session.mount("https://", adapter)
-
-            futures = {
-                executor.submit(
-                    call_ocr, args, image_path, prompt.system_prompt, session
-                ): image_path
-                for image_path in tasks
-            }
+    with (
+        table_io.RowWriter(args.ocr_file, COLUMN_NAMES, append=append) as writer,
+        tqdm(total=len(tasks)) as pbar,
+        ThreadPoolExecutor(max_workers=args.threads) as executor,
+        requests.Session() as session,
+    ):
+        if args.threads > DEFAULT_POOL:
+            adapter = HTTPAdapter(
+                pool_connections=args.threads, pool_maxsize=args.threads
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+
+        futures = {
+            executor.submit(
+                call_ocr, args, image_path, prompt.system_prompt, session
+            ): image_path
+            for image_path in tasks
+        }
+
+        for future in as_completed(futures):
+            result = future.result()
+            statuses[result["status"]] += 1
+            writer.write(result)
+            pbar.update(1)
 
-            for future in as_completed(futures):
-                result = future.result()
-                statuses[result["status"]] += 1
-                writer.writerow(result)
-                pbar.update(1)
-                ocr_file.flush()
+    if args.incremental:
+        lineage.dedupe(args.ocr_file)
 
     logging.info(
         f"Total {len(image_paths)} documents processed with {statuses['ERROR']} errors "
@@ -92,6 +119,36 @@ def ocr_images(args: argparse.Namespace) -> None:
     log.job_elapsed(job_began)
 
 
+def plan_ocr(
+    args: argparse.Namespace, tasks: list[Path], prompt: prompt_util.Prompt
+) -> None:
+    """OCR a sample of the images and extrapolate to the whole job."""
+    sample = plan_util.sample(tasks, args.plan, args.seed)
+
+    with requests.Session() as session:
+        if args.threads > DEFAULT_POOL:
+            adapter = HTTPAdapter(
+                pool_connections=args.threads, pool_maxsize=args.threads
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+
+        trials, wall = plan_util.run_trials(
+            sample,
+            lambda path: call_ocr(args, path, prompt.system_prompt, session),
+            args.threads,
+        )
+
+    estimates = plan_util.extrapolate(
+        trials,
+        total=len(tasks),
+        thread_levels=args.plan_threads or plan_util.PLAN_THREADS,
+        input_cost=args.input_cost,
+        output_cost=args.output_cost,
+    )
+    plan_util.log_plan(trials, wall, len(tasks), args.threads, estimates)
+
+
 def call_ocr(
     args: argparse.Namespace,
     image_path: Path,
@@ -101,7 +158,8 @@ def call_ocr(
     began = datetime.now()
 
     with image_path.open("rb") as f:
-        base64_image = base64.b64encode(f.read()).decode("utf-8")
+        image = f.read()
+    base64_image = base64.b64encode(image).decode("utf-8")
 
     url = f"{args.api_host}/chat/completions"
     headers = {"Content-Type": "application/json"}
@@ -125,6 +183,7 @@ def call_ocr(
         "max_tokens": args.max_tokens,
     }
 
+    usage = {}
     try:
         response = session.post(
             url, headers=headers, json=payload, timeout=args.timeout
@@ -134,6 +193,11 @@ def call_ocr(
 
         content = result["choices"][0]["message"]["content"] or ""
 
+        # The image tokens are not counted when the server doesn't report usage
+        usage = plan_util.token_usage(
+            result, prompt_chars=len(sys_prompt), reply_chars=len(content)
+        )
+
         if args.convert_html:
             content = fix_ocr.html_to_md(content)
 
@@ -150,6 +214,10 @@ def call_ocr(
         "source": str(image_path),
         "text": text,
         "elapsed": str(log.task_elapsed(began)),
+        "usage": usage,
+        lineage.IMAGE: lineage.digest_bytes(image),
+        lineage.OCR_PROMPT: lineage.digest_text(sys_prompt),
+        lineage.OCR_MODEL: args.model,
     }
 
     return result
@@ -173,7 +241,16 @@ def parse_args(args: list[str] | None = None) -> argparse.Namespace:
         type=Path,
         required=True,
         metavar="PATH",
-        help="""Put OCRed text into this CSV file. This appends data to the file.""",
+        help="""Put OCRed text into this CSV file. This appends data to the file.
+            If the file name ends with ".parquet" or ".arrows" then write a typed
+            table instead.""",
+    )
+    io_group.add_argument(
+        "--incremental",
+        action="store_true",
+        help="""Also redo images that were already OCRed when the image file, the
+            model, or the prompt changed since then. Only the latest row for each
+            image is kept.""",
     )
     prompt_group = arg_parser.add_argument_group("prompt options")
     prompt_group.add_argument(
@@ -251,6 +328,45 @@ def parse_args(args: list[str] | None = None) -> argparse.Namespace:
         metavar="STRING",
         help="""Notes for logging. They only appear in the log file.""",
     )
+    plan_group = arg_parser.add_argument_group("planning options")
+    plan_group.add_argument(
+        "--plan",
+        type=int,
+        metavar="INT",
+        help="""A dry run. OCR a random sample of this many images and estimate the
+            wall time, tokens, and cost of OCRing all of them. Nothing is written to
+            the OCR file.""",
+    )
+    plan_group.add_argument(
+        "--plan-threads",
+        type=int,
+        action="append",
+        metavar="INT",
+        help="""Estimate the wall time for this many threads. You may use this
+            option more than once. (default: 1, 2, 4, 8, 16, 32)""",
+    )
+    plan_group.add_argument(
+        "--input-cost",
+        type=float,
+        default=0.0,
+        metavar="FLOAT",
+        help="""The model's price in dollars per million prompt tokens.
+            (default: %(default)s)""",
+    )
+    plan_group.add_argument(
+        "--output-cost",
+        type=float,
+        default=0.0,
+        metavar="FLOAT",
+        help="""The model's price in dollars per million completion tokens.
+            (default: %(default)s)""",
+    )
+    plan_group.add_argument(
+        "--seed",
+        type=int,
+        metavar="INT",
+        help="""Random seed for picking the sample images.""",
+    )
     debugging_group = arg_parser.add_argument_group("debugging options")
     debugging_group.add_argument(
         "--limit",
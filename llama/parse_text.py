@@ -1,23 +1,23 @@
 #!/usr/bin/env python3
 
 import argparse
-import csv
+import contextlib
 import logging
 import os
 import re
 import textwrap
 from collections import defaultdict
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
 
-import pandas as pd
 import requests
 from dotenv import load_dotenv
 from requests.adapters import HTTPAdapter
 from tqdm import tqdm
 
-from llama.pylib import fix_ocr, log, prompt_util
+from llama.pylib import fix_ocr, lineage, log, plan_util, prompt_util, table_io
 
 MIN_SIZE = 1024
 
@@ -26,86 +26,326 @@ FIRST_COLUMNS = ["status", "source", "text", "elapsed"]
 DEFAULT_POOL = 10
 
 
+@dataclass
+class Target:
+    """
+    A model, server, and prompt to parse the OCR text with.
+
+    Each target writes its own parse file and has its own concurrency limit.
+    """
+
+    model: str
+    api_host: str
+    prompt_path: Path
+    parse_file: Path
+    threads: int
+    prompts: list[prompt_util.Prompt] = field(default_factory=list)
+    already_parsed: set[str] = field(default_factory=set)
+    parsed_lineage: dict[str, dict] = field(default_factory=dict)
+    lineage: dict[str, str] = field(default_factory=dict)
+    append: bool = False
+
+    @property
+    def name(self) -> str:
+        return self.parse_file.stem
+
+    def load(self, args: argparse.Namespace) -> None:
+        """Get the prompts and the documents that were already parsed."""
+        prompt = prompt_util.Prompt.load(self.prompt_path)
+        prompt.log_size()
+
+        self.lineage = {
+            lineage.PARSE_PROMPT: lineage.digest_prompt(prompt),
+            lineage.PARSE_MODEL: self.model,
+        }
+
+        # Send groups of fields as separate, concurrent requests
+        self.prompts = [prompt]
+        if args.split_fields or args.field_group:
+            self.prompts = prompt.split_fields(args.field_group)
+            logging.info(
+                f"Splitting the fields into {len(self.prompts)} requests per document"
+            )
+
+        if table_io.exists(self.parse_file, MIN_SIZE):
+            self.append = True
+            lineage.upgrade_header(self.parse_file, self.header)
+            records = table_io.read_table(self.parse_file).to_dict("records")
+            self.parsed_lineage = {
+                r["source"]: {c: r.get(c, "") for c in lineage.PARSE_COLUMNS}
+                for r in records
+                if r.get("source") and r.get("status") == "success"
+            }
+            self.already_parsed = set(self.parsed_lineage)
+
+    def drop_stale(self, docs: list[dict]) -> None:
+        """Parse documents again when their OCR text, model, or prompt changed."""
+        fresh = set()
+        for doc in docs:
+            old = self.parsed_lineage.get(doc["source"])
+            current = self.lineage | {lineage.TEXT: lineage.digest_text(doc["text"])}
+            if old and lineage.is_current(old, current):
+                fresh.add(doc["source"])
+        self.already_parsed = fresh
+
+    @property
+    def column_names(self) -> list[str]:
+        return [c for p in self.prompts for c in p.column_names]
+
+    @property
+    def header(self) -> list[str]:
+        return FIRST_COLUMNS + self.column_names + lineage.PARSE_COLUMNS
+
+    @property
+    def connections(self) -> int:
+        return self.threads * len(self.prompts)
+
+
+def get_targets(args: argparse.Namespace) -> list[Target]:
+    """Build targets from the --target options or from the single target options."""
+    if not args.target:
+        return [
+            Target(
+                model=args.model,
+                api_host=args.api_host,
+                prompt_path=args.prompt,
+                parse_file=args.parse_file,
+                threads=args.threads,
+            )
+        ]
+
+    targets = []
+    for spec in args.target:
+        opts = dict(kv.strip().split("=", 1) for kv in spec.split(",") if kv.strip())
+        if "parse-file" not in opts:
+            raise ValueError(f"The target is missing a parse-file: {spec}")
+        targets.append(
+            Target(
+                model=opts.pop("model", args.model),
+                api_host=opts.pop("api-host", args.api_host),
+                prompt_path=Path(opts.pop("prompt", args.prompt)),
+                parse_file=Path(opts.pop("parse-file")),
+                threads=int(opts.pop("threads", args.threads)),
+            )
+        )
+        if opts:
+            raise ValueError(f"Unknown target options: {', '.join(opts)}")
+
+    parse_files = [t.parse_file.resolve() for t in targets]
+    if len(set(parse_files)) < len(parse_files):
+        msg = "Two targets write to the same parse file"
+        raise ValueError(msg)
+
+    return targets
+
+
 def parse_text(args: argparse.Namespace) -> None:
     job_began = log.job_began(args.log_file, args=args)
 
-    mode = "w"
-    already_parsed = set()
-    if args.parse_file.exists() and args.parse_file.stat().st_size >= MIN_SIZE:
-        mode = "a"
-        records = pd.read_csv(args.parse_file, dtype=str).fillna("").to_dict("records")
-        already_parsed = {
-            r["source"]
-            for r in records
-            if r.get("source") and r.get("status") == "success"
-        }
-
-    docs = pd.read_csv(args.ocr_file, dtype=str).fillna("").to_dict("records")
-    docs_success = [d for d in docs if d["status"] == "success"]
-    docs = [d for d in docs_success if d["source"] not in already_parsed]
-
-    docs_todo, done = len(docs_success), len(already_parsed)
-    logging.info(f"There are {docs_todo} documents to parse.")
-    logging.info(f"{done} documents were already parsed.")
-    logging.info(f"There are {docs_todo - done} docs left to parse.")
-
-    prompt = prompt_util.Prompt.load(args.prompt)
-    prompt.log_size()
-
-    statuses = defaultdict(int)
-
-    with args.parse_file.open(mode) as parse_file:
-        writer = csv.DictWriter(parse_file, FIRST_COLUMNS + prompt.column_names)
-        if mode == "w":
-            writer.writeheader()
-
-        with (
-            tqdm(total=len(docs)) as pbar,
-            ThreadPoolExecutor(max_workers=args.threads) as executor,
-            requests.Session() as session,
-        ):
-            if args.threads > DEFAULT_POOL:
-                adapter = HTTPAdapter(
-                    pool_connections=args.threads, pool_maxsize=args.threads
+    targets = get_targets(args)
+    for target in targets:
+        target.load(args)
+
+    docs = table_io.read_table(args.ocr_file, ["status", "source", "text"])
+    docs = [d for d in docs.to_dict("records") if d["status"] == "success"]
+
+    if args.incremental:
+        for target in targets:
+            target.drop_stale(docs)
+
+    logging.info(f"There are {len(docs)} documents to parse.")
+    for target in targets:
+        name, done = target.name, len(target.already_parsed)
+        logging.info(f"{name}: {done} documents were already parsed.")
+        logging.info(f"{name}: There are {len(docs) - done} docs left to parse.")
+
+    # Only prepare the text for documents that some target still needs
+    docs = [
+        d for d in docs if any(d["source"] not in t.already_parsed for t in targets)
+    ]
+
+    if args.plan:
+        for target in targets:
+            plan_parse(args, target, docs)
+        log.job_elapsed(job_began)
+        return
+
+    # Targets are kept by their index, different parse files may have the same stem
+    statuses = [defaultdict(int) for _ in targets]
+
+    with contextlib.ExitStack() as stack:
+        session = stack.enter_context(requests.Session())
+        mount_adapter(session, sum(t.connections for t in targets))
+
+        writers, executors, requesters = [], [], []
+        for target in targets:
+            writers.append(
+                stack.enter_context(
+                    table_io.RowWriter(
+                        target.parse_file, target.header, append=target.append
+                    )
                 )
-                session.mount("http://", adapter)
-                session.mount("https://", adapter)
-
-            futures = {
-                executor.submit(parser, args, doc, prompt, session): doc for doc in docs
-            }
-            for future in as_completed(futures):
-                result = future.result()
-                statuses[result["status"]] += 1
-                writer.writerow(result)
-                pbar.update(1)
-                parse_file.flush()
-
-    logging.info(
-        f"Total {len(docs)} documents processed with {statuses['ERROR']} errors "
-        f"and {len(already_parsed)} documents were skipped."
-    )
+            )
+            executors.append(
+                stack.enter_context(ThreadPoolExecutor(max_workers=target.threads))
+            )
+            requesters.append(
+                stack.enter_context(ThreadPoolExecutor(max_workers=target.connections))
+            )
+
+        # Prepare each document once and send it to every target that needs it
+        futures = {}
+        for doc in docs:
+            text = fix_ocr.prepare_for_parse(doc["text"])
+            text_lineage = {lineage.TEXT: lineage.digest_text(doc["text"])}
+            for i, target in enumerate(targets):
+                if doc["source"] in target.already_parsed:
+                    continue
+                future = executors[i].submit(
+                    parser,
+                    args,
+                    target,
+                    doc["source"],
+                    text,
+                    session,
+                    requester=requesters[i],
+                )
+                futures[future] = (i, text_lineage)
+
+        pbar = stack.enter_context(tqdm(total=len(futures)))
+        for future in as_completed(futures):
+            i, text_lineage = futures[future]
+            result = future.result()
+            statuses[i][result["status"]] += 1
+            writers[i].write(result | targets[i].lineage | text_lineage)
+            pbar.update(1)
+
+    if args.incremental:
+        for target in targets:
+            lineage.dedupe(target.parse_file)
+
+    for target, status in zip(targets, statuses, strict=True):
+        count = sum(status.values())
+        logging.info(
+            f"{target.name}: Total {count} documents processed with "
+            f"{status['ERROR']} errors "
+            f"and {len(target.already_parsed)} documents were skipped."
+        )
 
     log.job_elapsed(job_began)
 
 
+def mount_adapter(session: requests.Session, connections: int) -> None:
+    """Make the connection pool big enough for all of the concurrent requests."""
+    if connections > DEFAULT_POOL:
+        adapter = HTTPAdapter(pool_connections=connections, pool_maxsize=connections)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+
+
+def plan_parse(args: argparse.Namespace, target: Target, docs: list[dict]) -> None:
+    """Parse a sample of the documents and extrapolate to the whole job."""
+    docs = [d for d in docs if d["source"] not in target.already_parsed]
+    sample = plan_util.sample(docs, args.plan, args.seed)
+
+    with (
+        ThreadPoolExecutor(max_workers=target.connections) as requester,
+        requests.Session() as session,
+    ):
+        mount_adapter(session, target.connections)
+
+        trials, wall = plan_util.run_trials(
+            sample,
+            lambda doc: parser(
+                args,
+                target,
+                doc["source"],
+                fix_ocr.prepare_for_parse(doc["text"]),
+                session,
+                requester=requester,
+            ),
+            target.threads,
+        )
+
+    estimates = plan_util.extrapolate(
+        trials,
+        total=len(docs),
+        thread_levels=args.plan_threads or plan_util.PLAN_THREADS,
+        input_cost=args.input_cost,
+        output_cost=args.output_cost,
+    )
+    logging.info(f"Plan for {target.name} using {target.model}")
+    plan_util.log_plan(trials, wall, len(docs), target.threads, estimates)
+
+
 def parser(
     args: argparse.Namespace,
-    doc: dict,
-    prompt: prompt_util.Prompt,
+    target: Target,
+    source: str,
+    text: str,
     session: requests.Session,
+    *,
+    requester: ThreadPoolExecutor | None = None,
 ) -> dict:
+    """
+    Parse one document that was already prepared for parsing.
+
+    When the fields are split into groups, the group requests for the document are
+    sent at the same time and their replies are merged into a single row.
+    """
     began = datetime.now()
 
-    text = fix_ocr.prepare_for_parse(doc["text"])
+    prompts = target.prompts
+    extracted = {}
+    usage = defaultdict(int)
+    try:
+        if requester and len(prompts) > 1:
+            futures = [
+                requester.submit(request_fields, args, target, p, text, session)
+                for p in prompts
+            ]
+            replies = [future.result() for future in futures]
+        else:
+            replies = [request_fields(args, target, p, text, session) for p in prompts]
+
+        for fields, tokens in replies:
+            extracted |= fields
+            for key, count in tokens.items():
+                usage[key] += count
+
+        status = "success"
 
-    url = f"{args.api_host}/chat/completions"
+    except requests.exceptions.RequestException as err:
+        logging.exception(f"Parse error for: {Path(source).name} with {target.name}")
+        text = str(err)
+        status = "ERROR"
+
+    result = {
+        "status": status,
+        "source": source,
+        "text": text,
+        "elapsed": str(log.task_elapsed(began)),
+        "usage": dict(usage),
+    } | extracted
+
+    return result
+
+
+def request_fields(
+    args: argparse.Namespace,
+    target: Target,
+    prompt: prompt_util.Prompt,
+    text: str,
+    session: requests.Session,
+) -> tuple[dict, dict]:
+    """Ask the LM for the prompt's fields and return them with the token usage."""
+    url = f"{target.api_host}/chat/completions"
     headers = {
         "Content-Type": "application/json",
         "Authorization": f"Bearer {os.getenv('LLM_API_KEY')}",
     }
     payload = {
-        "model": args.model,
+        "model": target.model,
         "messages": [
             {"role": "system", "content": prompt.system_prompt},
             {"role": "user", "content": prompt.build_text_prompt(text)},
@@ -116,32 +356,19 @@ def parser(
     if args.max_tokens is not None:
         payload["max_tokens"] = args.max_tokens
 
-    extracted = {}
-    try:
-        response = session.post(
-            url, headers=headers, json=payload, timeout=args.timeout
-        )
-        response.raise_for_status()
-        result = response.json()
-
-        content = result["choices"][0]["message"]["content"] or ""
-        extracted = llm_reply_to_dict(content, prompt.column_names)
-
-        status = "success"
+    response = session.post(url, headers=headers, json=payload, timeout=args.timeout)
+    response.raise_for_status()
+    result = response.json()
 
-    except requests.exceptions.RequestException as err:
-        logging.exception(f"Parse error for: {Path(doc['source']).name}")
-        text = str(err)
-        status = "ERROR"
-
-    result = {
-        "status": status,
-        "source": doc["source"],
-        "text": text,
-        "elapsed": str(log.task_elapsed(began)),
-    } | extracted
+    content = result["choices"][0]["message"]["content"] or ""
+    extracted = llm_reply_to_dict(content, prompt.column_names)
+    usage = plan_util.token_usage(
+        result,
+        prompt_chars=len(prompt.system_prompt) + len(text),
+        reply_chars=len(content),
+    )
 
-    return result
+    return extracted, usage
 
 
 def llm_reply_to_dict(content: str, columns: list[str]) -> dict:
@@ -176,13 +403,35 @@ def parse_args(args: list[str] | None = None) -> argparse.Namespace:
         type=Path,
         metavar="path",
         help="""Parse label text from this file. We need only 'source' and 'text'
-            columns for valid input, so any CSV file with those columns is fine.""",
+            columns for valid input, so any CSV file with those columns is fine.
+            It may also be a ".parquet" or ".arrows" file.""",
     )
     io_group.add_argument(
         "--parse-file",
         type=Path,
         metavar="path",
-        help="""Write the LM results to this CSV file.""",
+        help="""Write the LM results to this CSV file. If the file name ends with
+            ".parquet" or ".arrows" then write a typed table instead.""",
+    )
+    io_group.add_argument(
+        "--incremental",
+        action="store_true",
+        help="""Also parse documents that were already parsed when their OCR text,
+            the model, or the prompt changed since then. Only the latest row for each
+            document is kept.""",
+    )
+    io_group.add_argument(
+        "--target",
+        action="append",
+        metavar="options",
+        help="""Parse the OCR file with several models or prompts in a single pass.
+            A target is a comma separated list of key=value options, like
+            "model=gpt-5-nano,api-host=https://api.openai.com/v1,threads=20,
+            prompt=prompts/herbarium_v1.md,parse-file=data/gpt_nano.csv".
+            The parse-file is required and the other options default to the
+            --model, --api-host, --prompt, and --threads options. Each target writes
+            its own parse file and the targets run at the same time, each with its own
+            thread limit. You may use this option more than once.""",
     )
     prompt_group = arg_parser.add_argument_group("prompt options")
     prompt_group.add_argument(
@@ -219,6 +468,24 @@ def parse_args(args: list[str] | None = None) -> argparse.Namespace:
             ChatGPT-nano I will increase this to 20 or more, and for a local model
             I will reduce this to 4 or less.""",
     )
+    model_group.add_argument(
+        "--split-fields",
+        action="store_true",
+        help="""Split the prompt's fields into groups by their category (location,
+            taxon, event, plants, etc.) and send the group requests for each document
+            at the same time. The replies are merged into a single row. This lowers
+            the time for each document but each document takes several requests, so
+            there are up to --threads times the number of groups requests at once.""",
+    )
+    model_group.add_argument(
+        "--field-group",
+        action="append",
+        metavar="fields",
+        help="""Send these fields as a single request. It is a comma separated list
+            of field names or categories, like "location,recordNumber". Fields that
+            are not in any group are grouped by category. You may use this option more
+            than once. It implies --split-fields.""",
+    )
     model_group.add_argument(
         "--temperature",
         type=float,
@@ -255,6 +522,45 @@ def parse_args(args: list[str] | None = None) -> argparse.Namespace:
         metavar="string",
         help="""Notes for logging. They only appear in the log file.""",
     )
+    plan_group = arg_parser.add_argument_group("planning options")
+    plan_group.add_argument(
+        "--plan",
+        type=int,
+        metavar="int",
+        help="""A dry run. Parse a random sample of this many documents and estimate
+            the wall time, tokens, and cost of parsing all of them. Nothing is written
+            to the parse file.""",
+    )
+    plan_group.add_argument(
+        "--plan-threads",
+        type=int,
+        action="append",
+        metavar="int",
+        help="""Estimate the wall time for this many threads. You may use this
+            option more than once. (default: 1, 2, 4, 8, 16, 32)""",
+    )
+    plan_group.add_argument(
+        "--input-cost",
+        type=float,
+        default=0.0,
+        metavar="float",
+        help="""The model's price in dollars per million prompt tokens.
+            (default: %(default)s)""",
+    )
+    plan_group.add_argument(
+        "--output-cost",
+        type=float,
+        default=0.0,
+        metavar="float",
+        help="""The model's price in dollars per million completion tokens.
+            (default: %(default)s)""",
+    )
+    plan_group.add_argument(
+        "--seed",
+        type=int,
+        metavar="int",
+        help="""Random seed for picking the sample documents.""",
+    )
     debugging_group = arg_parser.add_argument_group("debugging options")
     debugging_group.add_argument(
         "--limit",
@@ -263,6 +569,10 @@ def parse_args(args: list[str] | None = None) -> argparse.Namespace:
         help="""Limit to this many records.""",
     )
     ns = arg_parser.parse_args(args)
+
+    if not ns.target and not ns.parse_file:
+        arg_parser.error("You need either a --parse-file or a --target.")
+
     return ns
 
 
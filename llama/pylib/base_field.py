@@ -1,13 +1,22 @@
 from dataclasses import dataclass, fields
-from typing import Any, ClassVar
+from typing import TYPE_CHECKING, Any, ClassVar
 
 import Levenshtein
+import numpy as np
+from rapidfuzz import fuzz, process
+from rapidfuzz.distance import Indel
+
+from llama.pylib import fix_parses
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 @dataclass
 class BaseField:
     # --------------
     scoring_method: ClassVar[str] = "LR"
+    column_cleaner: ClassVar[str] = ""
     # --------------
 
     @classmethod
@@ -20,11 +29,78 @@ class BaseField:
         """Get all visible field names within a class."""
         return [f.name for f in fields(cls) if not f.name.startswith("_")]
 
-    @staticmethod
-    def score(expect: Any, actual: Any, record: dict[str, Any]) -> float:
+    @classmethod
+    def clean_column(cls, column: pd.Series, rows: pd.DataFrame) -> pd.Series | None:
+        """
+        Clean a whole column at once.
+
+        Building a dataclass for every cell is slow, so fields that only need one of
+        the column converters in fix_parses name it in column_cleaner, "str" or
+        "hallucinated_str", and fields with more to do override this. The rows are
+        the whole input table, for fields that need other columns like the OCR
+        "text". Return None if there is no column version and the caller will use the
+        dataclass instead.
+        """
+        match cls.column_cleaner:
+            case "str":
+                return fix_parses.column_to_str(column)
+            case "hallucinated_str":
+                return fix_parses.column_hallucinated_str(column, rows["text"])
+        return None
+
+    @classmethod
+    def score(cls, expect: Any, actual: Any, record: dict[str, Any]) -> float:
+        """
+        Score with the field's scoring method, "LR" or "FPR".
+
+        Fields with any other method override this.
+        """
         del record
 
+        if cls.scoring_method == "FPR":
+            return fuzz.partial_ratio(str(expect), actual) / 100.0
+
         actual = str(actual).strip()
         expect = str(expect).strip()
 
         return Levenshtein.ratio(expect, actual)
+
+    @classmethod
+    def score_batch(
+        cls, expects: list[str], actuals: list[str], records: list[dict[str, Any]]
+    ) -> np.ndarray:
+        """
+        Score whole columns of expected and actual values at once.
+
+        The scoring methods "LR", an edit distance ratio, and "FPR", a fuzzy partial
+        ratio, are done in one rapidfuzz call and give the same scores as score().
+        Any other method, or a field with its own score(), calls score() for each
+        cell. Fields with a custom score can override this if it's too slow.
+        """
+        method = cls.scoring_method
+        if getattr(cls.score, "__func__", None) is not BaseField.score.__func__:
+            method = "CUST"
+
+        match method:
+            case "LR":
+                # Levenshtein.ratio is the normalized Indel similarity
+                return process.cpdist(
+                    [str(e).strip() for e in expects],
+                    [str(a).strip() for a in actuals],
+                    scorer=Indel.normalized_similarity,
+                    dtype=np.float64,
+                )
+            case "FPR":
+                scores = process.cpdist(
+                    [str(e) for e in expects],
+                    actuals,
+                    scorer=fuzz.partial_ratio,
+                    dtype=np.float64,
+                )
+                return scores / 100.0
+            case _:
+                scores = [
+                    cls.score(e, a, r)
+                    for e, a, r in zip(expects, actuals, records, strict=True)
+                ]
+                return np.array(scores, dtype=np.float64)
@@ -0,0 +1,117 @@
+"""
+Pick a consensus value from several models' values for the same cell.
+
+Voting on exact strings splits the vote between "Mt. Hood" and "Mt Hood". So I clean
+the values with the same string fixes that the cleaners use, fold the case and
+punctuation, and then score every pair of models' values with an edit distance ratio.
+Values that score at or above a threshold are votes for the same thing, and the votes
+that are linked together by those scores are a cluster.
+
+I don't use the fields' own scorers for this. They compare an expected value to an
+actual one, so they needn't be symmetric or look at the whole value. The fuzzy partial
+ratio gives "a" a perfect score against "quercus alba", so unrelated values would be
+linked into one cluster. The winner is the medoid of
+the largest cluster, the value most like the rest of its cluster, as the model wrote
+it.
+
+The scores are done a whole column and pair of models at a time, so there is one
+rapidfuzz call per pair of models instead of a Python loop per cell. The clusters for
+all of the cells are found at once with boolean matrix products.
+"""
+
+import math
+import re
+
+import numpy as np
+from rapidfuzz import process
+from rapidfuzz.distance import Indel
+
+from llama.pylib import fix_parses
+
+NO_WINNER = -1
+
+PUNCT = re.compile(r"[^\w\s]+")
+SPACES = re.compile(r"\s+")
+
+
+def normalize(value: str) -> str:
+    """Get the part of a value that models should agree on."""
+    value = fix_parses.clean_str(str(value)).casefold()
+    value = PUNCT.sub(" ", value)
+    return SPACES.sub(" ", value).strip()
+
+
+def similarities(values: list[list[str]]) -> np.ndarray:
+    """
+    Score every pair of models' values for every cell in a column.
+
+    The values are a list with one list per model, and the scores are a cells x models
+    x models array. A value always matches itself.
+    """
+    # Most values are repeated, so only normalize each one once
+    normals = {v: normalize(v) for vals in values for v in set(vals)}
+    normal = [[normals[v] for v in vals] for vals in values]
+
+    models = len(values)
+    cells = len(values[0]) if values else 0
+    scores = np.zeros((cells, models, models))
+    scores[:, range(models), range(models)] = 1.0
+    for a in range(models):
+        for b in range(a + 1, models):
+            score = process.cpdist(
+                normal[a],
+                normal[b],
+                scorer=Indel.normalized_similarity,
+                dtype=np.float64,
+            )
+            scores[:, a, b] = score
+            scores[:, b, a] = score
+    return scores
+
+
+def clusters(scores: np.ndarray, threshold: float) -> np.ndarray:
+    """
+    Find which models are in the same cluster for every cell.
+
+    Models are linked when their score is at or above the threshold, and a cluster is
+    everything that the links connect. Every boolean product doubles the length of
+    the paths that are followed, so a few of them are enough.
+    """
+    linked = (scores >= threshold).astype(np.int64)
+    for _ in range(max(1, math.ceil(math.log2(max(2, scores.shape[-1]))))):
+        linked = (linked @ linked > 0).astype(np.int64)
+    return linked.astype(bool)
+
+
+def vote(
+    values: list[list[str]], *, threshold: float, majority: bool = False
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Vote on a whole column of cells.
+
+    Return the model that has the winning value for each cell, or NO_WINNER, and
+    which models are in the winning cluster. There is no winner when two different
+    clusters are the largest, or when majority is set and the largest cluster isn't
+    more than half of the models.
+    """
+    scores = similarities(values)
+    linked = clusters(scores, threshold)
+    cells, models = scores.shape[:2]
+    rows = np.arange(cells)
+
+    sizes = linked.sum(axis=2)
+    largest = sizes.max(axis=1, initial=0)
+    first = sizes.argmax(axis=1)
+    members = linked[rows, first]
+
+    # A model that isn't in the first cluster is as big, so it's a tie
+    tied = ((sizes == largest[:, None]) & ~members).any(axis=1)
+
+    # The medoid is the member with the highest total score to the other members
+    totals = (scores * members[:, None, :]).sum(axis=2)
+    medoid = np.where(members, totals, -np.inf).argmax(axis=1)
+
+    lost = tied | (majority & (largest * 2 <= models))
+    winners = np.where(lost, NO_WINNER, medoid)
+    members &= ~lost[:, None]
+    return winners, members
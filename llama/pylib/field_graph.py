@@ -0,0 +1,69 @@
+"""
+Order calculated fields so that each one runs after the fields it reads.
+
+Calculated fields read other columns from the record, and some of those columns are
+themselves calculated. The calculated locality, for instance, strips the country out
+of the locality, so it has to run after the calculated country fills in the country.
+Every calculated field declares the columns it reads in its "inputs" class variable,
+and I sort the fields topologically on those.
+
+When only a few columns are wanted, only those columns and the columns they are
+calculated from, recursively, need to be cleaned and calculated.
+"""
+
+from graphlib import TopologicalSorter
+from typing import Any
+
+
+def producers(calculated: dict[str, Any]) -> dict[str, str]:
+    """Map each calculated column to the calculated field that writes it."""
+    return {
+        column: name
+        for name, cls in calculated.items()
+        for column in cls.get_visible_fields()
+    }
+
+
+def dependencies(calculated: dict[str, Any]) -> dict[str, set[str]]:
+    """Get the other calculated fields that each calculated field reads."""
+    writers = producers(calculated)
+    return {
+        name: {writers[c] for c in cls.inputs if c in writers and writers[c] != name}
+        for name, cls in calculated.items()
+    }
+
+
+def ancestors(calculated: dict[str, Any], wanted: list[str]) -> tuple[set, set]:
+    """
+    Get everything needed to produce the wanted columns.
+
+    Return the calculated fields to run and every column they read or write.
+    """
+    writers = producers(calculated)
+    names, columns = set(), set()
+    todo = list(wanted)
+    while todo:
+        column = todo.pop()
+        if column in columns:
+            continue
+        columns.add(column)
+        if (name := writers.get(column)) and name not in names:
+            names.add(name)
+            cls = calculated[name]
+            todo += [*cls.get_visible_fields(), *cls.inputs]
+    return names, columns
+
+
+def evaluation_order(
+    calculated: dict[str, Any], wanted: list[str] | None = None
+) -> list[str]:
+    """
+    Get the calculated field names in the order to run them.
+
+    If there are wanted columns then only get the fields needed to produce them.
+    """
+    deps = dependencies(calculated)
+    if wanted:
+        keep, _ = ancestors(calculated, wanted)
+        deps = {n: d & keep for n, d in deps.items() if n in keep}
+    return list(TopologicalSorter(deps).static_order())
@@ -4,22 +4,16 @@ import contextlib
 import json
 import math
 import re
-from calendar import IllegalMonthError
-from datetime import date as dt
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-from dateutil import parser
-from dateutil.relativedelta import relativedelta
+from llama.pylib import label_dates, text_index
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 INT = re.compile(r"[\d,]+")
 FLOAT = re.compile(r" \d+ [\d,.]* | \.\d+", flags=re.VERBOSE)
 
-# For parsing dates
-SEP = r"[\s(.,/_'-]+"  # Date month, day, year separators
-YEAR = r"([12]\d\d\d|\d\d)"
-YEAR4 = r"([12]\d\d\d)"
-MON_NUM = r"[01]?\d"  # Month as a number
-
 EMPTY: set = {
     "''",
     "[",
@@ -53,6 +47,8 @@ EMPTY: set = {
 OPEN: tuple = ("(", "[", "{")
 CLOSE: tuple = (")", "]", "}")
 
+TRUE: tuple = ("true", "yes", "1", "on")
+
 
 def to_str(value: Any) -> str:
     match value:
@@ -106,7 +102,7 @@ def to_bool(value: Any) -> bool:
     match value:
         case str():
             value = clean_str(value)
-            return value.lower() in ("true", "yes", "1", "on")
+            return value.lower() in TRUE
         case float() if math.isnan(value) or math.isinf(value):
             return False
         case _:
@@ -232,52 +228,7 @@ def list_to_item(value: Any) -> Any:
 
 
 def date_to_iso(value: str) -> str:
-    value = value.lower().strip()
-
-    short_date = re.match(
-        rf""" ^ (?:
-              [a-z]+    {SEP} {YEAR}
-            | {YEAR}    {SEP} [a-z]+
-            | {MON_NUM} {SEP} {YEAR4}
-            ) [.,;:_-]* $ """,
-        value,
-        flags=re.IGNORECASE | re.VERBOSE,
-    )
-
-    bad_short_date = re.match(
-        rf""" ^ \d+ {SEP} \d+ $ """, value, flags=re.IGNORECASE | re.VERBOSE
-    )
-    if not short_date and bad_short_date:
-        return ""
-
-    value = value.replace("april", "iv")  # The only month w/ roman numerals in it
-
-    value = value.replace("viii", "Aug")
-    value = value.replace("iii", "Mar")
-    value = value.replace("vii", "July")
-    value = value.replace("xii", "Dec")
-    value = value.replace("ii", "Feb")
-    value = value.replace("iv", "Apr")
-    value = value.replace("vi", "June")
-    value = value.replace("ix", "Sept")
-    value = value.replace("xi", "Nov")
-    value = value.replace("i", "Jan")
-    value = value.replace("v", "May")
-    value = value.replace("x", "Oct")
-
-    try:
-        date_ = parser.parse(value).date()
-
-        if date_ > dt.today():
-            date_ -= relativedelta(years=100)
-
-        end = 7 if short_date else 10
-        value = date_.isoformat()[:end]
-
-    except parser.ParserError, IllegalMonthError:
-        value = ""
-
-    return value
+    return label_dates.to_iso(value)
 
 
 def remove_leading_punct(value: str) -> str:
@@ -314,9 +265,7 @@ def hallucinated_str(value: str, text: str) -> str:
     value = to_str(value)
     if not text:
         return value
-    pattern = re.escape(str(value))
-    value = value if re.search(pattern, text, flags=re.IGNORECASE) else ""
-    return value
+    return value if text_index.index(text).contains(value) else ""
 
 
 LOWER = {"A", "An", "Of", "The", "De", "And"}
@@ -326,3 +275,75 @@ def title_with_exceptions(value: str) -> str:
     words = value.title().split()
     words = [w.lower() if (i and w in LOWER) else w for i, w in enumerate(words)]
     return " ".join(words)
+
+
+# ----------------------------------------------------------------------------------
+# Column versions of the converters. They take a pandas Series of strings, like a
+# column read from a CSV file with dtype=str, and give the same results as mapping the
+# scalar converter over the column. Empty cells are skipped.
+
+
+def column_clean_str(column: pd.Series) -> pd.Series:
+    column = column.copy()
+    full = column != ""
+    value = column[full].str.strip()
+
+    # Notations for an empty field
+    value = value.mask(value.str.lower().isin(EMPTY), "")
+
+    # Remove surrounding brackets
+    value = value.str.replace(r"^[(\[{](.*)[)\]}]$", r"\1", regex=True, flags=re.DOTALL)
+
+    # Remove leading and trailing quotes
+    value = value.str.replace(r'^"(.+)"$', r"\1", regex=True)
+    value = value.str.replace(r"^'(.+)'$", r"\1", regex=True)
+
+    # Remove bold and italic ( "**text**" and "_text_") markdown notations
+    value = value.str.replace(r"([*_]+)([\w\s]*)\1", r"\2", regex=True)
+
+    column[full] = value
+    return column
+
+
+def column_to_str(column: pd.Series) -> pd.Series:
+    return column_clean_str(column)
+
+
+def column_to_float(column: pd.Series) -> pd.Series:
+    """Convert a column to floats, a missing value is NaN."""
+    value = column_clean_str(column).str.replace(",", "", regex=False)
+    value = value.str.extract(f"({FLOAT.pattern})", flags=re.VERBOSE, expand=False)
+    # A number with several decimal points is not a number
+    value = value.where(value.str.count(r"\.") <= 1)
+    return value.astype(float)
+
+
+def column_to_int(column: pd.Series) -> pd.Series:
+    """Convert a column to Python ints, a missing value is None."""
+    value = column_clean_str(column).str.replace(",", "", regex=False)
+    value = value.str.extract(r"(\d+)", expand=False)
+    found = value.notna()
+    value = value.astype(object).where(found, None)
+    value[found] = [int(v) for v in value[found]]
+    return value
+
+
+def column_to_bool(column: pd.Series) -> pd.Series:
+    value = column_clean_str(column)
+    return value.str.lower().isin(TRUE)
+
+
+def column_remove_trailing_punct(column: pd.Series) -> pd.Series:
+    return column.str.replace(r"[\s\"'.,;:(){}\[\]\-]+$", "", regex=True)
+
+
+def column_hallucinated_str(column: pd.Series, texts: pd.Series) -> pd.Series:
+    """Blank values that are not in their row's text, like hallucinated_str."""
+    column = column_to_str(column)
+    full = column != ""
+    keep = [
+        not text or text_index.index(text).contains(value)
+        for value, text in zip(column[full], texts[full], strict=True)
+    ]
+    column[full] = column[full].where(keep, "")
+    return column
@@ -0,0 +1,442 @@
+"""
+Write a comparison report that opens in a browser no matter how many images it has.
+
+One HTML page with every row group in it takes minutes to open once there are more than
+a few thousand images, and then the browser crawls. So I write a small index page and
+put the row groups into numbered shard files next to it, "report.html" has its shards
+in "report_files/". The page loads a shard when it needs it.
+
+The shards are JavaScript files that hand their row groups to the page, not JSON files.
+Browsers won't fetch JSON from a file:// page, but they will load a script, so the
+report works straight off the disk without a server.
+
+The page can filter the row groups by column, score range, and score category. A
+manifest has each shard's score ranges and categories per column so the page only loads
+shards that may have a match.
+
+A row group is a dict with:
+- text, image_path, row_group, and href: The cells on the left of every row, href is an
+  optional link for the image path.
+- rows: The group's rows, dicts with a row_type and a cell for every column. A cell is
+  a string, or a list of (label, text) pairs shown as labeled lines.
+- scores: (file, column, category, score) tuples, these are what the filters look at.
+"""
+
+import html
+import json
+import math
+import re
+from itertools import islice
+from typing import TYPE_CHECKING, Any
+
+from llama.pylib import report_writer
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from pathlib import Path
+
+# Row groups in a shard and on a page
+SHARD_SIZE = 200
+
+# How many loaded shards the page keeps
+SHARD_CACHE = 16
+
+MANIFEST = "manifest.js"
+SHARD_FILE = re.compile(r"shard_\d{5}\.js")
+
+
+def write_html(
+    path: Path,
+    *,
+    title: str,
+    columns: list[str],
+    groups: Iterable[dict[str, Any]],
+    tables: dict[str, report_writer.Sheet] | None = None,
+) -> None:
+    """Write the index page, the manifest, and the shards of row groups."""
+    shard_dir = path.with_name(f"{path.stem}_files")
+    clear_shard_dir(shard_dir)
+
+    shards = []
+    groups = iter(groups)
+    while batch := list(islice(groups, SHARD_SIZE)):
+        number = len(shards) + 1
+        shard = [shard_group(g, columns) for g in batch]
+        write_script(shard_dir / shard_name(number), "reportShard", number, shard)
+        shards.append(shard_summary(batch))
+
+    manifest = {
+        "title": title,
+        "dir": shard_dir.name,
+        "columns": columns,
+        "categories": sorted(
+            {c for s in shards for cats in s["cats"].values() for c in cats}
+        ),
+        "shard_size": SHARD_SIZE,
+        "shard_cache": SHARD_CACHE,
+        "shards": shards,
+    }
+    write_script(shard_dir / MANIFEST, "reportManifest", manifest)
+
+    page = PAGE.format(
+        title=html.escape(title),
+        manifest=html.escape(f"{shard_dir.name}/{MANIFEST}"),
+        tables="".join(table_html(n, s) for n, s in (tables or {}).items()),
+    )
+    path.write_text(page, encoding="utf-8")
+
+
+def clear_shard_dir(shard_dir: Path) -> None:
+    """
+    Remove the files from an earlier report, or make the folder.
+
+    A browser saves a whole web page in a folder with the same name, so I won't touch a
+    folder that has anything else in it.
+    """
+    if not shard_dir.exists():
+        shard_dir.mkdir(parents=True)
+        return
+
+    files = list(shard_dir.iterdir())
+    if others := [
+        f.name
+        for f in files
+        if not f.is_file() or (f.name != MANIFEST and not SHARD_FILE.fullmatch(f.name))
+    ]:
+        msg = f"{shard_dir} has files that aren't from a report: {', '.join(others)}"
+        raise FileExistsError(msg)
+
+    for file in files:
+        file.unlink()
+
+
+def shard_name(number: int) -> str:
+    return f"shard_{number:05d}.js"
+
+
+def write_script(path: Path, func: str, *args: Any) -> None:
+    """Write a script that calls the page's function with the data."""
+    data = ",".join(
+        json.dumps(a, ensure_ascii=False, separators=(",", ":")) for a in args
+    )
+    path.write_text(f"{func}({data});\n", encoding="utf-8")
+
+
+def shard_group(group: dict[str, Any], columns: list[str]) -> dict[str, Any]:
+    """Rows are lists in column order, it makes the shards a lot smaller."""
+    return {
+        "text": group["text"],
+        "image_path": group["image_path"],
+        "href": group.get("href", ""),
+        "row_group": group["row_group"],
+        "rows": [
+            [row["row_type"], *(json_cell(row.get(c)) for c in columns)]
+            for row in group["rows"]
+        ],
+        "scores": [
+            [str(f), str(c), str(cat), json_score(s)]
+            for f, c, cat, s in group["scores"]
+        ],
+    }
+
+
+def json_cell(value: Any) -> Any:
+    if isinstance(value, list):
+        return [[str(label), str(text)] for label, text in value]
+    if report_writer.is_empty(value):
+        return None
+    return str(value)
+
+
+def json_score(score: Any) -> float | None:
+    """JSON has no NaN."""
+    if score is None or math.isnan(score):
+        return None
+    return float(score)
+
+
+def shard_summary(batch: list[dict[str, Any]]) -> dict[str, Any]:
+    """Get the score range and categories for every column in a shard."""
+    ranges: dict[str, list[float]] = {}
+    cats: dict[str, set[str]] = {}
+    for group in batch:
+        for _, column, cat, score in group["scores"]:
+            column, cat = str(column), str(cat)
+            cats.setdefault(column, set()).add(cat)
+            if (score := json_score(score)) is None:
+                continue
+            low, high = ranges.get(column, (score, score))
+            ranges[column] = [min(low, score), max(high, score)]
+    return {
+        "first": batch[0]["row_group"],
+        "count": len(batch),
+        "ranges": ranges,
+        "cats": {c: sorted(v) for c, v in cats.items()},
+    }
+
+
+def table_html(name: str, sheet: report_writer.Sheet) -> str:
+    """Small tables, like the statistics, go right on the index page."""
+    columns, rows = report_writer.sheet_rows(sheet)
+    head = "".join(f"<th>{html.escape(c)}</th>" for c in columns)
+    body = "".join(
+        "<tr>"
+        + "".join(
+            f"<td>{'' if report_writer.is_empty(v) else html.escape(str(v))}</td>"
+            for v in row
+        )
+        + "</tr>"
+        for row in rows
+    )
+    return (
+        f"<details><summary>{html.escape(name)}</summary>"
+        f"<table><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table></details>"
+    )
+
+
+# ----------------------------------------------------------------------------------
+PAGE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ font-family: sans-serif; font-size: 13px; margin: 1em; }}
+table {{ border-collapse: collapse; }}
+th, td {{ border: 1px solid #ccc; padding: 2px 4px; vertical-align: top; }}
+th {{ background: #eee; position: sticky; top: 0; }}
+td {{ white-space: pre-wrap; max-width: 30em; }}
+td.text {{ min-width: 20em; }}
+tbody.group {{ border-top: 3px solid #888; }}
+.label {{ color: #666; font-size: 0.85em; }}
+details {{ margin-bottom: 1em; }}
+#controls {{ margin: 1em 0; }}
+#controls > * {{ margin-right: 0.5em; }}
+#status {{ color: #666; }}
+</style>
+</head>
+<body>
+<h1>{title}</h1>
+{tables}
+<div id="controls">
+  <label>Column <select id="column"><option value="">any</option></select></label>
+  <label>Category <select id="category"><option value="">any</option></select></label>
+  <label>Score <input id="min" type="number" step="0.01" size="5"></label>
+  <label>to <input id="max" type="number" step="0.01" size="5"></label>
+  <button id="filter">Filter</button>
+  <button id="clear">Clear</button>
+  <button id="prev">Previous</button>
+  <button id="next">Next</button>
+  <span id="status"></span>
+</div>
+<table id="detail"></table>
+<script>
+"use strict";
+let report = null;
+const shards = new Map();
+const waiting = new Map();
+
+function reportManifest(manifest) {{ report = manifest; }}
+
+function reportShard(number, groups) {{
+  shards.set(number, groups);
+  while (shards.size > report.shard_cache) shards.delete(shards.keys().next().value);
+  for (const resolve of waiting.get(number) || []) resolve(groups);
+  waiting.delete(number);
+}}
+
+function loadShard(number) {{
+  if (shards.has(number)) return Promise.resolve(shards.get(number));
+  return new Promise((resolve, reject) => {{
+    if (!waiting.has(number)) {{
+      waiting.set(number, []);
+      const script = document.createElement("script");
+      const name = `shard_${{String(number).padStart(5, "0")}}.js`;
+      script.src = `${{report.dir}}/${{name}}`;
+      script.onload = () => script.remove();
+      script.onerror = () => reject(new Error(`Could not load ${{script.src}}`));
+      document.head.appendChild(script);
+    }}
+    waiting.get(number).push(resolve);
+  }});
+}}
+
+function readFilter() {{
+  const number = id => {{
+    const value = document.getElementById(id).value;
+    return value === "" ? null : Number(value);
+  }};
+  return {{
+    column: document.getElementById("column").value,
+    category: document.getElementById("category").value,
+    min: number("min"),
+    max: number("max"),
+  }};
+}}
+
+function isFiltered(f) {{
+  return f.column !== "" || f.category !== "" || f.min !== null || f.max !== null;
+}}
+
+function inRange(score, f) {{
+  if (f.min === null && f.max === null) return true;
+  if (score === null) return false;
+  return (f.min === null || score >= f.min) && (f.max === null || score <= f.max);
+}}
+
+function shardMayMatch(summary, f) {{
+  const columns = f.column ? [f.column] : Object.keys(summary.cats);
+  return columns.some(column => {{
+    const cats = summary.cats[column] || [];
+    if (f.category && !cats.includes(f.category)) return false;
+    if (f.min === null && f.max === null) return cats.length > 0;
+    const range = summary.ranges[column];
+    if (!range) return false;
+    return (f.min === null || range[1] >= f.min)
+      && (f.max === null || range[0] <= f.max);
+  }});
+}}
+
+function groupMatches(group, f) {{
+  return group.scores.some(([file, column, category, score]) =>
+    (!f.column || column === f.column)
+    && (!f.category || category === f.category)
+    && inRange(score, f));
+}}
+
+// A page starts at a cursor, the shard number and the group index in it
+let filter = readFilter();
+let cursor = [1, 0];
+let nextCursor = null;
+const previous = [];
+
+async function findPage(start) {{
+  const groups = [];
+  let [number, index] = start;
+  const filtered = isFiltered(filter);
+  while (number <= report.shards.length && groups.length < report.shard_size) {{
+    if (filtered && !shardMayMatch(report.shards[number - 1], filter)) {{
+      number += 1;
+      index = 0;
+      continue;
+    }}
+    showStatus(`Loading shard ${{number}} of ${{report.shards.length}}`);
+    const shard = await loadShard(number);
+    for (; index < shard.length && groups.length < report.shard_size; index++) {{
+      if (!filtered || groupMatches(shard[index], filter)) groups.push(shard[index]);
+    }}
+    if (index >= shard.length) {{
+      number += 1;
+      index = 0;
+    }}
+  }}
+  return {{ groups, next: number <= report.shards.length ? [number, index] : null }};
+}}
+
+async function show(start) {{
+  try {{
+    const page = await findPage(start);
+    cursor = start;
+    nextCursor = page.next;
+    render(page.groups);
+    const shown = page.groups.length;
+    const where = isFiltered(filter) ? "matching groups" : "groups";
+    const first = shown ? page.groups[0].row_group : "";
+    showStatus(shown ? `${{shown}} ${{where}} from row group ${{first}}`
+      : `No ${{where}}`);
+  }} catch (error) {{
+    showStatus(error.message);
+  }}
+  document.getElementById("prev").disabled = previous.length === 0;
+  document.getElementById("next").disabled = nextCursor === null;
+}}
+
+function showStatus(message) {{
+  document.getElementById("status").textContent = message;
+}}
+
+function cell(tag, value, className) {{
+  const td = document.createElement(tag);
+  if (className) td.className = className;
+  if (Array.isArray(value)) {{
+    value.forEach(([label, text], i) => {{
+      if (i) td.appendChild(document.createElement("br"));
+      const span = document.createElement("span");
+      span.className = "label";
+      span.textContent = label;
+      td.append(span, ` ${{text}}`);
+    }});
+  }} else if (value !== null && value !== undefined) {{
+    td.textContent = value;
+  }}
+  return td;
+}}
+
+function render(groups) {{
+  const table = document.getElementById("detail");
+  table.replaceChildren();
+  const head = table.createTHead().insertRow();
+  const names = ["text", "image_path", "row_group", "row_type", ...report.columns];
+  for (const name of names) {{
+    head.appendChild(cell("th", name));
+  }}
+  for (const group of groups) {{
+    const body = table.appendChild(document.createElement("tbody"));
+    body.className = "group";
+    group.rows.forEach((row, i) => {{
+      const tr = body.insertRow();
+      if (i === 0) {{
+        const span = group.rows.length;
+        const text = tr.appendChild(cell("td", group.text, "text"));
+        const image = tr.appendChild(cell("td", group.href ? null : group.image_path));
+        const number = tr.appendChild(cell("td", group.row_group));
+        if (group.href) {{
+          const link = image.appendChild(document.createElement("a"));
+          link.href = group.href;
+          link.textContent = group.image_path;
+        }}
+        for (const td of [text, image, number]) td.rowSpan = span;
+      }}
+      row.forEach(value => tr.appendChild(cell("td", value)));
+    }});
+  }}
+}}
+
+function fillSelect(id, values) {{
+  const select = document.getElementById(id);
+  for (const value of values) select.add(new Option(value, value));
+}}
+</script>
+<script src="{manifest}"></script>
+<script>
+"use strict";
+if (!report) {{
+  showStatus("The report's files are missing, they go in a folder next to this page");
+}} else {{
+  fillSelect("column", report.columns);
+  fillSelect("category", report.categories);
+  document.getElementById("filter").onclick = () => {{
+    filter = readFilter();
+    previous.length = 0;
+    show([1, 0]);
+  }};
+  document.getElementById("clear").onclick = () => {{
+    for (const id of ["column", "category", "min", "max"]) {{
+      document.getElementById(id).value = "";
+    }}
+    document.getElementById("filter").onclick();
+  }};
+  document.getElementById("next").onclick = () => {{
+    if (nextCursor === null) return;
+    previous.push(cursor);
+    show(nextCursor);
+  }};
+  document.getElementById("prev").onclick = () => {{
+    if (previous.length) show(previous.pop());
+  }};
+  show([1, 0]);
+}}
+</script>
+</body>
+</html>
+"""
@@ -0,0 +1,123 @@
+"""
+Line up the OCR text, expected records, and parse files of a comparison.
+
+The compare scripts each read every table into pandas, built a {source: record} dict
+for every file, intersected the sets of sources, and then copied the values into new
+records for every row group. Here I read only the columns that a comparison uses into
+Arrow tables and inner join them on "source" in Arrow. Only the joined rows become
+Python strings and all of the lists that come back line up by row, so every compare
+script sees the same images in the same order.
+
+A source that is in a table more than once, like when a parse was resumed, uses its
+last record, which is what the old dicts did.
+"""
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from llama.pylib import lineage, record_schema, table_io
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+@dataclass
+class Joined:
+    """The records of a comparison, item i of every list is for the same source."""
+
+    sources: list[str] = field(default_factory=list)
+    texts: list[str] = field(default_factory=list)
+    expects: list[dict[str, str]] = field(default_factory=list)
+    expect_columns: list[str] = field(default_factory=list)
+    parses: dict[str, list[dict[str, str]]] = field(default_factory=dict)
+    parse_columns: list[str] = field(default_factory=list)
+
+
+def join(
+    ocr_file: Path,
+    parse_files: list[Path],
+    expect_file: Path | None = None,
+    *,
+    limit: int | None = None,
+) -> Joined:
+    """
+    Join the OCR text, the expected records, and the parse files on their sources.
+
+    The expected records are a gold standard or GBIF data. They keep all of their
+    columns, the parse files lose their lineage columns. Sources are sorted and
+    only the first "limit" of them are kept.
+    """
+    # The files and the columns to read from each one
+    files = [(ocr_file, ["source", "text"])]
+    if expect_file:
+        files.append((expect_file, table_io.read_column_names(expect_file)))
+    for parse_file in parse_files:
+        names = table_io.read_column_names(parse_file)
+        files.append((parse_file, [c for c in names if not lineage.is_lineage(c)]))
+
+    # Join only the sources and their row numbers
+    keys = None
+    for i, (path, _) in enumerate(files):
+        key = row_keys(read(path, ["source"]), str(i))
+        keys = key if keys is None else keys.join(key, "source", join_type="inner")
+    keys = keys.sort_by("source").slice(0, limit)
+
+    # Then take the joined rows from one table at a time
+    sources = record_schema.to_string_list(keys.column("source"))
+    records = [
+        to_records(read(path, names).take(keys.column(str(i))), sources)
+        for i, (path, names) in enumerate(files)
+    ]
+
+    parse_columns = {}
+    for _, names in files[2 if expect_file else 1 :]:
+        parse_columns |= dict.fromkeys(names)
+
+    return Joined(
+        sources=sources,
+        texts=[r["text"] for r in records[0]],
+        expects=records[1] if expect_file else [],
+        expect_columns=files[1][1] if expect_file else [],
+        parses=dict(
+            zip(
+                [p.stem for p in parse_files],
+                records[2 if expect_file else 1 :],
+                strict=True,
+            )
+        ),
+        parse_columns=list(parse_columns),
+    )
+
+
+def read(path: Path, columns: list[str] | None = None) -> pa.Table:
+    """Read a table with only the given columns and with string sources."""
+    table = table_io.read_arrow(path, columns)
+    index = table.column_names.index("source")
+    return table.set_column(
+        index, "source", pc.cast(table.column("source"), pa.string())
+    )
+
+
+def row_keys(table: pa.Table, name: str) -> pa.Table:
+    """Get every source and its row number, only the last row of repeated sources."""
+    keys = pa.table({"source": table.column("source"), name: np.arange(table.num_rows)})
+    if pc.count_distinct(keys.column("source")).as_py() < keys.num_rows:
+        last = keys.group_by("source").aggregate([(name, "max")])
+        keys = last.rename_columns(["source", name])
+    return keys
+
+
+def to_records(table: pa.Table, sources: list[str]) -> list[dict[str, str]]:
+    """Turn a table's rows into records of strings."""
+    names = table.column_names
+    columns = [
+        sources if c == "source" else record_schema.to_string_list(table.column(c))
+        for c in names
+    ]
+    return [
+        dict(zip(names, values, strict=True)) for values in zip(*columns, strict=True)
+    ]
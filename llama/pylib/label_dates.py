@@ -0,0 +1,238 @@
+"""
+Convert the dates we see on specimen labels to ISO dates.
+
+Label dates come in a handful of forms: "12.VI.1987", "01/ix-77", "Jan 30, 1922",
+"August 1911", "6/12/87", etc. I split a date into number and word tokens and match
+the token pattern against those forms. Only dates that don't fit any of the forms are
+handed to dateutil, which is much slower and guesses freely.
+
+The same dates repeat many times within a collection, so results are cached.
+"""
+
+import re
+from calendar import monthrange
+from datetime import MINYEAR
+from datetime import date as dt
+from functools import lru_cache
+
+from dateutil import parser
+from dateutil.relativedelta import relativedelta
+
+MONTHS: dict[str, int] = {
+    "january": 1,
+    "jan": 1,
+    "february": 2,
+    "feb": 2,
+    "march": 3,
+    "mar": 3,
+    "april": 4,
+    "apr": 4,
+    "may": 5,
+    "june": 6,
+    "jun": 6,
+    "july": 7,
+    "jul": 7,
+    "august": 8,
+    "aug": 8,
+    "september": 9,
+    "sept": 9,
+    "sep": 9,
+    "october": 10,
+    "oct": 10,
+    "november": 11,
+    "nov": 11,
+    "december": 12,
+    "dec": 12,
+}
+
+ROMAN: dict[str, int] = {
+    "i": 1,
+    "ii": 2,
+    "iii": 3,
+    "iv": 4,
+    "v": 5,
+    "vi": 6,
+    "vii": 7,
+    "viii": 8,
+    "ix": 9,
+    "x": 10,
+    "xi": 11,
+    "xii": 12,
+}
+
+MONTH_WORDS: dict[str, int] = MONTHS | ROMAN
+
+MONTH_NAMES = [
+    "",
+    "Jan",
+    "Feb",
+    "Mar",
+    "Apr",
+    "May",
+    "June",
+    "July",
+    "Aug",
+    "Sept",
+    "Oct",
+    "Nov",
+    "Dec",
+]
+
+SEP = r"[\s(.,/_'-]+"  # Date month, day, year separators
+PART = r"\d+|[a-z]+"
+
+DATE = re.compile(rf"(?:{PART}|{SEP})+")
+PARTS = re.compile(PART)
+TRIM = re.compile(r"^[\s(]+|[\s.,;:_)-]+$")
+ROMAN_WORD = re.compile(rf"\b(?:{'|'.join(sorted(ROMAN, key=len, reverse=True))})\b")
+
+# The separators between the dates of a range
+RANGE = re.compile(r"\s*\|\s*|\s+to\s+", flags=re.IGNORECASE)
+
+MAX_DAY = 31
+MAX_MONTH = 12
+
+CACHE_SIZE = 65_536
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def to_iso(value: str) -> str:
+    """
+    Convert one label date to an ISO date, a year and month, or a year.
+
+    Return an empty string if it isn't a date.
+    """
+    value = TRIM.sub("", value.lower().strip())
+    if not value:
+        return ""
+
+    if DATE.fullmatch(value):
+        kinds, parts = tokenize(value)
+        if kinds:
+            return from_tokens(kinds, parts)
+
+    return from_dateutil(value)
+
+
+def range_to_iso(value: str) -> str:
+    """
+    Convert a date range like "12.VI.1987|20.VI.1987" to ISO dates.
+
+    The verbatim date cleaner has already replaced the "|" with " to ".
+    """
+    dates = [to_iso(d) for d in RANGE.split(value)]
+    return " to ".join(d for d in dates if d)
+
+
+def tokenize(value: str) -> tuple[str, list[int]]:
+    """
+    Classify each token as a month "M", a number "N", or a four digit year "Y".
+
+    An empty pattern means a token is not part of a date.
+    """
+    kinds = []
+    parts = []
+    for token in PARTS.findall(value):
+        if token.isdigit():
+            kinds.append("Y" if len(token) == 4 else "N")
+            parts.append(int(token))
+        elif month := MONTH_WORDS.get(token):
+            kinds.append("M")
+            parts.append(month)
+        else:
+            return "", []
+    return "".join(kinds), parts
+
+
+def from_tokens(kinds: str, parts: list[int]) -> str:  # noqa: PLR0911
+    match kinds, parts:
+        # 12.VI.1987, 12 June 87
+        case (("NMY" | "NMN"), [day, month, year]):
+            return full_date(year, month, day)
+        # 1987 VI 12
+        case "YMN", [year, month, day]:
+            return full_date(year, month, day)
+        # June 12, 1987
+        case (("MNY" | "MNN"), [month, day, year]):
+            return full_date(year, month, day)
+        # 1987-06-12
+        case "YNN", [year, month, day]:
+            return full_date(year, month, day)
+        # 6/12/1987 is month first unless that can't be right
+        case (("NNY" | "NNN"), [first, second, year]):
+            if first > MAX_MONTH:
+                first, second = second, first
+            return full_date(year, first, second)
+        # August 1911, ix-77 but not June 12
+        case "MY", [month, year]:
+            return year_month(year, month)
+        case "MN", [month, year] if year > MAX_DAY:
+            return year_month(year, month)
+        # 1911 August but not 12 June
+        case "YM", [year, month]:
+            return year_month(year, month)
+        case "NM", [year, month] if year > MAX_DAY:
+            return year_month(year, month)
+        # 09-1911
+        case "NY", [month, year]:
+            return year_month(year, month)
+        # 1911-09
+        case "YN", [year, month]:
+            return year_month(year, month)
+        # 1911
+        case "Y", [year]:
+            return year_only(year)
+
+    # Including 09-77 and June 12 which are too ambiguous to guess at
+    return ""
+
+
+def full_year(year: int) -> int:
+    """Two digit years are in this century unless that is in the future."""
+    if year >= 100:
+        return year
+    year += 2000
+    return year if year <= dt.today().year else year - 100
+
+
+def full_date(year: int, month: int, day: int) -> str:
+    year = full_year(year)
+    if year < MINYEAR:
+        return ""
+    if not 1 <= month <= MAX_MONTH or not 1 <= day <= monthrange(year, month)[1]:
+        return ""
+    date_ = dt(year, month, day)
+    if date_ > dt.today():
+        date_ -= relativedelta(years=100)
+    return date_.isoformat()
+
+
+def year_month(year: int, month: int) -> str:
+    year = full_year(year)
+    if year < MINYEAR or not 1 <= month <= MAX_MONTH:
+        return ""
+    if dt(year, month, 1) > dt.today():
+        year -= 100
+    return f"{year:04d}-{month:02d}"
+
+
+def year_only(year: int) -> str:
+    if year < MINYEAR:
+        return ""
+    if year > dt.today().year:
+        year -= 100
+    return f"{year:04d}"
+
+
+def from_dateutil(value: str) -> str:
+    """Let dateutil have a go at dates that aren't in any of the label forms."""
+    value = ROMAN_WORD.sub(lambda m: MONTH_NAMES[ROMAN[m[0]]], value)
+    try:
+        date_ = parser.parse(value).date()
+    except ValueError, OverflowError:
+        return ""
+
+    if date_ > dt.today():
+        date_ -= relativedelta(years=100)
+
+    return date_.isoformat()
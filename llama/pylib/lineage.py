@@ -0,0 +1,128 @@
+"""
+Track where every output row came from so reruns only redo what changed.
+
+Each stage adds lineage columns to its rows: digests of the image bytes, the OCR text,
+the prompt, and the parse record, the model names, and digests of the field cleaner
+modules. When a stage runs with --incremental, it compares these columns with the
+current inputs and only recomputes the stale rows, or for cleaning, the stale columns.
+A rerun appends its new rows to the output, so the last good row for a source wins.
+
+Lineage columns all start with "lineage_" and are never scored.
+"""
+
+import hashlib
+import inspect
+import json
+from functools import cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from llama.pylib import table_io
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from llama.pylib.prompt_util import Prompt
+
+PREFIX = "lineage_"
+
+IMAGE = "lineage_image"
+OCR_PROMPT = "lineage_ocr_prompt"
+OCR_MODEL = "lineage_ocr_model"
+TEXT = "lineage_text"
+PARSE_PROMPT = "lineage_parse_prompt"
+PARSE_MODEL = "lineage_parse_model"
+PARSE = "lineage_parse"
+CLEANERS = "lineage_cleaners"
+
+OCR_COLUMNS = [IMAGE, OCR_PROMPT, OCR_MODEL]
+PARSE_COLUMNS = [TEXT, PARSE_PROMPT, PARSE_MODEL]
+CLEAN_COLUMNS = [PARSE, CLEANERS]
+
+# Parse record columns that don't change what the cleaners do
+VOLATILE = ("status", "elapsed")
+
+DIGEST_SIZE = 8
+
+
+def is_lineage(column: str) -> bool:
+    return column.startswith(PREFIX)
+
+
+def digest_bytes(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=DIGEST_SIZE).hexdigest()
+
+
+def digest_text(text: str) -> str:
+    return digest_bytes(text.encode("utf-8"))
+
+
+def digest_file(path: Path) -> str:
+    with path.open("rb") as f:
+        return hashlib.file_digest(
+            f, lambda: hashlib.blake2b(digest_size=DIGEST_SIZE)
+        ).hexdigest()
+
+
+def digest_prompt(prompt: Prompt) -> str:
+    """Digest everything the model sees except the document itself."""
+    return digest_text(prompt.system_prompt + prompt.build_text_prompt(""))
+
+
+def digest_record(record: dict[str, Any]) -> str:
+    """Digest a parse record's values, ignoring lineage and timing columns."""
+    values = {
+        k: str(v) for k, v in record.items() if not is_lineage(k) and k not in VOLATILE
+    }
+    return digest_text(json.dumps(values, sort_keys=True))
+
+
+@cache
+def digest_class(cls: type) -> str:
+    """Digest the source module of a field class, it changes when the code does."""
+    return digest_bytes(Path(inspect.getfile(cls)).read_bytes())
+
+
+def digest_cleaners(classes: dict[str, Any]) -> str:
+    """Digest the cleaner modules, the classes are indexed by column name."""
+    digests = {k: digest_class(cls) for k, cls in classes.items()}
+    return json.dumps(digests, sort_keys=True)
+
+
+def stale_columns(old: str, new: str) -> list[str]:
+    """Get the columns with cleaners that changed since the old cleaner digests."""
+    old_digests = json.loads(old) if old else {}
+    new_digests = json.loads(new)
+    return [c for c, d in new_digests.items() if old_digests.get(c) != d]
+
+
+def latest(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Keep the last row for every source.
+
+    A successful row beats any later error, so a failed rerun doesn't lose data.
+    """
+    if "status" in df.columns:
+        good = df["status"] == "success"
+        df = df.loc[good | ~df["source"].isin(df.loc[good, "source"])]
+    return df.drop_duplicates(subset="source", keep="last")
+
+
+def dedupe(path: Path) -> None:
+    """Rewrite a stage's output with only the latest row for every source."""
+    table_io.write_table(path, latest(table_io.read_table(path)))
+
+
+def is_current(record: dict[str, Any], current: dict[str, str]) -> bool:
+    """Is the record's lineage the same as the current lineage."""
+    return all(record.get(k, "") == v for k, v in current.items())
+
+
+def upgrade_header(path: Path, columns: list[str]) -> None:
+    """Rewrite an existing output so it has all of the columns, in order."""
+    header = table_io.read_column_names(path)
+    if header[: len(columns)] == columns:
+        return
+    df = table_io.read_table(path)
+    extra = [c for c in df.columns if c not in columns]
+    table_io.write_table(path, df.reindex(columns=columns + extra, fill_value=""))
@@ -0,0 +1,154 @@
+"""
+Estimate how long an OCR or parse job will take and what it will cost.
+
+I run a small random sample of the job against the configured model server and then
+extrapolate the wall time, token counts, and cost for the whole job at several thread
+counts. The extrapolation assumes that the server scales linearly with the number of
+threads, which it never quite does, so treat the larger thread counts as a best case.
+"""
+
+import logging
+import math
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+# A rule of thumb for when the server does not report token usage
+CHARS_PER_TOKEN = 4.0
+
+PLAN_THREADS = [1, 2, 4, 8, 16, 32]
+
+
+@dataclass
+class Trial:
+    status: str
+    seconds: float
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+
+@dataclass
+class Estimate:
+    threads: int
+    wall: timedelta
+    prompt_tokens: int
+    completion_tokens: int
+    cost: float
+
+
+def token_usage(reply: dict[str, Any], prompt_chars: int, reply_chars: int) -> dict:
+    """Get token usage from an LM reply, or guess at it if the server doesn't say."""
+    usage = reply.get("usage") or {}
+    prompt_tokens = usage.get("prompt_tokens") or round(prompt_chars / CHARS_PER_TOKEN)
+    completion_tokens = usage.get("completion_tokens") or round(
+        reply_chars / CHARS_PER_TOKEN
+    )
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens}
+
+
+def sample(items: list[Any], size: int, seed: int | None = None) -> list[Any]:
+    size = min(size, len(items))
+    return random.Random(seed).sample(items, size)  # noqa: S311
+
+
+def run_trials(
+    items: list[Any], worker: Callable[[Any], dict], threads: int
+) -> tuple[list[Trial], float]:
+    """Run the worker on every item and time each call and the whole batch."""
+
+    def timed(item: Any) -> Trial:
+        began = time.perf_counter()
+        result = worker(item)
+        usage = result.get("usage") or {}
+        return Trial(
+            status=result["status"],
+            seconds=time.perf_counter() - began,
+            prompt_tokens=usage.get("prompt_tokens", 0),
+            completion_tokens=usage.get("completion_tokens", 0),
+        )
+
+    began = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        futures = [executor.submit(timed, item) for item in items]
+        trials = [future.result() for future in as_completed(futures)]
+    wall = time.perf_counter() - began
+
+    return trials, wall
+
+
+def extrapolate(
+    trials: list[Trial],
+    total: int,
+    thread_levels: list[int],
+    input_cost: float = 0.0,
+    output_cost: float = 0.0,
+) -> list[Estimate]:
+    """
+    Extrapolate sample trials to the whole job.
+
+    Costs are in dollars per million tokens, which is how hosted models are priced.
+    """
+    good = [t for t in trials if t.status == "success"] or trials
+    if not good:
+        return []
+
+    latency = sum(t.seconds for t in good) / len(good)
+    prompt_tokens = round(total * sum(t.prompt_tokens for t in good) / len(good))
+    completion_tokens = round(
+        total * sum(t.completion_tokens for t in good) / len(good)
+    )
+    cost = (prompt_tokens * input_cost + completion_tokens * output_cost) / 1_000_000
+
+    estimates = []
+    for threads in sorted(set(thread_levels)):
+        seconds = math.ceil(total / threads) * latency
+        estimates.append(
+            Estimate(
+                threads=threads,
+                wall=timedelta(seconds=round(seconds)),
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                cost=cost,
+            )
+        )
+    return estimates
+
+
+def log_plan(
+    trials: list[Trial],
+    wall: float,
+    total: int,
+    threads: int,
+    estimates: list[Estimate],
+) -> None:
+    errors = sum(1 for t in trials if t.status != "success")
+    logging.info(
+        f"Planned with {len(trials)} sample documents using {threads} threads, "
+        f"{errors} errors"
+    )
+    if not trials:
+        return
+
+    latency = sum(t.seconds for t in trials) / len(trials)
+    throughput = len(trials) / wall if wall else 0.0
+    logging.info(
+        f"Sample latency {latency:0.2f} s/document, "
+        f"throughput {throughput:0.2f} documents/s"
+    )
+    if throughput:
+        measured = timedelta(seconds=round(total / throughput))
+        logging.info(f"At the measured throughput {total} documents take {measured}")
+
+    for est in estimates:
+        logging.info(
+            f"threads {est.threads:>3}: wall {est.wall}, "
+            f"prompt tokens {est.prompt_tokens:,}, "
+            f"completion tokens {est.completion_tokens:,}, "
+            f"cost ${est.cost:,.2f}"
+        )
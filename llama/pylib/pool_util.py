@@ -0,0 +1,93 @@
+"""
+Spread CPU bound work over a pool of processes.
+
+Cleaning and scoring are pure Python loops over records, so threads don't help. I split
+the records into chunks, send each chunk to a worker process, and put the results back
+together in the same order as the input. Each worker runs an initializer once, so it
+can load the prompt, field classes, and vocabularies before it sees any records.
+"""
+
+import math
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Any
+
+from tqdm import tqdm
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator, Sequence
+
+# More chunks than workers keeps all of the workers busy when chunks are uneven
+CHUNKS_PER_WORKER = 4
+
+
+def chunk(items: Sequence[Any], workers: int) -> list[Sequence[Any]]:
+    """Split items into ordered chunks, there are a few chunks per worker."""
+    if workers <= 1:
+        return [items]
+    count = max(1, workers * CHUNKS_PER_WORKER)
+    size = max(1, math.ceil(len(items) / count))
+    return [items[i : i + size] for i in range(0, max(1, len(items)), size)]
+
+
+def run_chunks(
+    func: Callable[[Any], Any],
+    chunks: list[Any],
+    *,
+    workers: int = 1,
+    initializer: Callable[..., None] | None = None,
+    initargs: tuple = (),
+    desc: str = "",
+) -> list[Any]:
+    """
+    Run the function on every chunk and return the results in input order.
+
+    With one worker everything runs in this process, which is easier to debug. The
+    function and its arguments must be picklable when there are more workers, so
+    use module level functions.
+    """
+    if workers <= 1:
+        if initializer:
+            initializer(*initargs)
+        return [func(c) for c in tqdm(chunks, desc=desc)]
+
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=initializer, initargs=initargs
+    ) as executor:
+        return list(tqdm(executor.map(func, chunks), total=len(chunks), desc=desc))
+
+
+def stream_chunks(
+    func: Callable[[Any], Any],
+    chunks: Iterable[Any],
+    *,
+    workers: int = 1,
+    initializer: Callable[..., None] | None = None,
+    initargs: tuple = (),
+) -> Iterator[tuple[Any, Any]]:
+    """
+    Like run_chunks but for chunks that don't fit into memory all at once.
+
+    Chunks are read only as fast as the workers finish them, so there are never more
+    than a few chunks per worker in memory. Yield each chunk with its result, in input
+    order, so the caller can match them up.
+    """
+    if workers <= 1:
+        if initializer:
+            initializer(*initargs)
+        for c in chunks:
+            yield c, func(c)
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=initializer, initargs=initargs
+    ) as executor:
+        pending = deque()
+        for c in chunks:
+            pending.append((c, executor.submit(func, c)))
+            if len(pending) >= workers * CHUNKS_PER_WORKER:
+                c, future = pending.popleft()
+                yield c, future.result()
+        while pending:
+            c, future = pending.popleft()
+            yield c, future.result()
@@ -1,5 +1,6 @@
 import importlib
 import logging
+import os
 import re
 from dataclasses import dataclass, field
 from pathlib import Path
@@ -17,6 +18,9 @@ SYS_PROMPT = re.compile(r"^Base\s+Prompt", flags=re.IGNORECASE)
 # The output fields section of the prompt
 OUT_FIELDS = re.compile(r"^Output\s+Fields", flags=re.IGNORECASE)
 
+# The calculated fields section of the prompt
+CALC_FIELDS = re.compile(r"^Calculated\s+Fields", flags=re.IGNORECASE)
+
 
 def get_front_yaml(text: str, path: Path) -> dict:
     top = re.search("^---$.*^---$", text, flags=re.MULTILINE | re.DOTALL)
@@ -60,12 +64,22 @@ class FieldPrompt:
 
         return field_prompt
 
+    @property
+    def category(self) -> str:
+        """The field's research domain or Darwin Core category, like "location"."""
+        return self.module.parent.name
+
     def field_class(self) -> Any:
-        cls_name = self.name[0].upper() + self.name[1:]
-        mod_name = str(self.module).removesuffix(".py").replace("/", ".")
-        module = importlib.import_module(mod_name)
-        cls = getattr(module, cls_name)
-        return cls
+        return import_field_class(self.name, self.module)
+
+
+def import_field_class(name: str, module_path: Path) -> Any:
+    """Import a field class from its module, the class is the capitalized name."""
+    cls_name = name[0].upper() + name[1:]
+    mod_name = str(module_path).removesuffix(".py").replace("/", ".")
+    module = importlib.import_module(mod_name)
+    cls = getattr(module, cls_name)
+    return cls
 
 
 @dataclass
@@ -78,11 +92,13 @@ class Prompt:
     description: str
     base_prompt: str = ""
     fields: dict[str, FieldPrompt] = field(default_factory=dict)
+    calculated: dict[str, Path] = field(default_factory=dict)
     field_prompts: str = ""
     field_template: str = ""
     _system_prompt: str = ""
     _columns: list[str] = field(default_factory=list)
     _field_classes: dict[str, Any] = field(default_factory=dict)
+    _calculated_classes: dict[str, Any] = field(default_factory=dict)
 
     @classmethod
     def load(cls, path: Path) -> Prompt:
@@ -96,6 +112,7 @@ class Prompt:
 
         sys_prompt = ""
         fields = {}
+        calculated = {}
         for section in sections:
             section = section.strip()
 
@@ -111,6 +128,13 @@ class Prompt:
                     link = link.removeprefix("(").removesuffix(")")
                     fields[link] = FieldPrompt.load(link)
 
+            # Get calculated fields list section, the links are to the modules
+            elif CALC_FIELDS.match(section):
+                section = CALC_FIELDS.sub("", section).strip()
+                links = re.findall(r"\[(\w+)\]\(([\w/.]+\.py)\)", section)
+                for name, link in links:
+                    calculated[name] = Path(os.path.normpath(FIELD_PROMPT_DIR / link))
+
         if not sys_prompt:
             raise ValueError(f"Improperly formatted prompt file. {path}")
 
@@ -119,6 +143,7 @@ class Prompt:
             description=front["description"],
             base_prompt=sys_prompt,
             fields=fields,
+            calculated=calculated,
         )
         if prompt.fields:
             prompt.field_prompts = prompt.build_field_prompts()
@@ -147,6 +172,16 @@ class Prompt:
             }
         return self._field_classes
 
+    @property
+    def calculated_classes(self) -> dict[str, Any]:
+        """Return calculated field classes indexed by their name."""
+        if not self._calculated_classes:
+            self._calculated_classes = {
+                name: import_field_class(name, path)
+                for name, path in self.calculated.items()
+            }
+        return self._calculated_classes
+
     @property
     def column_names(self) -> list[str]:
         """Get all column names."""
@@ -155,6 +190,40 @@ class Prompt:
                 self._columns += field_.columns
         return self._columns
 
+    def split_fields(self, groups: list[str] | None = None) -> list[Prompt]:
+        """
+        Split the output fields into several smaller prompts.
+
+        Each group is a comma separated list of field names or field categories, like
+        "location,county" or "taxon". Fields not in any group are grouped by their
+        category. Every smaller prompt keeps the full base prompt.
+        """
+        groups = groups or []
+        wanted = [{n.strip() for n in g.split(",") if n.strip()} for g in groups]
+
+        buckets: dict[str, dict[str, FieldPrompt]] = {}
+        for link, field_ in self.fields.items():
+            key = field_.category
+            for group, names in zip(groups, wanted, strict=True):
+                if field_.name in names or field_.category in names:
+                    key = group
+                    break
+            buckets.setdefault(key, {})[link] = field_
+
+        prompts = []
+        for key, fields in buckets.items():
+            prompt = Prompt(
+                name=f"{self.name}:{key}",
+                description=self.description,
+                base_prompt=self.base_prompt,
+                fields=fields,
+            )
+            prompt.build_field_prompts()
+            prompt.build_field_template()
+            prompts.append(prompt)
+
+        return prompts
+
     def build_field_prompts(self) -> str:
         formatted = [
             f"{i}. {p}"
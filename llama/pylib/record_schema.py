@@ -0,0 +1,130 @@
+"""
+Arrow types for the stage records, taken from the field dataclass annotations.
+
+A cleaned "decimalLatitude" is a float and a cleaned "flowersPresent" is a bool, but in
+a CSV file they are strings that every later script has to parse again. The field
+classes already say what type every column is, so I turn those annotations into an
+Arrow schema and typed tables keep the values as they are.
+
+The annotations are like "float | str" where the string is only the empty default, so
+the non-string type wins and empty strings are stored as nulls. Columns without a
+field class, like the raw LLM output, are strings. The "status" and "source" columns
+repeat the same few values, so they are dictionary encoded.
+"""
+
+import dataclasses
+import types
+from typing import TYPE_CHECKING, Any, Union, get_args, get_origin, get_type_hints
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+DICTIONARY_COLUMNS = ("status", "source")
+
+STRING = pa.string()
+DICTIONARY = pa.dictionary(pa.int32(), pa.string())
+
+SCALARS: dict[type, pa.DataType] = {
+    bool: pa.bool_(),
+    int: pa.int64(),
+    float: pa.float64(),
+    str: STRING,
+}
+
+BOOLS = {True: True, False: False, "True": True, "False": False}
+
+
+def arrow_type(annotation: Any) -> pa.DataType:
+    """Convert a field annotation like "float | str" to an Arrow type."""
+    if get_origin(annotation) in (Union, types.UnionType):
+        args = [a for a in get_args(annotation) if a is not str]
+        return arrow_type(args[0]) if len(args) == 1 else STRING
+    # Lists fall through to strings, the cleaners reduce them to a string
+    return SCALARS.get(annotation, STRING)
+
+
+def field_types(classes: Iterable[type]) -> dict[str, pa.DataType]:
+    """Get the Arrow type of every visible field in the field classes."""
+    types_ = {}
+    for cls in classes:
+        hints = get_type_hints(cls)
+        for f in dataclasses.fields(cls):
+            if not f.name.startswith("_"):
+                types_[f.name] = arrow_type(hints[f.name])
+    return types_
+
+
+def build_schema(
+    columns: Iterable[str], types_: dict[str, pa.DataType] | None = None
+) -> pa.Schema:
+    """Build a schema for the columns, columns without a type are strings."""
+    types_ = types_ or {}
+    return pa.schema(
+        [
+            (c, DICTIONARY if c in DICTIONARY_COLUMNS else types_.get(c, STRING))
+            for c in columns
+        ]
+    )
+
+
+def to_arrow(df: pd.DataFrame, schema: pa.Schema) -> pa.Table:
+    """Convert records, typed or as strings, to a table with the schema."""
+    arrays = [to_array(df[f.name], f.type) for f in schema]
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def to_array(column: pd.Series, type_: pa.DataType) -> pa.Array:
+    """Convert a column to the type, an empty string or a bad value is a null."""
+    values = column.astype(object).where(column.notna(), "")
+
+    if pa.types.is_boolean(type_):
+        values = values.map(BOOLS)
+    elif pa.types.is_integer(type_):
+        values = pd.to_numeric(values, errors="coerce").astype("Int64")
+    elif pa.types.is_floating(type_):
+        values = pd.to_numeric(values, errors="coerce")
+    else:
+        values = values.map(str)
+
+    values = values.astype(object).where(values.notna(), None).tolist()
+
+    if pa.types.is_dictionary(type_):
+        return pa.array(values, type=STRING).dictionary_encode()
+    return pa.array(values, type=type_)
+
+
+def to_strings(table: pa.Table) -> pd.DataFrame:
+    """
+    Convert a table to records of strings, the same as reading the CSV version.
+
+    Nulls are empty strings and bools are "True" or "False", just like pandas writes
+    them to a CSV file.
+    """
+    data = {
+        name: to_string_list(column)
+        for name, column in zip(table.column_names, table.columns, strict=True)
+    }
+    return pd.DataFrame(data, columns=table.column_names, dtype=str)
+
+
+def to_string_list(column: pa.Array | pa.ChunkedArray) -> list[str]:
+    """
+    Convert a column to strings, every repeated value is the same string object.
+
+    Most cells are empty or repeat a few values, so this is a lot less memory than a
+    string for every cell.
+    """
+    if isinstance(column, pa.ChunkedArray):
+        column = column.combine_chunks()
+    if not pa.types.is_dictionary(column.type):
+        column = pc.dictionary_encode(column, null_encoding="encode")
+    values = ["" if v is None else str(v) for v in column.dictionary.to_pylist()]
+    values = np.array([*values, ""], dtype=object)
+    # Nulls that are not in the dictionary are the empty string at the end
+    indices = column.indices.fill_null(len(values) - 1)
+    return values[indices.to_numpy()].tolist()
@@ -0,0 +1,317 @@
+"""
+Write the comparison reports a row at a time.
+
+The compare scripts wrote their reports with pandas and odfpy, which builds every cell
+of every sheet as a Python object before saving anything. With a row group for every
+image and a row for every parse file in a group, the detail sheet has hundreds of
+thousands of rows, and writing it took longer and used more memory than the scoring.
+
+So I write the spreadsheet XML myself, one row at a time, straight into the zip file.
+A sheet is either a data frame or an iterable of row dicts, like a generator, so the
+rows never all have to be in memory. The file type is taken from the file name:
+- ".ods": An OpenDocument spreadsheet, like before.
+- ".xlsx": An Excel workbook.
+- ".csv" or ".parquet": A bundle of files, one per sheet, named like
+  "report.detail.csv" for the "detail" sheet of "report.csv".
+
+For an iterable of row dicts, the first row's keys are the sheet's columns.
+"""
+
+import csv
+import math
+import numbers
+import re
+import zipfile
+from itertools import chain
+from typing import TYPE_CHECKING, Any
+from xml.sax.saxutils import escape, quoteattr
+
+import pandas as pd
+
+from llama.pylib import table_io
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+    from pathlib import Path
+    from typing import BinaryIO
+
+type Sheet = pd.DataFrame | Iterable[dict[str, Any]]
+
+SUFFIXES = (".ods", ".xlsx", ".csv", ".parquet")
+
+# XML 1.0 doesn't allow most control characters and OCR text has them sometimes
+BAD_XML = re.compile(r"[^\t\n\r\x20-\ud7ff\ue000-\ufffd\U00010000-\U0010ffff]")
+
+# Rows to hold before writing them to a bundle's Parquet file
+ROW_BATCH = 4_096
+
+
+def write_report(path: Path, sheets: dict[str, Sheet]) -> None:
+    """Write the sheets, in order, to a report of the type given by the suffix."""
+    match path.suffix.lower():
+        case ".ods":
+            write_ods(path, sheets)
+        case ".xlsx":
+            write_xlsx(path, sheets)
+        case ".csv" | ".parquet":
+            write_bundle(path, sheets)
+        case _:
+            msg = f"Unknown report type: {path.name}, use one of {', '.join(SUFFIXES)}"
+            raise ValueError(msg)
+
+
+def sheet_rows(sheet: Sheet) -> tuple[list[str], Iterator[list[Any]]]:
+    """Get the sheet's columns and an iterator of rows of values in column order."""
+    if isinstance(sheet, pd.DataFrame):
+        columns = [str(c) for c in sheet.columns]
+        return columns, (list(r) for r in sheet.itertuples(index=False))
+
+    records = iter(sheet)
+    first = next(records, None)
+    if first is None:
+        return [], iter([])
+    columns = list(first)
+    rows = ([r.get(c) for c in columns] for r in chain([first], records))
+    return columns, rows
+
+
+def is_empty(value: Any) -> bool:
+    if value is None or value == "":
+        return True
+    return isinstance(value, float) and math.isnan(value)
+
+
+def is_number(value: Any) -> bool:
+    return isinstance(value, numbers.Real) and not isinstance(value, bool)
+
+
+def clean_text(value: Any) -> str:
+    return BAD_XML.sub("", str(value))
+
+
+# ----------------------------------------------------------------------------------
+ODS_MIMETYPE = "application/vnd.oasis.opendocument.spreadsheet"
+
+ODS_MANIFEST = f"""<?xml version="1.0" encoding="UTF-8"?>
+<manifest:manifest
+ xmlns:manifest="urn:oasis:names:tc:opendocument:xmlns:manifest:1.0"
+ manifest:version="1.2">
+ <manifest:file-entry manifest:full-path="/" manifest:media-type="{ODS_MIMETYPE}"/>
+ <manifest:file-entry manifest:full-path="content.xml" manifest:media-type="text/xml"/>
+ <manifest:file-entry manifest:full-path="styles.xml" manifest:media-type="text/xml"/>
+</manifest:manifest>
+"""
+
+ODS_NAMESPACES = (
+    'xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0" '
+    'xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0" '
+    'xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0" '
+    'office:version="1.2"'
+)
+
+ODS_STYLES = f"""<?xml version="1.0" encoding="UTF-8"?>
+<office:document-styles {ODS_NAMESPACES}/>
+"""
+
+SPACES = re.compile(r"( {2,}|\t)")
+
+
+def write_ods(path: Path, sheets: dict[str, Sheet]) -> None:
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        # The mimetype must be first and not compressed
+        zf.writestr("mimetype", ODS_MIMETYPE, compress_type=zipfile.ZIP_STORED)
+        zf.writestr("META-INF/manifest.xml", ODS_MANIFEST)
+        zf.writestr("styles.xml", ODS_STYLES)
+
+        with zf.open("content.xml", "w", force_zip64=True) as out:
+            out.write(
+                '<?xml version="1.0" encoding="UTF-8"?>\n'
+                f"<office:document-content {ODS_NAMESPACES}>"
+                "<office:body><office:spreadsheet>".encode()
+            )
+            for name, sheet in sheets.items():
+                write_ods_sheet(out, name, sheet)
+            out.write(b"</office:spreadsheet></office:body></office:document-content>")
+
+
+def write_ods_sheet(out: BinaryIO, name: str, sheet: Sheet) -> None:
+    columns, rows = sheet_rows(sheet)
+    out.write(f"<table:table table:name={quoteattr(name)}>".encode())
+    for row in chain([columns], rows):
+        cells = "".join(ods_cell(v) for v in row)
+        out.write(f"<table:table-row>{cells}</table:table-row>".encode())
+    out.write(b"</table:table>")
+
+
+def ods_cell(value: Any) -> str:
+    if is_empty(value):
+        return "<table:table-cell/>"
+    if isinstance(value, bool):
+        return (
+            '<table:table-cell office:value-type="boolean" '
+            f'office:boolean-value="{str(value).lower()}">'
+            f"<text:p>{str(value).upper()}</text:p></table:table-cell>"
+        )
+    if is_number(value):
+        return (
+            f'<table:table-cell office:value-type="float" office:value="{value}">'
+            f"<text:p>{value}</text:p></table:table-cell>"
+        )
+    return (
+        '<table:table-cell office:value-type="string">'
+        f"<text:p>{ods_text(str(value))}</text:p></table:table-cell>"
+    )
+
+
+def ods_text(text: str) -> str:
+    """
+    ODF collapses runs of spaces so they are written as space elements.
+
+    Newlines are left in the paragraph like odfpy did, so the reports read back the
+    same as before.
+    """
+    return SPACES.sub(ods_space, escape(clean_text(text)))
+
+
+def ods_space(match: re.Match) -> str:
+    if match[0] == "\t":
+        return "<text:tab/>"
+    return f' <text:s text:c="{len(match[0]) - 1}"/>'
+
+
+# ----------------------------------------------------------------------------------
+XLSX_CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels"
+ ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/xl/workbook.xml"
+ ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>
+{sheets}
+</Types>
+"""
+
+XLSX_SHEET_TYPE = (
+    '<Override PartName="/xl/worksheets/sheet{i}.xml" ContentType="application/'
+    'vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+)
+
+XLSX_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Target="xl/workbook.xml"
+ Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>
+</Relationships>
+"""
+
+XLSX_WORKBOOK = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+ xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">
+<sheets>{sheets}</sheets>
+</workbook>
+"""
+
+XLSX_WORKBOOK_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+{sheets}
+</Relationships>
+"""
+
+XLSX_SHEET_REL = (
+    '<Relationship Id="rId{i}" Target="worksheets/sheet{i}.xml" Type="http://'
+    'schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>'
+)
+
+# Excel's limits
+XLSX_MAX_CELL = 32_767
+XLSX_MAX_SHEET_NAME = 31
+
+
+def write_xlsx(path: Path, sheets: dict[str, Sheet]) -> None:
+    count = range(1, len(sheets) + 1)
+    names = [quoteattr(n[:XLSX_MAX_SHEET_NAME]) for n in sheets]
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        types = "\n".join(XLSX_SHEET_TYPE.format(i=i) for i in count)
+        zf.writestr("[Content_Types].xml", XLSX_CONTENT_TYPES.format(sheets=types))
+        zf.writestr("_rels/.rels", XLSX_RELS)
+        workbook = "".join(
+            f'<sheet name={n} sheetId="{i}" r:id="rId{i}"/>'
+            for i, n in zip(count, names, strict=True)
+        )
+        zf.writestr("xl/workbook.xml", XLSX_WORKBOOK.format(sheets=workbook))
+        rels = "\n".join(XLSX_SHEET_REL.format(i=i) for i in count)
+        zf.writestr(
+            "xl/_rels/workbook.xml.rels", XLSX_WORKBOOK_RELS.format(sheets=rels)
+        )
+
+        for i, sheet in zip(count, sheets.values(), strict=True):
+            with zf.open(f"xl/worksheets/sheet{i}.xml", "w", force_zip64=True) as out:
+                write_xlsx_sheet(out, sheet)
+
+
+def write_xlsx_sheet(out: BinaryIO, sheet: Sheet) -> None:
+    columns, rows = sheet_rows(sheet)
+    letters = [column_letter(i) for i in range(len(columns))]
+    out.write(
+        b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        b"<sheetData>"
+    )
+    for r, row in enumerate(chain([columns], rows), 1):
+        cells = "".join(
+            xlsx_cell(f"{c}{r}", v) for c, v in zip(letters, row, strict=True)
+        )
+        out.write(f'<row r="{r}">{cells}</row>'.encode())
+    out.write(b"</sheetData></worksheet>")
+
+
+def xlsx_cell(ref: str, value: Any) -> str:
+    if is_empty(value):
+        return ""
+    if isinstance(value, bool):
+        return f'<c r="{ref}" t="b"><v>{int(value)}</v></c>'
+    if is_number(value):
+        return f'<c r="{ref}"><v>{value}</v></c>'
+    text = escape(clean_text(value)[:XLSX_MAX_CELL])
+    return f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def column_letter(index: int) -> str:
+    """Convert a 0 based column index to Excel's letters, 0 is "A" and 26 is "AA"."""
+    letters = ""
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(ord("A") + rem) + letters
+    return letters
+
+
+# ----------------------------------------------------------------------------------
+def bundle_path(path: Path, name: str) -> Path:
+    """Get the file for one sheet of a bundle, like "report.detail.csv"."""
+    return path.with_name(f"{path.stem}.{name}{path.suffix}")
+
+
+def write_bundle(path: Path, sheets: dict[str, Sheet]) -> None:
+    for name, sheet in sheets.items():
+        sheet_path = bundle_path(path, name)
+        columns, rows = sheet_rows(sheet)
+        if table_io.is_parquet(sheet_path):
+            write_parquet_sheet(sheet_path, columns, rows)
+        else:
+            with sheet_path.open("w", newline="") as out:
+                writer = csv.writer(out)
+                writer.writerow(columns)
+                writer.writerows([("" if is_empty(v) else v) for v in r] for r in rows)
+
+
+def write_parquet_sheet(path: Path, columns: list[str], rows: Iterator[list]) -> None:
+    """Sheets have mixed types in a column, so all values are strings."""
+    with table_io.ChunkWriter(path) as writer:
+        batch = []
+        for row in rows:
+            batch.append(["" if is_empty(v) else str(v) for v in row])
+            if len(batch) >= ROW_BATCH:
+                writer.write(pd.DataFrame(batch, columns=columns))
+                batch = []
+        if batch or not writer.columns:
+            writer.write(pd.DataFrame(batch, columns=columns))
@@ -0,0 +1,184 @@
+"""
+Compare models on a sample of the images instead of all of them.
+
+Most of the time I only need to know whether one model beats another on a field, and
+scoring all 50k images to find that out takes hours. So I score a stratified random
+sample of the images and report every column's mean score with a bootstrap confidence
+interval. In sequential mode I keep adding to the sample until the intervals tell me
+something, either one model is clearly best, or the models are too close to matter.
+
+The sample is stratified by the institution prefix of the image name or by how many
+fields the expected record has filled in. That keeps a sample from being all easy
+labels from one herbarium.
+"""
+
+import re
+from collections import defaultdict
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+from llama.pylib import report_writer
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+STRATIFY_BY = ["institution", "filled"]
+
+# Records are put into about this many bins by how many fields they have filled in
+FILLED_BINS = 4
+
+CONFIDENCE_COLUMNS = ["file", "column", "count", "mean", "low", "high"]
+
+
+def institution(source: str) -> str:
+    """Get the institution code at the front of an image name, like TEX00012345.jpg."""
+    match = re.match(r"[A-Za-z]+", Path(source).stem)
+    return match.group().upper() if match else ""
+
+
+def stratify(expects: list[dict], by: str) -> list[str]:
+    """Put every expected record, gold or GBIF, into a stratum."""
+    if by == "institution":
+        return [institution(e["source"]) for e in expects]
+
+    filled = [
+        sum(1 for k, v in e.items() if k != "source" and not report_writer.is_empty(v))
+        for e in expects
+    ]
+    if not filled:
+        return []
+    bins = pd.qcut(filled, FILLED_BINS, labels=False, duplicates="drop")
+    return [f"filled {b}" for b in bins]
+
+
+def stratum_members(strata: list[str]) -> dict[str, list[int]]:
+    members = defaultdict(list)
+    for i, stratum in enumerate(strata):
+        members[stratum].append(i)
+    return members
+
+
+def stratified_order(strata: list[str], seed: int | None = None) -> list[int]:
+    """
+    Shuffle the records so that the front of the order is always a stratified sample.
+
+    Each stratum is shuffled and spread evenly over the order, so the first n records
+    have about the same share of each stratum as the whole set. Growing the sample is
+    then just taking more of the order.
+    """
+    rng = np.random.default_rng(seed)
+    keys = np.empty(len(strata))
+    for members in stratum_members(strata).values():
+        members = rng.permutation(members)
+        keys[members] = (np.arange(len(members)) + rng.random()) / len(members)
+    return np.argsort(keys, kind="stable").tolist()
+
+
+def batches(order: list[int], size: int, *, sequential: bool) -> Iterator[list[int]]:
+    """Yield the first sample, and in sequential mode, each addition to it."""
+    size = max(1, size)
+    yield order[:size]
+    if sequential:
+        for i in range(size, len(order), size):
+            yield order[i : i + size]
+
+
+def bootstrap(
+    values: np.ndarray,
+    strata: list[str],
+    *,
+    resamples: int = 1000,
+    confidence: float = 0.95,
+    seed: int | None = None,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Get the mean of every column of values with a bootstrap confidence interval.
+
+    The values are a records x columns array, NaNs are cells that aren't scored and
+    are left out of the means. Records are resampled within their strata. A resample is
+    a count of how many times each record is drawn, so all of the resamples are a
+    matrix product instead of copies of the values.
+    """
+    rng = np.random.default_rng(seed)
+    scored = ~np.isnan(values)
+    zeroed = np.where(scored, values, 0.0)
+
+    sums = np.zeros((resamples, values.shape[1]))
+    counts = np.zeros((resamples, values.shape[1]))
+    for members in stratum_members(strata).values():
+        draws = rng.multinomial(
+            len(members), np.full(len(members), 1 / len(members)), size=resamples
+        )
+        sums += draws @ zeroed[members]
+        counts += draws @ scored[members]
+
+    total = scored.sum(axis=0)
+    mean = np.full(values.shape[1], np.nan)
+    low = np.full(values.shape[1], np.nan)
+    high = np.full(values.shape[1], np.nan)
+
+    has = total > 0
+    mean[has] = zeroed[:, has].sum(axis=0) / total[has]
+
+    # A resample may miss every scored cell of a sparse column
+    with np.errstate(divide="ignore", invalid="ignore"):
+        means = sums[:, has] / counts[:, has]
+    tail = (1.0 - confidence) / 2.0
+    low[has], high[has] = np.nanquantile(means, [tail, 1.0 - tail], axis=0)
+
+    return mean, low, high
+
+
+def confidence_table(
+    scores: pd.DataFrame,
+    strata: list[str],
+    *,
+    resamples: int = 1000,
+    confidence: float = 0.95,
+    seed: int | None = None,
+) -> pd.DataFrame:
+    """
+    Get the mean score and confidence interval for every file and column.
+
+    The scores have a row per record and a (file, column) multi-index for the columns.
+    """
+    values = scores.to_numpy(dtype=np.float64)
+    mean, low, high = bootstrap(
+        values, strata, resamples=resamples, confidence=confidence, seed=seed
+    )
+    return pd.DataFrame(
+        {
+            "file": [str(f) for f, _ in scores.columns],
+            "column": [str(c) for _, c in scores.columns],
+            "count": (~np.isnan(values)).sum(axis=0),
+            "mean": mean,
+            "low": low,
+            "high": high,
+        },
+        columns=CONFIDENCE_COLUMNS,
+    )
+
+
+def settled(table: pd.DataFrame, width: float) -> bool:
+    """
+    Check if the confidence intervals tell us what we want to know for every column.
+
+    A column is settled when the best file's interval is above every other file's, or
+    when all of its intervals are narrower than the width, then the files are too
+    close to tell apart.
+    """
+    for _, column in table.groupby("column", sort=False):
+        column = column.dropna(subset=["mean"])
+        if column.empty:
+            continue
+        best = column["mean"].idxmax()
+        others = column.drop(index=best)
+        if not others.empty and column.loc[best, "low"] > others["high"].max():
+            continue
+        if (column["high"] - column["low"]).max() <= width:
+            continue
+        return False
+    return True
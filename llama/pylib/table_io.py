@@ -0,0 +1,390 @@
+"""
+Read and write record tables a chunk at a time.
+
+A run over a whole collection can have hundreds of thousands of records and the OCR
+text in every one of them. Reading a chunk of records, processing it, and appending it
+to the output keeps memory use flat no matter how big the run is.
+
+Tables are CSV files unless the file name ends in ".parquet" for a Parquet file or
+".arrows" for an Arrow IPC stream. Those are typed tables, see record_schema, and are
+compressed with zstd. They are memory mapped when they are read and only the columns
+asked for are read. Readers get strings, the same as they would from a CSV file, use
+read_arrow to get the typed values.
+
+A typed table can't be appended to, so RowWriter appends records to hidden part files
+next to it, see part_paths. Until the parts are compacted into the table they are
+read as if they were part of it.
+"""
+
+import contextlib
+import csv
+from typing import TYPE_CHECKING, Any, Self
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from llama.pylib import record_schema
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from pathlib import Path
+    from types import TracebackType
+
+PARQUET = ".parquet"
+ARROW = ".arrows"
+
+COMPRESSION = "zstd"
+
+# What pandas reads as a missing value, so Arrow reads CSV files the same way
+CSV_NULLS = [
+    "",
+    "#N/A",
+    "#N/A N/A",
+    "#NA",
+    "-1.#IND",
+    "-1.#QNAN",
+    "-NaN",
+    "-nan",
+    "1.#IND",
+    "1.#QNAN",
+    "<NA>",
+    "N/A",
+    "NA",
+    "NULL",
+    "NaN",
+    "None",
+    "n/a",
+    "nan",
+    "null",
+]
+
+
+def is_parquet(path: Path) -> bool:
+    return path.suffix.lower() == PARQUET
+
+
+def is_arrow(path: Path) -> bool:
+    return path.suffix.lower() == ARROW
+
+
+def is_typed(path: Path) -> bool:
+    return is_parquet(path) or is_arrow(path)
+
+
+def exists(path: Path, min_size: int = 0) -> bool:
+    """
+    Check if there is a table to append to.
+
+    A typed table exists if it or any of its parts do. A CSV file must be at least the
+    minimum size, so a file with only a header doesn't count.
+    """
+    if is_typed(path):
+        return path.exists() or bool(part_paths(path))
+    return path.exists() and path.stat().st_size >= min_size
+
+
+def part_paths(path: Path) -> list[Path]:
+    """
+    Get the part files of a typed table, oldest first.
+
+    Parts are Arrow IPC streams that RowWriter appends to and flushes after every
+    record. They are compacted into the table when the writer closes, so parts are only
+    left behind when a run dies.
+    """
+    if not is_typed(path):
+        return []
+    return sorted(path.parent.glob(f".{path.name}.part-*{ARROW}"))
+
+
+def read_column_names(path: Path) -> list[str]:
+    """Get a table's column names without reading its records."""
+    if not is_typed(path):
+        return pd.read_csv(path, nrows=0).columns.tolist()
+
+    schemas = [read_schema(path)] if path.exists() else []
+    schemas += [s for p in part_paths(path) if (s := read_schema(p))]
+    if not schemas:
+        raise FileNotFoundError(path)
+    names = {}
+    for schema in schemas:
+        names |= dict.fromkeys(schema.names)
+    return list(names)
+
+
+def read_schema(path: Path) -> pa.Schema | None:
+    """Read a typed file's schema, a part that was never written to has none."""
+    if is_parquet(path):
+        return pq.read_schema(path, memory_map=True)
+    with pa.memory_map(str(path)) as source:
+        try:
+            return pa.ipc.open_stream(source).schema
+        except OSError, pa.ArrowInvalid:
+            return None
+
+
+def read_arrow(path: Path, columns: list[str] | None = None) -> pa.Table:
+    """
+    Read a table with only the given columns, or all of them.
+
+    A CSV file has string columns and its missing values are nulls. A typed table
+    includes the records in its parts.
+    """
+    if not is_typed(path):
+        return read_csv_arrow(path, columns)
+
+    parts = part_paths(path)
+    tables = [read_typed(path, columns)] if path.exists() or not parts else []
+    tables += [t for p in parts if (t := read_part(p, columns)) is not None]
+    if len(tables) == 1:
+        return tables[0]
+    table = pa.concat_tables(tables, promote_options="permissive")
+    return table.select(columns) if columns else table
+
+
+def read_typed(path: Path, columns: list[str] | None = None) -> pa.Table:
+    if is_parquet(path):
+        return pq.read_table(path, columns=columns, memory_map=True)
+    with pa.memory_map(str(path)) as source:
+        table = pa.ipc.open_stream(source).read_all()
+    return table.select(columns) if columns else table
+
+
+def read_part(path: Path, columns: list[str] | None = None) -> pa.Table | None:
+    """
+    Read every whole record batch in a part.
+
+    A run that was killed may leave a part that ends in the middle of a batch, or one
+    with no schema at all.
+    """
+    batches = []
+    with pa.memory_map(str(path)) as source:
+        try:
+            reader = pa.ipc.open_stream(source)
+        except OSError, pa.ArrowInvalid:
+            return None
+        with contextlib.suppress(OSError, pa.ArrowInvalid):
+            batches.extend(reader)
+        table = pa.Table.from_batches(batches, schema=reader.schema)
+    if columns:
+        table = table.select([c for c in columns if c in table.column_names])
+    return table
+
+
+def read_csv_arrow(path: Path, columns: list[str] | None = None) -> pa.Table:
+    columns = columns or read_column_names(path)
+    return pa_csv.read_csv(
+        path,
+        parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+        convert_options=pa_csv.ConvertOptions(
+            column_types=dict.fromkeys(columns, pa.string()),
+            include_columns=columns,
+            null_values=CSV_NULLS,
+            strings_can_be_null=True,
+        ),
+    )
+
+
+def read_table(path: Path, columns: list[str] | None = None) -> pd.DataFrame:
+    """Read the table as strings with empty strings for missing values."""
+    if is_typed(path):
+        return record_schema.to_strings(read_arrow(path, columns))
+    df = pd.read_csv(path, dtype=str, usecols=columns).fillna("")
+    return df[columns] if columns else df
+
+
+def read_chunks(
+    path: Path, chunk_size: int | None = None, columns: list[str] | None = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Read a table in chunks of records, all values are strings.
+
+    With no chunk size the whole table is a single chunk.
+    """
+    if not chunk_size:
+        yield read_table(path, columns)
+        return
+
+    if is_parquet(path) and not part_paths(path):
+        file = pq.ParquetFile(path, memory_map=True)
+        for batch in file.iter_batches(batch_size=chunk_size, columns=columns):
+            yield record_schema.to_strings(pa.Table.from_batches([batch]))
+    elif is_typed(path):
+        table = read_arrow(path, columns)
+        for batch in table.to_batches(max_chunksize=chunk_size):
+            yield record_schema.to_strings(pa.Table.from_batches([batch]))
+    else:
+        with pd.read_csv(
+            path, dtype=str, chunksize=chunk_size, usecols=columns
+        ) as reader:
+            for df in reader:
+                df = df.fillna("")
+                yield df[columns] if columns else df
+
+
+def write_table(
+    path: Path, df: pd.DataFrame, types: dict[str, pa.DataType] | None = None
+) -> None:
+    """Write a whole table, the types are for typed tables."""
+    with ChunkWriter(path, types) as writer:
+        writer.write(df)
+
+
+def write_arrow(path: Path, table: pa.Table) -> None:
+    """Write an Arrow table to a typed table."""
+    table = table.unify_dictionaries().combine_chunks()
+    if is_parquet(path):
+        pq.write_table(table, path, compression=COMPRESSION)
+    else:
+        options = pa.ipc.IpcWriteOptions(compression=COMPRESSION)
+        with pa.ipc.new_stream(str(path), table.schema, options=options) as writer:
+            writer.write_table(table)
+
+
+def compact(path: Path) -> None:
+    """
+    Fold the parts of a typed table into it.
+
+    The parts are only removed after the new table replaces the old one. If the run
+    dies in between, the records are in both and readers keep the last one.
+    """
+    parts = part_paths(path)
+    if not parts:
+        return
+    temp_path = path.with_name(f".{path.stem}.partial{path.suffix}")
+    write_arrow(temp_path, read_arrow(path))
+    temp_path.replace(path)
+    remove_parts(path)
+
+
+def remove_parts(path: Path) -> None:
+    for part in part_paths(path):
+        part.unlink()
+
+
+class ChunkWriter:
+    """
+    Append chunks of records to a table, the first chunk sets the columns.
+
+    Typed tables get their column types from the types, and columns without one are
+    strings.
+    """
+
+    def __init__(self, path: Path, types: dict[str, pa.DataType] | None = None) -> None:
+        self.path = path
+        self.types = types
+        self.columns: list[str] = []
+        self.schema: pa.Schema | None = None
+        self.typed_writer: pq.ParquetWriter | pa.RecordBatchStreamWriter | None = None
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def write(self, df: pd.DataFrame) -> None:
+        first = not self.columns
+        if first:
+            self.columns = df.columns.tolist()
+        df = df[self.columns]
+
+        if is_typed(self.path):
+            if first:
+                self.open_typed()
+            table = record_schema.to_arrow(df, self.schema)
+            self.typed_writer.write_table(table)
+        else:
+            df.to_csv(self.path, mode="w" if first else "a", header=first, index=False)
+
+    def open_typed(self) -> None:
+        self.schema = record_schema.build_schema(self.columns, self.types)
+        if is_parquet(self.path):
+            self.typed_writer = pq.ParquetWriter(
+                self.path, self.schema, compression=COMPRESSION
+            )
+        else:
+            options = pa.ipc.IpcWriteOptions(compression=COMPRESSION)
+            self.typed_writer = pa.ipc.new_stream(
+                str(self.path), self.schema, options=options
+            )
+
+    def close(self) -> None:
+        if self.typed_writer:
+            self.typed_writer.close()
+            self.typed_writer = None
+            # The whole table was rewritten
+            remove_parts(self.path)
+        elif not self.columns and not is_typed(self.path):
+            # There were no chunks at all
+            self.path.write_text("")
+
+
+class RowWriter:
+    """
+    Write records one at a time as they come back from the model, like a DictWriter.
+
+    Every record is flushed as soon as it is written, so nothing that was paid for is
+    lost if the run dies. A CSV file is appended to. A typed table can't be appended
+    to, so the records go to a new part file, an Arrow IPC stream with a batch per
+    record. Readers see the records in the parts, so a resumed run skips them. When
+    the writer closes the parts are compacted into the table.
+    """
+
+    def __init__(self, path: Path, columns: list[str], *, append: bool) -> None:
+        self.path = path
+        self.columns = columns
+
+        if is_typed(path):
+            if not append:
+                path.unlink(missing_ok=True)
+                remove_parts(path)
+            parts = part_paths(path)
+            number = int(parts[-1].stem.rsplit("-", 1)[-1]) + 1 if parts else 0
+            self.part_path = path.with_name(f".{path.name}.part-{number:05d}{ARROW}")
+            self.schema = record_schema.build_schema(columns)
+            self.sink = pa.OSFile(str(self.part_path), "wb")
+            options = pa.ipc.IpcWriteOptions(compression=COMPRESSION)
+            self.typed_writer = pa.ipc.new_stream(
+                self.sink, self.schema, options=options
+            )
+            self.sink.flush()
+        else:
+            self.file = path.open("a" if append else "w")
+            self.csv_writer = csv.DictWriter(self.file, columns, extrasaction="ignore")
+            if not append:
+                self.csv_writer.writeheader()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def write(self, row: dict[str, Any]) -> None:
+        if is_typed(self.path):
+            df = pd.DataFrame([{c: row.get(c, "") for c in self.columns}])
+            self.typed_writer.write_table(record_schema.to_arrow(df, self.schema))
+            self.sink.flush()
+        else:
+            self.csv_writer.writerow(row)
+            self.file.flush()
+
+    def close(self) -> None:
+        if is_typed(self.path):
+            self.typed_writer.close()
+            self.sink.close()
+            compact(self.path)
+        else:
+            self.file.close()
@@ -0,0 +1,76 @@
+"""
+Find field values in a record's OCR text.
+
+The cleaners blank a value that isn't in the OCR text, because then the model made it
+up. That was a new case insensitive regex search of the text for every value, so a
+record's text was scanned once for every field. A text index folds the case of the
+text once, and every field for that record asks it where a value is. Folding keeps the
+text the same length, so the spans point at the original text.
+
+Indexes are cached by their text, so all of the fields in a chunk of records share one
+index per record as long as the chunk is no bigger than the cache.
+"""
+
+from functools import lru_cache
+
+from rapidfuzz import fuzz
+
+CACHE_SIZE = 8_192
+
+# How close a fuzzy match must be, from 0 to 100
+MIN_FUZZY_SCORE = 90.0
+
+
+class TextIndex:
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.folded = fold(text)
+
+    def contains(self, value: str) -> bool:
+        """Is the value anywhere in the text, ignoring case."""
+        return fold(value) in self.folded
+
+    def find(self, value: str) -> list[tuple[int, int]]:
+        """Get the start and end of every place the value is in the text."""
+        value = fold(value)
+        if not value:
+            return []
+        spans = []
+        start = self.folded.find(value)
+        while start >= 0:
+            spans.append((start, start + len(value)))
+            start = self.folded.find(value, start + len(value))
+        return spans
+
+    def fuzzy(
+        self, value: str, min_score: float = MIN_FUZZY_SCORE
+    ) -> tuple[tuple[int, int] | None, float]:
+        """
+        Get the part of the text that best matches the value and a score from 0 to 100.
+
+        OCR errors mean that a value can be right but not exactly in the text. The span
+        is None if nothing matches well enough.
+        """
+        value = fold(value)
+        if spans := self.find(value):
+            return spans[0], 100.0
+        if not value or not self.folded:
+            return None, 0.0
+        best = fuzz.partial_ratio_alignment(value, self.folded, score_cutoff=min_score)
+        if not best:
+            return None, 0.0
+        return (best.dest_start, best.dest_end), best.score
+
+
+def fold(text: str) -> str:
+    """Lower case the text without changing its length, so the spans still line up."""
+    folded = text.lower()
+    if len(folded) == len(text):
+        return folded
+    # A few characters, like "İ", get longer so leave them as they are
+    return "".join(c if len(low := c.lower()) != 1 else low for c in text)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def index(text: str) -> TextIndex:
+    return TextIndex(text)
@@ -1,40 +1,57 @@
 from pathlib import Path
 
-import pandas as pd
-
 from llama.pylib import fix_parses
+from llama.vocab import lazy_vocab
 
 COUNTRY_CSV: Path = Path(__file__).parent / "terms" / "countries.csv"
 USA_CSV: Path = Path(__file__).parent / "terms" / "us_locations.csv"
 CA_CSV: Path = Path(__file__).parent / "terms" / "ca_provinces.csv"
 
+
 # -----------------------------------------------------------------------
-COUNTRY_ROWS = pd.read_csv(COUNTRY_CSV).to_dict(orient="records")
-COUNTRY: dict[str, str] = {
-    r["country"].lower(): fix_parses.title_with_exceptions(r["country"])
-    for r in COUNTRY_ROWS
-}
+def build_country() -> dict[str, str]:
+    return {
+        r["country"].lower(): fix_parses.title_with_exceptions(r["country"])
+        for r in lazy_vocab.read_rows(COUNTRY_CSV)
+    }
+
+
+COUNTRY = lazy_vocab.LazyVocab("country", [COUNTRY_CSV], build_country)
+
 
 # -----------------------------------------------------------------------
-USA_ROWS = pd.read_csv(USA_CSV).to_dict(orient="records")
+def build_usa() -> dict[str, str]:
+    return {
+        r["pattern"]: r["replace"]
+        for r in lazy_vocab.read_rows(USA_CSV)
+        if r["label"] == "country"
+    }
 
-USA: dict[str, str] = {
-    r["pattern"]: r["replace"] for r in USA_ROWS if r["label"] == "country"
-}
 
-US_STATE: dict[str, str] = {
-    r["pattern"].lower(): r["replace"]
-    for r in USA_ROWS
-    if r["label"] in ("us_state", "us_state-us_county")
-}
+def build_us_state() -> dict[str, str]:
+    return {
+        r["pattern"].lower(): r["replace"]
+        for r in lazy_vocab.read_rows(USA_CSV)
+        if r["label"] in ("us_state", "us_state-us_county")
+    }
+
+
+def build_us_county() -> dict[str, str]:
+    return {
+        r["pattern"].lower(): r["pattern"].title()
+        for r in lazy_vocab.read_rows(USA_CSV)
+        if r["label"] in ("us_county", "us_state-us_county")
+    }
+
+
+USA = lazy_vocab.LazyVocab("usa", [USA_CSV], build_usa)
+US_STATE = lazy_vocab.LazyVocab("us_state", [USA_CSV], build_us_state)
+US_COUNTY = lazy_vocab.LazyVocab("us_county", [USA_CSV], build_us_county)
 
-US_COUNTY = {
-    r["pattern"].lower(): r["pattern"].title()
-    for r in USA_ROWS
-    if r["label"] in ("us_county", "us_state-us_county")
-}
 
 # -----------------------------------------------------------------------
-CA_ROWS = pd.read_csv(CA_CSV).to_dict(orient="records")
+def build_ca_province() -> dict[str, str]:
+    return {r["province"]: r["replace"] for r in lazy_vocab.read_rows(CA_CSV)}
+
 
-CA_PROVINCE: dict[str, str] = {r["province"]: r["replace"] for r in CA_ROWS}
+CA_PROVINCE = lazy_vocab.LazyVocab("ca_province", [CA_CSV], build_ca_province)
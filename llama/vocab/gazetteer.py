@@ -0,0 +1,165 @@
+"""
+Find every country, state, province, and county mentioned in a text in one pass.
+
+The administrative unit vocabularies only look up whole values, so cleaning a locality
+meant running a regular expression for every name that might be in it. I compile all
+of the names into an Aho-Corasick automaton instead. It walks the text once, no matter
+how many names there are, and reports every name it passes along with its canonical
+form, "Calif." is "California".
+
+Names only match whole words. Names like "CA" or "OR" from the "text" vocabulary rows
+must match their case exactly, otherwise "or" would be Oregon. Everything else ignores
+case.
+"""
+
+from collections import deque
+from dataclasses import dataclass
+from functools import cache
+from typing import TYPE_CHECKING
+
+from llama.pylib import text_index
+from llama.vocab import administrative_unit, lazy_vocab
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+
+@dataclass(frozen=True)
+class Term:
+    pattern: str
+    label: str
+    replace: str
+    match_case: bool = False
+
+
+@dataclass(frozen=True)
+class Mention:
+    start: int
+    end: int
+    text: str
+    label: str
+    replace: str
+
+
+class Gazetteer:
+    """An Aho-Corasick automaton over the lower case patterns."""
+
+    def __init__(self, terms: Iterable[Term]) -> None:
+        # State 0 is the root, every state has its transitions, failure link, and
+        # the terms that end there
+        self.goto: list[dict[str, int]] = [{}]
+        self.fail: list[int] = [0]
+        self.output: list[list[Term]] = [[]]
+
+        for term in terms:
+            self.add(term)
+        self.link()
+
+    def add(self, term: Term) -> None:
+        state = 0
+        for char in text_index.fold(term.pattern):
+            if char not in self.goto[state]:
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+                self.goto[state][char] = len(self.goto) - 1
+            state = self.goto[state][char]
+        self.output[state].append(term)
+
+    def link(self) -> None:
+        """Add the failure links breadth first, so shorter prefixes are done first."""
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_ in self.goto[state].items():
+                queue.append(next_)
+                fail = self.fail[state]
+                while fail and char not in self.goto[fail]:
+                    fail = self.fail[fail]
+                self.fail[next_] = self.goto[fail].get(char, 0)
+                # A state also ends every term its failure state ends
+                self.output[next_] += self.output[self.fail[next_]]
+
+    def find_all(self, text: str) -> list[Mention]:
+        """Get every mention in the text, they may overlap."""
+        mentions = []
+        state = 0
+        for i, char in enumerate(text_index.fold(text)):
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            for term in self.output[state]:
+                start, end = i + 1 - len(term.pattern), i + 1
+                found = text[start:end]
+                if term.match_case and found != term.pattern:
+                    continue
+                if not is_whole_word(text, start, end):
+                    continue
+                mentions.append(Mention(start, end, found, term.label, term.replace))
+        return mentions
+
+    def find(self, text: str, labels: Iterable[str] | None = None) -> list[Mention]:
+        """
+        Get the mentions that don't overlap, the longest one wins.
+
+        A mention can have several labels, "Delaware" is a state and a county, so one
+        mention per label is kept for each span.
+        """
+        labels = set(labels) if labels else None
+        mentions = [m for m in self.find_all(text) if not labels or m.label in labels]
+        mentions.sort(key=lambda m: (m.start, -m.end))
+
+        kept = []
+        span_labels = set()
+        for mention in mentions:
+            if kept and (mention.start, mention.end) == (kept[-1].start, kept[-1].end):
+                if mention.label in span_labels:
+                    continue
+            elif kept and mention.start < kept[-1].end:
+                continue
+            else:
+                span_labels = set()
+            span_labels.add(mention.label)
+            kept.append(mention)
+        return kept
+
+
+def strip(text: str, mentions: Iterable[Mention]) -> str:
+    """Remove the mentions from the text, they must not overlap like from find()."""
+    for start, end in sorted({(m.start, m.end) for m in mentions}, reverse=True):
+        text = text[:start] + text[end:]
+    return text
+
+
+def is_whole_word(text: str, start: int, end: int) -> bool:
+    """Word characters at the ends of the mention can't continue into the text."""
+    before = start > 0 and text[start].isalnum() and text[start - 1].isalnum()
+    after = end < len(text) and text[end - 1].isalnum() and text[end].isalnum()
+    return not before and not after
+
+
+# -----------------------------------------------------------------------
+def build_terms() -> list[Term]:
+    terms = [
+        Term(country, "country", replace)
+        for country, replace in administrative_unit.COUNTRY.items()
+    ]
+
+    for row in lazy_vocab.read_rows(administrative_unit.USA_CSV):
+        match_case = row["attr"] == "text"
+        pattern = row["pattern"]
+        for label in row["label"].split("-"):
+            replace = pattern.title() if label == "us_county" else row["replace"]
+            terms.append(Term(pattern, label, replace, match_case))
+
+    for province, replace in administrative_unit.CA_PROVINCE.items():
+        match_case = province.isupper()
+        terms.append(Term(province, "ca_province", replace, match_case))
+
+    return terms
+
+
+@cache
+def admin_units() -> Gazetteer:
+    """All of the administrative units, built the first time it's used."""
+    return Gazetteer(build_terms())
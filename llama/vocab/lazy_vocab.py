@@ -0,0 +1,107 @@
+"""
+Vocabulary tables that are only built when they are first used.
+
+The vocabularies are built from the CSV files in the terms directory. The genus to
+family table alone has 41k rows, and every short script or test run that imported a
+field module paid to read it, and to import pandas to read it, even if it never looked
+up a genus. So a vocabulary is now a mapping that builds itself the first time it is
+used.
+
+A built table is pickled into the cache directory so later runs don't parse the CSV
+files at all. The pickle is rebuilt when the checksum of its CSV files, or of the
+module that builds it, changes. If the cache directory can't be written to, the table
+is just built every time.
+"""
+
+import contextlib
+import csv
+import hashlib
+import os
+import pickle
+from collections.abc import Callable, Iterator, Mapping
+from pathlib import Path
+
+TERMS_DIR: Path = Path(__file__).parent / "terms"
+CACHE_DIR: Path = TERMS_DIR / "cache"
+
+
+def read_rows(path: Path) -> list[dict[str, str]]:
+    """Read a terms CSV file, missing values are empty strings."""
+    with path.open(newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def checksum(paths: list[Path]) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    for path in paths:
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def load(
+    name: str, paths: list[Path], build: Callable[[], dict], cache_dir: Path
+) -> dict:
+    """Get a table from the cache or build it and cache it."""
+    # The table changes when the CSV files or the code that builds it changes
+    digest = checksum([*paths, Path(build.__code__.co_filename)])
+    cache = cache_dir / f"{name}.pickle"
+
+    with contextlib.suppress(OSError, EOFError, pickle.UnpicklingError):
+        with cache.open("rb") as f:
+            saved = pickle.load(f)  # noqa: S301
+        if saved.get("checksum") == digest:
+            return saved["table"]
+
+    table = build()
+
+    # Write to a temporary file first so parallel runs never see half a pickle
+    with contextlib.suppress(OSError):
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        temp = cache.with_name(f".{cache.name}.{os.getpid()}")
+        with temp.open("wb") as f:
+            pickle.dump({"checksum": digest, "table": table}, f)
+        temp.replace(cache)
+
+    return table
+
+
+class LazyVocab(Mapping[str, str]):
+    """A read-only dict that is built from the terms CSV files when first used."""
+
+    def __init__(
+        self,
+        name: str,
+        paths: list[Path],
+        build: Callable[[], dict[str, str]],
+        cache_dir: Path = CACHE_DIR,
+    ) -> None:
+        self.name = name
+        self.paths = paths
+        self.build = build
+        self.cache_dir = cache_dir
+        self._table: dict[str, str] | None = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._table is not None
+
+    @property
+    def table(self) -> dict[str, str]:
+        if self._table is None:
+            self._table = load(self.name, self.paths, self.build, self.cache_dir)
+        return self._table
+
+    def __getitem__(self, key: str) -> str:
+        return self.table[key]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.table
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.table)
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def get(self, key: str, default: str | None = None) -> str | None:
+        return self.table.get(key, default)
@@ -1,8 +1,101 @@
+"""
+Genus and family names.
+
+OCR often mangles a letter or two of the genus in a scientific name, "Quercns" for
+"Quercus", and an exact lookup then misses the family. The genus index finds the
+closest known genus within a few edits. It only compares genera with the same first
+letter and about the same length, which keeps a lookup well under a millisecond.
+"""
+
+from collections import defaultdict
+from functools import cache, lru_cache
 from pathlib import Path
 
-import pandas as pd
+from rapidfuzz import process
+from rapidfuzz.distance import Levenshtein
+
+from llama.vocab import lazy_vocab
 
 TAXA_CSV: Path = Path(__file__).parent / "terms" / "genus_to_family.csv"
-TAXA_ROWS = pd.read_csv(TAXA_CSV).to_dict(orient="records")
 
-GENUS_TO_FAMILY: dict[str, str] = {r["genus"]: r["family"] for r in TAXA_ROWS}
+# The most edits allowed between a genus and the closest known genus
+MAX_DISTANCE = 2
+
+# Allow one edit for every this many letters so short names don't match everything
+LETTERS_PER_EDIT = 4
+
+CACHE_SIZE = 65_536
+
+
+def build_genus_to_family() -> dict[str, str]:
+    return {r["genus"]: r["family"] for r in lazy_vocab.read_rows(TAXA_CSV)}
+
+
+GENUS_TO_FAMILY = lazy_vocab.LazyVocab(
+    "genus_to_family", [TAXA_CSV], build_genus_to_family
+)
+
+
+class GenusIndex:
+    """Find the closest known genus to a misspelled one."""
+
+    def __init__(self, genera: list[str]) -> None:
+        # Blocks of lower case genera by their first letter and length
+        self.blocks: dict[tuple[str, int], list[str]] = defaultdict(list)
+        self.names: dict[str, str] = {}
+        for genus in genera:
+            lower = genus.lower()
+            self.names[lower] = genus
+            self.blocks[lower[0], len(lower)].append(lower)
+
+    def closest(
+        self, genus: str, max_distance: int = MAX_DISTANCE
+    ) -> tuple[str, float]:
+        """
+        Get the closest genus and a score from 0 to 1 for how close it is.
+
+        Return an empty genus and a score of 0 if there is nothing close enough.
+        """
+        lower = genus.lower()
+        if not lower:
+            return "", 0.0
+        if lower in self.names:
+            return self.names[lower], 1.0
+
+        max_distance = min(max_distance, len(lower) // LETTERS_PER_EDIT)
+        if max_distance < 1:
+            return "", 0.0
+
+        candidates = [
+            name
+            for size in range(len(lower) - max_distance, len(lower) + max_distance + 1)
+            for name in self.blocks.get((lower[0], size), [])
+        ]
+        best = process.extractOne(
+            lower,
+            candidates,
+            scorer=Levenshtein.distance,
+            score_cutoff=max_distance,
+        )
+        if not best:
+            return "", 0.0
+
+        name, distance, _ = best
+        return self.names[name], 1.0 - distance / max(len(lower), len(name))
+
+
+@cache
+def genus_index() -> GenusIndex:
+    return GenusIndex(list(GENUS_TO_FAMILY))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def closest_genus(genus: str, max_distance: int = MAX_DISTANCE) -> tuple[str, float]:
+    """Get the closest known genus and its score, the same names come up a lot."""
+    return genus_index().closest(genus, max_distance)
+
+
+def genus_to_family(genus: str, max_distance: int = MAX_DISTANCE) -> str:
+    """Get the family for a genus even when it is misspelled."""
+    genus, _ = closest_genus(genus, max_distance)
+    return GENUS_TO_FAMILY.get(genus, "")
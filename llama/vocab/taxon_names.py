@@ -0,0 +1,216 @@
+"""
+Look up plant names in the local taxon name database.
+
+The database is built by util_get_plant_taxa from ITIS and WCVP downloads. It has every
+accepted name and synonym with its authors and family, so the taxon cleaners can check
+and fix names at full speed without calling a remote service. The database is too big
+to keep in the repository, so when it hasn't been built every lookup finds nothing and
+the cleaners leave the names as they are.
+
+There are three kinds of lookups:
+- exact: The whole name, ignoring case.
+- prefix: Names that start with the words given, the last word may be partial.
+- fuzzy: The closest name to a misspelled one. The genus is found with the genus
+  index, and then the epithet is matched against the names in that genus.
+- correct: Like fuzzy but only when one name is very close. The cleaners use this,
+  a name that is missing from the database may still be a valid name, and it
+  shouldn't be rewritten into its nearest neighbor.
+
+The same names come up over and over in a collection, so lookups are cached.
+"""
+
+import dataclasses
+import os
+import re
+import sqlite3
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+from rapidfuzz import fuzz, process
+
+from llama.vocab import taxon
+
+NAMES_DB: Path = Path(__file__).parent / "terms" / "taxon_names.sqlite"
+
+COLUMNS = [
+    "scientific_name",
+    "genus",
+    "specific_epithet",
+    "infraspecific_epithet",
+    "authorship",
+    "status",
+    "accepted_name",
+    "family",
+]
+# The column names are constants, none of them come from the user
+SELECT = f"select {', '.join(f'names.{c}' for c in COLUMNS)} from names"  # noqa: S608
+
+CREATE = f"""
+    create table names (
+        name_id integer primary key,
+        {", ".join(f"{c} text" for c in COLUMNS)}
+    );
+    create index names_scientific_name on names (scientific_name collate nocase);
+    create index names_genus on names (genus collate nocase);
+    create virtual table names_fts using fts5(
+        scientific_name, content='names', content_rowid='name_id'
+    );
+    """
+
+PREFIX_LIMIT = 20
+
+# How close a fuzzy match must be, from 0 to 100
+MIN_FUZZY_SCORE = 85.0
+
+# How close a name must be for a cleaner to replace a misspelled one
+MIN_CORRECT_SCORE = 95.0
+
+CACHE_SIZE = 65_536
+
+WORD = re.compile(r"\w+")
+
+
+@dataclass(frozen=True)
+class TaxonName:
+    scientific_name: str
+    genus: str
+    specific_epithet: str
+    infraspecific_epithet: str
+    authorship: str
+    status: str
+    accepted_name: str
+    family: str
+    score: float = 100.0
+
+    @property
+    def is_accepted(self) -> bool:
+        return self.status == "accepted"
+
+
+def create_db(path: Path, names: list[dict[str, str]]) -> None:
+    """Write a fresh name database, util_get_plant_taxa calls this."""
+    path.unlink(missing_ok=True)
+    sql = f"""
+        insert into names ({", ".join(COLUMNS)})
+        values ({", ".join("?" for _ in COLUMNS)})
+        """  # noqa: S608
+    cxn = sqlite3.connect(path)
+    with cxn:
+        cxn.executescript(CREATE)
+        cxn.executemany(sql, ([n.get(c, "") for c in COLUMNS] for n in names))
+        cxn.execute("insert into names_fts (names_fts) values ('rebuild')")
+    cxn.close()
+
+
+# Each process gets its own connection, connections can't cross a fork
+CONNECTIONS: dict[tuple[Path, int], sqlite3.Connection | None] = {}
+
+
+def connect(db_path: Path = NAMES_DB) -> sqlite3.Connection | None:
+    """Open the database read-only, or return None if it hasn't been built."""
+    key = (db_path, os.getpid())
+    if key not in CONNECTIONS:
+        cxn = None
+        if db_path.exists():
+            cxn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+            cxn.row_factory = sqlite3.Row
+        CONNECTIONS[key] = cxn
+    return CONNECTIONS[key]
+
+
+def is_available(db_path: Path = NAMES_DB) -> bool:
+    return connect(db_path) is not None
+
+
+def select(sql: str, params: tuple, db_path: Path) -> list[TaxonName]:
+    cxn = connect(db_path)
+    if cxn is None:
+        return []
+    return [TaxonName(**dict(row)) for row in cxn.execute(sql, params)]
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def exact(name: str, db_path: Path = NAMES_DB) -> tuple[TaxonName, ...]:
+    """Get every entry for a name, there may be several with different authors."""
+    sql = f"{SELECT} where scientific_name = ? collate nocase"
+    return tuple(select(sql, (" ".join(name.split()),), db_path))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def prefix(
+    text: str, limit: int = PREFIX_LIMIT, db_path: Path = NAMES_DB
+) -> tuple[TaxonName, ...]:
+    """Get names starting with the text, like "Quercus al" for "Quercus alba"."""
+    words = WORD.findall(text)
+    if not words:
+        return ()
+
+    # Every word must be in the name and the last one may be partial
+    query = " ".join(f'"{w}"' for w in words) + "*"
+    sql = f"""
+        {SELECT} join names_fts on (names.name_id = names_fts.rowid)
+         where names_fts match ?
+         order by names.scientific_name
+        """
+    start = " ".join(words).lower()
+    names = select(sql, (query,), db_path)
+    names = [n for n in names if n.scientific_name.lower().startswith(start)]
+    return tuple(names[:limit])
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def fuzzy(
+    name: str, min_score: float = MIN_FUZZY_SCORE, db_path: Path = NAMES_DB
+) -> TaxonName | None:
+    """Get the closest name with a score from 0 to 100, or None if none are close."""
+    if found := exact(name, db_path):
+        return accepted_first(found)
+    matches = close_names(name, min_score, db_path)
+    return matches[0] if matches else None
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def correct(
+    name: str, min_score: float = MIN_CORRECT_SCORE, db_path: Path = NAMES_DB
+) -> TaxonName | None:
+    """Get the only name in the genus that is close to a misspelled one, or None."""
+    if found := exact(name, db_path):
+        return accepted_first(found)
+    matches = close_names(name, min_score, db_path)
+    return matches[0] if len(matches) == 1 else None
+
+
+def close_names(name: str, min_score: float, db_path: Path) -> list[TaxonName]:
+    """Get the names in the closest genus that score at least min_score, best first."""
+    words = name.split()
+    if not words or not is_available(db_path):
+        return []
+
+    genus, _ = taxon.closest_genus(words[0])
+    if not genus:
+        return []
+
+    sql = f"{SELECT} where genus = ? collate nocase"
+    candidates = select(sql, (genus,), db_path)
+    names = list(dict.fromkeys(c.scientific_name for c in candidates))
+
+    matches = process.extract(
+        " ".join([genus, *words[1:]]).lower(),
+        [n.lower() for n in names],
+        scorer=fuzz.ratio,
+        score_cutoff=min_score,
+        limit=None,
+    )
+    return [
+        dataclasses.replace(
+            accepted_first([c for c in candidates if c.scientific_name == names[i]]),
+            score=score,
+        )
+        for _, score, i in matches
+    ]
+
+
+def accepted_first(names: tuple[TaxonName, ...] | list[TaxonName]) -> TaxonName:
+    """When a name has several entries prefer the accepted one."""
+    return next((n for n in names if n.is_accepted), names[0])
@@ -10,7 +10,9 @@ with UNITS_CSV.open() as f:
     all_units = list(reader)
 UNITS = {u["pattern"]: u["replace"] for u in all_units}
 
-FACTOR_METER = {u["pattern"]: float(u["factor_cm"]) * 100.0 or 0.0 for u in all_units}
+FACTOR_METER = {
+    u["pattern"]: float(u["factor_cm"]) / 100.0 for u in all_units if u["factor_cm"]
+}
 
 LENGTHS = re.compile(
     r"|".join([r["pattern"] for r in all_units if r["dimension"] == "length"]),
@@ -13,9 +13,13 @@ import textwrap
 from pathlib import Path
 
 from llama.pylib import log
+from llama.vocab import taxon_names
 
 ITIS_SPECIES_ID = 220
 
+# ITIS uses "valid" for accepted animal names and "accepted" for plants
+ITIS_STATUS = {"accepted": "accepted", "valid": "accepted"}
+
 
 def get_taxa(args: argparse.Namespace) -> None:
     log.started(args.log_file, args=args)
@@ -28,6 +32,12 @@ def get_taxa(args: argparse.Namespace) -> None:
 
     write_csv(taxa)
 
+    if args.names_db:
+        names = []
+        names += read_wcvp_names(args.wcvp_file)
+        names += read_itis_names(args.itis_db, taxa)
+        taxon_names.create_db(args.names_db, names)
+
     log.finished()
 
 
@@ -50,6 +60,60 @@ def read_wcvp_taxa(wcvp_file: Path) -> dict[str, str]:
     return taxa
 
 
+def read_wcvp_names(wcvp_file: Path) -> list[dict[str, str]]:
+    with wcvp_file.open() as in_file:
+        rows = list(csv.DictReader(in_file, delimiter="|"))
+
+    ids = {r["plant_name_id"]: r["taxon_name"] for r in rows}
+
+    return [
+        {
+            "scientific_name": row["taxon_name"],
+            "genus": row["genus"],
+            "specific_epithet": row["species"],
+            "infraspecific_epithet": row["infraspecies"],
+            "authorship": row["taxon_authors"],
+            "status": row["taxon_status"].lower(),
+            "accepted_name": ids.get(row["accepted_plant_name_id"], ""),
+            "family": row["family"],
+        }
+        for row in rows
+        if row["species"]
+    ]
+
+
+def read_itis_names(itis_db: Path, taxa: dict[str, str]) -> list[dict[str, str]]:
+    kingdom_id = 3
+
+    sql = """
+        select units.complete_name, units.unit_name1, units.unit_name2,
+               units.unit_name3, units.name_usage, authors.taxon_author,
+               accepted.complete_name as accepted_name
+          from taxonomic_units as units
+          left join taxon_authors_lkp as authors using (taxon_author_id)
+          left join synonym_links as links on (links.tsn = units.tsn)
+          left join taxonomic_units as accepted on (accepted.tsn = links.tsn_accepted)
+         where units.kingdom_id = ? and units.rank_id >= ?
+        """
+    with sqlite3.connect(itis_db) as cxn:
+        cxn.row_factory = sqlite3.Row
+        rows = cxn.execute(sql, (kingdom_id, ITIS_SPECIES_ID)).fetchall()
+
+    return [
+        {
+            "scientific_name": row["complete_name"],
+            "genus": row["unit_name1"],
+            "specific_epithet": row["unit_name2"] or "",
+            "infraspecific_epithet": row["unit_name3"] or "",
+            "authorship": row["taxon_author"] or "",
+            "status": ITIS_STATUS.get(row["name_usage"], "synonym"),
+            "accepted_name": row["accepted_name"] or "",
+            "family": taxa.get(row["unit_name1"], ""),
+        }
+        for row in rows
+    ]
+
+
 def read_itis_taxa(itis_db: Path) -> dict[str, str]:
     taxa = {}
 
@@ -85,7 +149,9 @@ def read_itis_taxa(itis_db: Path) -> dict[str, str]:
 def parse_args() -> argparse.Namespace:
     arg_parser = argparse.ArgumentParser(
         allow_abbrev=True,
-        description=textwrap.dedent("""Get plant family and genus names."""),
+        description=textwrap.dedent(
+            """Get plant family and genus names, and the taxon name database."""
+        ),
     )
     arg_parser.add_argument(
         "--itis-db",
@@ -100,6 +166,16 @@ def parse_args() -> argparse.Namespace:
         metavar="PATH",
         help="""Get terms from this WCVP file. It is a '|' separated CSV.""",
     )
+    arg_parser.add_argument(
+        "--names-db",
+        type=Path,
+        metavar="PATH",
+        help=f"""Also build the taxon name database for name lookups. It has all of the
+            species and infraspecific names with their authors and synonyms. The
+            taxon cleaners only use it to fix misspelled names when it is at
+            {taxon_names.NAMES_DB}.""",
+    )
+
     arg_parser.add_argument(
         "--log-file",
         type=Path,
@@ -0,0 +1,80 @@
+import unittest
+from dataclasses import dataclass
+from typing import Any
+
+import pandas as pd
+
+from llama.fields.extracted_field import ExtractedField
+from llama.fields.location.locality import Locality
+from llama.fields.plants.habit import Habit
+from llama.fields.taxon.family import Family
+
+EXPECTS = ["Quercus alba", "", "abc", " 5 mi N of Reno ", "", "Fagaceae"]
+ACTUALS = ["quercus albus", "", "abd", "5 mi N of Reno, Nevada", "Fagaceae", "Fagacea"]
+RECORDS = [{"scientificName": "Quercus alba"} for _ in EXPECTS]
+
+
+@dataclass
+class Exact(ExtractedField):
+    """A field that keeps the default scoring method but has its own score."""
+
+    @staticmethod
+    def score(expect: Any, actual: Any, record: dict[str, Any]) -> float:
+        del record
+        return float(expect == actual)
+
+
+def one_at_a_time(cls: type) -> list[float]:
+    return [
+        cls.score(e, a, r) for e, a, r in zip(EXPECTS, ACTUALS, RECORDS, strict=True)
+    ]
+
+
+class TestBaseField(unittest.TestCase):
+    # ---------------------------------------------------------------------
+    def test_score_batch_01(self) -> None:
+        """Edit distance scores are the same as scoring one at a time."""
+        scores = ExtractedField.score_batch(EXPECTS, ACTUALS, RECORDS)
+        assert scores.tolist() == one_at_a_time(ExtractedField)
+
+    def test_score_batch_02(self) -> None:
+        """Fuzzy partial ratio scores are the same as scoring one at a time."""
+        scores = Locality.score_batch(EXPECTS, ACTUALS, RECORDS)
+        assert scores.tolist() == one_at_a_time(Locality)
+
+    def test_score_batch_03(self) -> None:
+        """Custom scores use the field's score method."""
+        scores = Family.score_batch(EXPECTS, ACTUALS, RECORDS)
+        assert scores.tolist() == one_at_a_time(Family)
+        assert scores[4] == 1.0
+
+    def test_score_batch_04(self) -> None:
+        assert ExtractedField.score_batch([], [], []).tolist() == []
+
+    def test_score_batch_05(self) -> None:
+        """A field's own score is used even with the "LR" scoring method."""
+        scores = Exact.score_batch(EXPECTS, ACTUALS, RECORDS)
+        assert scores.tolist() == [0.0, 1.0, 0.0, 0.0, 0.0, 0.0]
+
+    # ---------------------------------------------------------------------
+    def test_clean_column_01(self) -> None:
+        """A named column converter cleans the same as the dataclass."""
+        rows = pd.DataFrame(
+            {
+                "text": ["a shrub on a hill", "tree", "", "Shrub"],
+                "locality": [" hill ", "one\ntwo", "", "5 mi N"],
+                "habit": ["shrub", "vine", "tree", " shrub"],
+            }
+        )
+        for cls, col in ((Locality, "locality"), (Habit, "habit")):
+            got = cls.clean_column(rows[col], rows).tolist()
+            expect = [
+                getattr(cls(**{col: v}, text=t), col)
+                for v, t in zip(rows[col], rows["text"], strict=True)
+            ]
+            assert got == expect, col
+
+    def test_clean_column_02(self) -> None:
+        """Fields without a column converter use the dataclass."""
+        column = pd.Series(["x"])
+        assert ExtractedField.clean_column(column, column.to_frame()) is None
@@ -0,0 +1,81 @@
+import unittest
+from typing import Any
+
+from llama.fields.location.locality import Locality
+from llama.pylib import consensus
+
+
+def vote(values: list[list[str]], **kwargs: Any) -> tuple[list, list]:
+    kwargs = {"threshold": 0.9} | kwargs
+    winners, members = consensus.vote(values, **kwargs)
+    return winners.tolist(), members.tolist()
+
+
+class TestConsensus(unittest.TestCase):
+    # ---------------------------------------------------------------------
+    def test_normalize_01(self) -> None:
+        assert consensus.normalize(" Mt.  Hood, ") == "mt hood"
+
+    # ---------------------------------------------------------------------
+    def test_vote_01(self) -> None:
+        """The most common value wins, not the least common one."""
+        winners, members = vote([["Mt. Hood"], ["Fagaceae"], ["Mt. Hood"]])
+        assert winners == [0]
+        assert members == [[True, False, True]]
+
+    def test_vote_02(self) -> None:
+        """Nearly the same values are votes for the same value."""
+        winners, members = vote([["Quercus"], ["mt hood"], ["Mt. Hood"], ["Fagus"]])
+        assert winners == [1]
+        assert members == [[False, True, True, False]]
+
+    def test_vote_03(self) -> None:
+        """The largest clusters are tied."""
+        winners, members = vote([["Quercus"], ["Fagus"], ["Quercus"], ["Fagus"]])
+        assert winners == [consensus.NO_WINNER]
+        assert members == [[False] * 4]
+
+    def test_vote_04(self) -> None:
+        """A majority is more than half of the models."""
+        values = [["Quercus"], ["Quercus"], ["Fagus"], ["Acer"]]
+        assert vote(values)[0] == [0]
+        assert vote(values, majority=True)[0] == [consensus.NO_WINNER]
+
+    def test_vote_05(self) -> None:
+        """The winner is the medoid of the cluster."""
+        values = [["Quercus alba"], ["Quercus alba L."], ["Quercus alba L"]]
+        winners, _ = vote(values, threshold=0.8)
+        assert winners == [1]
+
+    def test_vote_06(self) -> None:
+        """Every cell in a column gets its own vote."""
+        winners, _ = vote([["a", ""], ["b", ""], ["b", "x"]])
+        assert winners == [1, 0]
+
+    def test_vote_07(self) -> None:
+        """Values that are only part of another value don't agree with it."""
+        values = ["a", "quercus alba", "b"]
+        # The fuzzy partial ratio of a locality says they are all the same
+        scores = Locality.score_batch(values[:2], values[1:], [{}, {}])
+        assert scores.tolist() == [1.0, 1.0]
+        winners, members = vote([[v] for v in values])
+        assert winners == [consensus.NO_WINNER]
+        assert members == [[False] * 3]
+
+    def test_vote_08(self) -> None:
+        """Short values don't chain longer ones into a cluster."""
+        values = [
+            ["Oak"],
+            ["Oak woods near river"],
+            ["river"],
+            ["Oak woods near river"],
+        ]
+        winners, members = vote(values)
+        assert winners == [1]
+        assert members == [[False, True, False, True]]
+
+    # ---------------------------------------------------------------------
+    def test_similarities_01(self) -> None:
+        """Scores are symmetric."""
+        scores = consensus.similarities([["Oak"], ["Oak woods near river"]])
+        assert scores[0, 0, 1] == scores[0, 1, 0] < 0.9
@@ -0,0 +1,50 @@
+import unittest
+
+from llama.calculated.location.country import Country
+from llama.calculated.location.locality import Locality
+from llama.calculated.taxon.genus import Genus
+from llama.calculated.taxon.specificEpithet import SpecificEpithet
+from llama.pylib import field_graph
+
+CALCULATED = {
+    "locality": Locality,
+    "genus": Genus,
+    "country": Country,
+    "specificEpithet": SpecificEpithet,
+}
+
+
+class TestFieldGraph(unittest.TestCase):
+    # ---------------------------------------------------------------------
+    def test_dependencies_01(self) -> None:
+        deps = field_graph.dependencies(CALCULATED)
+        assert deps["locality"] == {"country"}
+        assert deps["country"] == set()
+
+    # ---------------------------------------------------------------------
+    def test_evaluation_order_01(self) -> None:
+        """The country is calculated before the locality that reads it."""
+        order = field_graph.evaluation_order(CALCULATED)
+        assert sorted(order) == sorted(CALCULATED)
+        assert order.index("country") < order.index("locality")
+
+    def test_evaluation_order_02(self) -> None:
+        """Only run the fields needed for the wanted columns."""
+        order = field_graph.evaluation_order(CALCULATED, ["locality"])
+        assert order == ["country", "locality"]
+
+    def test_evaluation_order_03(self) -> None:
+        order = field_graph.evaluation_order(CALCULATED, ["specificEpithet"])
+        assert order == ["specificEpithet"]
+
+    # ---------------------------------------------------------------------
+    def test_ancestors_01(self) -> None:
+        names, columns = field_graph.ancestors(CALCULATED, ["locality"])
+        assert names == {"country", "locality"}
+        assert columns == {"country", "county", "locality", "stateProvince"}
+
+    def test_ancestors_02(self) -> None:
+        """Columns that aren't calculated are their own only ancestor."""
+        names, columns = field_graph.ancestors(CALCULATED, ["habitat"])
+        assert names == set()
+        assert columns == {"habitat"}
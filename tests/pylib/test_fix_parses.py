@@ -1,5 +1,8 @@
+import math
 import unittest
 
+import pandas as pd
+
 from llama.pylib import fix_parses
 
 
@@ -256,3 +259,43 @@ class TestFixValues(unittest.TestCase):
     # ---------------------------------------------------------------------
     def test_clean_str_ends_01(self) -> None:
         assert fix_parses.clean_str_ends("['word']") == "word"
+
+    # ---------------------------------------------------------------------
+    def test_column_to_str_01(self) -> None:
+        values = ["  test ", "", "one\ntwo", "11"]
+        actual = fix_parses.column_to_str(pd.Series(values)).tolist()
+        assert actual == [fix_parses.to_str(v) for v in values]
+
+    # ---------------------------------------------------------------------
+    def test_column_to_float_01(self) -> None:
+        values = ["1,234.5", "-12.", "", "word", "about 7 m"]
+        actual = fix_parses.column_to_float(pd.Series(values)).tolist()
+        expect = [fix_parses.to_float(v) for v in values]
+        expect = [math.nan if e is None else e for e in expect]
+        for act, exp in zip(actual, expect, strict=True):
+            assert act == exp or (math.isnan(act) and math.isnan(exp))
+
+    # ---------------------------------------------------------------------
+    def test_column_to_int_01(self) -> None:
+        values = ["1,234", "12 m", "", "word"]
+        actual = fix_parses.column_to_int(pd.Series(values)).tolist()
+        assert actual == [fix_parses.to_int(v) for v in values]
+
+    # ---------------------------------------------------------------------
+    def test_column_to_bool_01(self) -> None:
+        values = ["Yes", "true", "no", "", "1", "flowers"]
+        actual = fix_parses.column_to_bool(pd.Series(values)).tolist()
+        assert actual == [fix_parses.to_bool(v) for v in values]
+
+    # ---------------------------------------------------------------------
+    def test_column_hallucinated_str_01(self) -> None:
+        values = ["Atongan River", "Mt. Apo", ""]
+        texts = ["Katanglad Mts Atongan River", "Bukidnon", "text"]
+        actual = fix_parses.column_hallucinated_str(
+            pd.Series(values), pd.Series(texts)
+        ).tolist()
+        expect = [
+            fix_parses.hallucinated_str(v, t)
+            for v, t in zip(values, texts, strict=True)
+        ]
+        assert actual == expect
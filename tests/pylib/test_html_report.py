@@ -0,0 +1,117 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+import pytest
+
+from llama.pylib import html_report
+
+
+def groups(count: int) -> list[dict]:
+    return [
+        {
+            "text": f"label {i}",
+            "image_path": f"img/{i}.jpg",
+            "row_group": str(i),
+            "rows": [
+                {"row_type": "GBIF", "genus": [("genus", "Quercus")]},
+                {"row_type": "llm", "genus": "Quercus", "family": None},
+            ],
+            "scores": [("llm", "genus", "search_success", i / count)],
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+def read_script(path: Path) -> list:
+    """Get the arguments of the function call in a shard or manifest."""
+    text = path.read_text()
+    args = text[text.index("(") + 1 : text.rindex(")")]
+    return json.loads(f"[{args}]")
+
+
+class TestHtmlReport(unittest.TestCase):
+    # ---------------------------------------------------------------------
+    def test_write_html_01(self) -> None:
+        """Row groups are split into shards."""
+        count = html_report.SHARD_SIZE + 1
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "report.html"
+            html_report.write_html(
+                path, title="test", columns=["genus", "family"], groups=groups(count)
+            )
+            shard_dir = Path(temp_dir) / "report_files"
+            names = sorted(p.name for p in shard_dir.iterdir())
+            number, shard = read_script(shard_dir / "shard_00002.js")
+            (manifest,) = read_script(shard_dir / "manifest.js")
+            page = path.read_text()
+
+        assert names == ["manifest.js", "shard_00001.js", "shard_00002.js"]
+        assert number == 2
+        assert len(shard) == 1
+        assert shard[0]["rows"] == [
+            ["GBIF", [["genus", "Quercus"]], None],
+            ["llm", "Quercus", None],
+        ]
+        assert '<script src="report_files/manifest.js">' in page
+        assert manifest["categories"] == ["search_success"]
+        assert manifest["shards"][1] == {
+            "first": str(count),
+            "count": 1,
+            "ranges": {"genus": [1.0, 1.0]},
+            "cats": {"genus": ["search_success"]},
+        }
+
+    def test_write_html_02(self) -> None:
+        """Tables go on the page and are escaped."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "report.html"
+            html_report.write_html(
+                path,
+                title="<test>",
+                columns=["genus"],
+                groups=[],
+                tables={"statistics": [{"column": "a<b", "score": 0.5}]},
+            )
+            page = path.read_text()
+        assert "<title>&lt;test&gt;</title>" in page
+        assert "<td>a&lt;b</td><td>0.5</td>" in page
+
+    def test_write_html_03(self) -> None:
+        """An earlier report's shards are replaced."""
+        count = html_report.SHARD_SIZE + 1
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "report.html"
+            for size in (count, 1):
+                html_report.write_html(
+                    path, title="test", columns=["genus"], groups=groups(size)
+                )
+            shard_dir = Path(temp_dir) / "report_files"
+            names = sorted(p.name for p in shard_dir.iterdir())
+        assert names == ["manifest.js", "shard_00001.js"]
+
+    def test_write_html_04(self) -> None:
+        """A folder with other files in it is left alone."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "report.html"
+            saved = Path(temp_dir) / "report_files" / "saved.css"
+            saved.parent.mkdir()
+            saved.write_text("body {}")
+            with pytest.raises(FileExistsError, match=r"saved\.css"):
+                html_report.write_html(
+                    path, title="test", columns=["genus"], groups=groups(1)
+                )
+            assert saved.exists()
+            assert not path.exists()
+
+    # ---------------------------------------------------------------------
+    def test_shard_summary_01(self) -> None:
+        batch = groups(4)
+        batch[0]["scores"].append(("llm", "family", "search_fail", float("nan")))
+        summary = html_report.shard_summary(batch)
+        assert summary["ranges"] == {"genus": [0.25, 1.0]}
+        assert summary["cats"] == {
+            "genus": ["search_success"],
+            "family": ["search_fail"],
+        }
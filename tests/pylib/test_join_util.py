@@ -0,0 +1,60 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import pandas as pd
+
+from llama.pylib import join_util, table_io
+
+OCR = pd.DataFrame({"source": ["c", "a", "b", "d"], "text": ["3", "1", "2", "4"]})
+GOLD = pd.DataFrame({"source": ["b", "a", "c"], "genus": ["Bg", "Ag", "Cg"]})
+PARSE_1 = pd.DataFrame(
+    {
+        "source": ["a", "b", "c"],
+        "genus": ["A1", "B1", "C1"],
+        "lineage_digest": ["x", "y", "z"],
+    }
+)
+PARSE_2 = pd.DataFrame(
+    {"family": ["a2", "c2", "b2"], "source": ["a", "c", "b"], "genus": ["", "", ""]}
+)
+
+
+def write(temp_dir: str, name: str, df: pd.DataFrame) -> Path:
+    path = Path(temp_dir) / name
+    table_io.write_table(path, df)
+    return path
+
+
+class TestJoinUtil(unittest.TestCase):
+    # ---------------------------------------------------------------------
+    def test_join_01(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            joined = join_util.join(
+                write(temp_dir, "ocr.csv", OCR),
+                [
+                    write(temp_dir, "one.csv", PARSE_1),
+                    write(temp_dir, "two.parquet", PARSE_2),
+                ],
+                write(temp_dir, "gold.csv", GOLD),
+            )
+        assert joined.sources == ["a", "b", "c"]
+        assert joined.texts == ["1", "2", "3"]
+        assert joined.expects[1] == {"source": "b", "genus": "Bg"}
+        assert joined.expect_columns == ["source", "genus"]
+        assert joined.parses["one"][2] == {"source": "c", "genus": "C1"}
+        assert joined.parses["two"][2] == {"family": "c2", "source": "c", "genus": ""}
+        assert joined.parse_columns == ["source", "genus", "family"]
+
+    def test_join_02(self) -> None:
+        """A repeated source uses its last record."""
+        parse = pd.concat([PARSE_2, PARSE_2.iloc[:1].assign(family="again")])
+        with tempfile.TemporaryDirectory() as temp_dir:
+            joined = join_util.join(
+                write(temp_dir, "ocr.csv", OCR),
+                [write(temp_dir, "parse.csv", parse)],
+                limit=2,
+            )
+        assert joined.sources == ["a", "b"]
+        assert [p["family"] for p in joined.parses["parse"]] == ["again", "b2"]
+        assert joined.expects == []
@@ -0,0 +1,45 @@
+import unittest
+
+from llama.pylib import label_dates
+
+
+class TestLabelDates(unittest.TestCase):
+    # ---------------------------------------------------------------------
+    def test_to_iso_01(self) -> None:
+        assert label_dates.to_iso("12.VI.1987") == "1987-06-12"
+
+    def test_to_iso_02(self) -> None:
+        assert label_dates.to_iso("1 xi 2005") == "2005-11-01"
+
+    def test_to_iso_03(self) -> None:
+        assert label_dates.to_iso("November 1965") == "1965-11"
+
+    def test_to_iso_04(self) -> None:
+        assert label_dates.to_iso("12 x 65") == "1965-10-12"
+
+    def test_to_iso_05(self) -> None:
+        assert label_dates.to_iso("15/08/1999") == "1999-08-15"
+
+    def test_to_iso_06(self) -> None:
+        assert label_dates.to_iso("1911") == "1911"
+
+    def test_to_iso_07(self) -> None:
+        assert label_dates.to_iso("31 Feb 1999") == ""
+
+    def test_to_iso_08(self) -> None:
+        assert label_dates.to_iso("June 12") == ""
+
+    def test_to_iso_09(self) -> None:
+        assert label_dates.to_iso("14 Mar 2130") == "2030-03-14"
+
+    def test_to_iso_10(self) -> None:
+        assert label_dates.to_iso("12 Dec 1999 10:30") == "1999-12-12"
+
+    # ---------------------------------------------------------------------
+    def test_range_to_iso_01(self) -> None:
+        actual = label_dates.range_to_iso("12.VI.1987|20.VI.1987")
+        assert actual == "1987-06-12 to 1987-06-20"
+
+    def test_range_to_iso_02(self) -> None:
+        actual = label_dates.range_to_iso("12 Jun 1987 to 20 Jun 1987")
+        assert actual == "1987-06-12 to 1987-06-20"
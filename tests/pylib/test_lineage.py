@@ -0,0 +1,48 @@
+import json
+import unittest
+
+import pandas as pd
+
+from llama.pylib import lineage
+
+
+class TestLineage(unittest.TestCase):
+    # ---------------------------------------------------------------------
+    def test_digest_record_01(self) -> None:
+        """Timing and lineage columns don't change the digest."""
+        one = {"source": "a", "text": "t", "elapsed": "1", lineage.TEXT: "x"}
+        two = {"source": "a", "text": "t", "elapsed": "2", lineage.TEXT: "y"}
+        assert lineage.digest_record(one) == lineage.digest_record(two)
+
+    def test_digest_record_02(self) -> None:
+        one = {"source": "a", "text": "t"}
+        two = {"source": "a", "text": "u"}
+        assert lineage.digest_record(one) != lineage.digest_record(two)
+
+    # ---------------------------------------------------------------------
+    def test_stale_columns_01(self) -> None:
+        old = json.dumps({"a": "1", "b": "2"})
+        new = json.dumps({"a": "1", "b": "3", "c": "4"})
+        assert lineage.stale_columns(old, new) == ["b", "c"]
+
+    def test_stale_columns_02(self) -> None:
+        new = json.dumps({"a": "1"})
+        assert lineage.stale_columns("", new) == ["a"]
+
+    # ---------------------------------------------------------------------
+    def test_latest_01(self) -> None:
+        df = pd.DataFrame(
+            {
+                "source": ["a", "b", "a", "b"],
+                "status": ["success", "success", "success", "ERROR"],
+                "text": ["old", "good", "new", "bad"],
+            }
+        )
+        actual = lineage.latest(df)
+        assert actual["text"].tolist() == ["good", "new"]
+
+    # ---------------------------------------------------------------------
+    def test_is_current_01(self) -> None:
+        record = {lineage.TEXT: "x", lineage.PARSE_MODEL: "m"}
+        assert lineage.is_current(record, {lineage.TEXT: "x"})
+        assert not lineage.is_current(record, {lineage.PARSE_PROMPT: "p"})
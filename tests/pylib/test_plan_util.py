@@ -0,0 +1,41 @@
+import unittest
+from datetime import timedelta
+
+from llama.pylib import plan_util
+from llama.pylib.plan_util import Trial
+
+
+class TestPlanUtil(unittest.TestCase):
+    # ---------------------------------------------------------------------
+    def test_token_usage_01(self) -> None:
+        reply = {"usage": {"prompt_tokens": 10, "completion_tokens": 2}}
+        actual = plan_util.token_usage(reply, prompt_chars=400, reply_chars=40)
+        assert actual == {"prompt_tokens": 10, "completion_tokens": 2}
+
+    def test_token_usage_02(self) -> None:
+        actual = plan_util.token_usage({}, prompt_chars=400, reply_chars=40)
+        assert actual == {"prompt_tokens": 100, "completion_tokens": 10}
+
+    # ---------------------------------------------------------------------
+    def test_extrapolate_01(self) -> None:
+        trials = [
+            Trial(status="success", seconds=2.0, prompt_tokens=100),
+            Trial(status="success", seconds=4.0, prompt_tokens=300),
+            Trial(status="ERROR", seconds=60.0),
+        ]
+        actual = plan_util.extrapolate(trials, total=10, thread_levels=[5, 1])
+        assert [e.threads for e in actual] == [1, 5]
+        assert actual[0].wall == timedelta(seconds=30)
+        assert actual[1].wall == timedelta(seconds=6)
+        assert actual[0].prompt_tokens == 2000
+
+    def test_extrapolate_02(self) -> None:
+        trials = [Trial(status="success", seconds=1.0, prompt_tokens=1_000_000)]
+        actual = plan_util.extrapolate(
+            trials, total=2, thread_levels=[1], input_cost=0.5
+        )
+        assert actual[0].cost == 1.0
+
+    # ---------------------------------------------------------------------
+    def test_sample_01(self) -> None:
+        assert len(plan_util.sample(list(range(5)), 10)) == 5
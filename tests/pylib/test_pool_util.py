@@ -0,0 +1,26 @@
+import unittest
+
+from llama.pylib import pool_util
+
+
+def double(items: list[int]) -> list[int]:
+    return [i * 2 for i in items]
+
+
+class TestPoolUtil(unittest.TestCase):
+    # ---------------------------------------------------------------------
+    def test_chunk_01(self) -> None:
+        assert pool_util.chunk([1, 2, 3], workers=1) == [[1, 2, 3]]
+
+    def test_chunk_02(self) -> None:
+        chunks = pool_util.chunk(list(range(10)), workers=2)
+        assert [i for c in chunks for i in c] == list(range(10))
+
+    def test_chunk_03(self) -> None:
+        assert pool_util.chunk([], workers=2) == [[]]
+
+    # ---------------------------------------------------------------------
+    def test_run_chunks_01(self) -> None:
+        chunks = pool_util.chunk(list(range(10)), workers=2)
+        actual = pool_util.run_chunks(double, chunks, workers=2)
+        assert [i for c in actual for i in c] == [i * 2 for i in range(10)]
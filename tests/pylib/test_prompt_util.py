@@ -0,0 +1,46 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from llama.pylib import prompt_util
+
+PROMPT = Path("prompts") / "herbarium_v1.md"
+
+CALCULATED = """
+# Calculated Fields
+
+- [country](../llama/calculated/location/country.py)
+- [locality](../llama/calculated/location/locality.py)
+"""
+
+
+class TestPromptUtil(unittest.TestCase):
+    # ---------------------------------------------------------------------
+    def test_split_fields_01(self) -> None:
+        prompt = prompt_util.Prompt.load(PROMPT)
+        splits = prompt.split_fields()
+        columns = [c for s in splits for c in s.column_names]
+        assert sorted(columns) == sorted(prompt.column_names)
+        assert "herbarium:location" in [s.name for s in splits]
+
+    def test_split_fields_02(self) -> None:
+        prompt = prompt_util.Prompt.load(PROMPT)
+        splits = prompt.split_fields(["location,recordNumber"])
+        group = next(s for s in splits if s.name == "herbarium:location,recordNumber")
+        assert "recordNumber" in group.column_names
+        assert "county" in group.column_names
+        assert "recordNumber" in group.system_prompt
+        assert "scientificName" not in group.column_names
+
+    # ---------------------------------------------------------------------
+    def test_calculated_01(self) -> None:
+        prompt = prompt_util.Prompt.load(PROMPT)
+        assert prompt.calculated == {}
+
+    def test_calculated_02(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="test_") as temp_dir:
+            path = Path(temp_dir) / "prompt.md"
+            path.write_text(PROMPT.read_text() + CALCULATED)
+            prompt = prompt_util.Prompt.load(path)
+        assert list(prompt.calculated) == ["country", "locality"]
+        assert prompt.calculated_classes["locality"].__name__ == "Locality"
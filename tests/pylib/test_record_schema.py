@@ -0,0 +1,66 @@
+import unittest
+
+import pandas as pd
+import pyarrow as pa
+
+from llama.calculated.location.elevation import Elevation
+from llama.fields.plants.plantSizes import PlantSizes
+from llama.pylib import record_schema
+
+
+class TestRecordSchema(unittest.TestCase):
+    # ---------------------------------------------------------------------
+    def test_arrow_type_01(self) -> None:
+        assert record_schema.arrow_type(str) == pa.string()
+        assert record_schema.arrow_type(float | str) == pa.float64()
+        assert record_schema.arrow_type(bool | str) == pa.bool_()
+
+    def test_arrow_type_02(self) -> None:
+        """Lists are reduced to strings by the cleaners."""
+        assert record_schema.arrow_type(list[str] | str) == pa.string()
+
+    # ---------------------------------------------------------------------
+    def test_field_types_01(self) -> None:
+        types = record_schema.field_types([Elevation, PlantSizes])
+        assert types["minimumElevationInMeters"] == pa.float64()
+        assert types["elevationEstimated"] == pa.bool_()
+        assert types["elevationUnits"] == pa.string()
+        assert types["plantSizes"] == pa.string()
+
+    # ---------------------------------------------------------------------
+    def test_build_schema_01(self) -> None:
+        schema = record_schema.build_schema(["status", "source", "text"])
+        assert schema.field("source").type == record_schema.DICTIONARY
+        assert schema.field("text").type == pa.string()
+
+    # ---------------------------------------------------------------------
+    def test_to_arrow_01(self) -> None:
+        """Empty strings and bad values in typed columns are nulls."""
+        df = pd.DataFrame({"lat": ["1.5", "", "north"], "ok": ["True", "", "False"]})
+        schema = record_schema.build_schema(
+            df.columns, {"lat": pa.float64(), "ok": pa.bool_()}
+        )
+        table = record_schema.to_arrow(df, schema)
+        assert table.column("lat").to_pylist() == [1.5, None, None]
+        assert table.column("ok").to_pylist() == [True, None, False]
+
+    def test_to_strings_01(self) -> None:
+        df = pd.DataFrame({"source": ["a", "b"], "lat": [1.5, ""], "ok": [True, ""]})
+        schema = record_schema.build_schema(
+            df.columns, {"lat": pa.float64(), "ok": pa.bool_()}
+        )
+        strings = record_schema.to_strings(record_schema.to_arrow(df, schema))
+        assert strings.to_dict("records") == [
+            {"source": "a", "lat": "1.5", "ok": "True"},
+            {"source": "b", "lat": "", "ok": ""},
+        ]
+
+    def test_to_string_list_01(self) -> None:
+        column = pa.chunked_array([["a", None, "b"], ["a", None]])
+        strings = record_schema.to_string_list(column)
+        assert strings == ["a", "", "b", "a", ""]
+        assert strings[0] is strings[3]
+
+    def test_to_string_list_02(self) -> None:
+        column = pa.array(["x", None, "x"]).dictionary_encode()
+        assert record_schema.to_string_list(column) == ["x", "", "x"]
@@ -0,0 +1,107 @@
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+from xml.etree import ElementTree as ET
+
+import pandas as pd
+
+from llama.pylib import report_writer
+
+STATS = pd.DataFrame({"field": ["genus", "family"], "count": [3, 4], "score": [0.5, 1]})
+
+DETAIL = [
+    {"source": "a.jpg", "row_type": "gbif", "genus": "Quercus  alba"},
+    {"source": "a.jpg", "row_type": "llm", "genus": "Quercus\nalba & <co>"},
+    {"source": "b.jpg", "row_type": "llm", "genus": None},
+]
+
+XLSX_NS = {"x": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+
+
+class TestReportWriter(unittest.TestCase):
+    # ---------------------------------------------------------------------
+    def test_ods_01(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "report.ods"
+            report_writer.write_report(path, {"stats": STATS, "detail": iter(DETAIL)})
+            sheets = pd.read_excel(path, sheet_name=None, engine="odf")
+
+        assert list(sheets) == ["stats", "detail"]
+        assert sheets["stats"].equals(STATS)
+        assert sheets["detail"]["genus"].tolist()[:2] == [
+            "Quercus  alba",
+            "Quercus\nalba & <co>",
+        ]
+        assert pd.isna(sheets["detail"].loc[2, "genus"])
+
+    def test_ods_02(self) -> None:
+        """The mimetype must be the first file and uncompressed."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "report.ods"
+            report_writer.write_report(path, {"stats": STATS})
+            with zipfile.ZipFile(path) as zf:
+                first = zf.infolist()[0]
+                assert first.filename == "mimetype"
+                assert first.compress_type == zipfile.ZIP_STORED
+
+    def test_ods_03(self) -> None:
+        """Control characters aren't allowed in XML."""
+        sheet = [{"text": "bad\x0bchar"}]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "report.ods"
+            report_writer.write_report(path, {"text": sheet})
+            df = pd.read_excel(path, engine="odf")
+        assert df["text"].tolist() == ["badchar"]
+
+    def test_ods_04(self) -> None:
+        """Booleans read back as booleans, like the ones odfpy wrote."""
+        sheet = [{"is_aligned": True}, {"is_aligned": False}]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "report.ods"
+            report_writer.write_report(path, {"scores": sheet})
+            df = pd.read_excel(path, engine="odf")
+        assert df["is_aligned"].tolist() == [True, False]
+
+    # ---------------------------------------------------------------------
+    def test_xlsx_01(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "report.xlsx"
+            report_writer.write_report(path, {"stats": STATS, "detail": DETAIL})
+            with zipfile.ZipFile(path) as zf:
+                # We just wrote these files
+                workbook = ET.fromstring(zf.read("xl/workbook.xml"))  # noqa: S314
+                sheet = ET.fromstring(zf.read("xl/worksheets/sheet2.xml"))  # noqa: S314
+
+        names = [s.get("name") for s in workbook.iterfind(".//x:sheet", XLSX_NS)]
+        assert names == ["stats", "detail"]
+
+        rows = sheet.findall(".//x:row", XLSX_NS)
+        assert len(rows) == len(DETAIL) + 1
+        cells = {
+            c.get("r"): c.findtext(".//x:t", namespaces=XLSX_NS)
+            for c in sheet.iterfind(".//x:c", XLSX_NS)
+        }
+        assert cells["C3"] == "Quercus\nalba & <co>"
+        assert "C4" not in cells
+
+    def test_column_letter_01(self) -> None:
+        letters = [report_writer.column_letter(i) for i in (0, 25, 26, 27, 701, 702)]
+        assert letters == ["A", "Z", "AA", "AB", "ZZ", "AAA"]
+
+    # ---------------------------------------------------------------------
+    def test_bundle_01(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "report.csv"
+            report_writer.write_report(path, {"stats": STATS, "detail": DETAIL})
+            stats = pd.read_csv(Path(temp_dir) / "report.stats.csv")
+            detail = pd.read_csv(Path(temp_dir) / "report.detail.csv")
+        assert stats.equals(STATS)
+        assert detail["source"].tolist() == ["a.jpg", "a.jpg", "b.jpg"]
+
+    def test_bundle_02(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "report.parquet"
+            report_writer.write_report(path, {"detail": DETAIL})
+            detail = pd.read_parquet(Path(temp_dir) / "report.detail.parquet")
+        assert detail["genus"].tolist() == ["Quercus  alba", "Quercus\nalba & <co>", ""]
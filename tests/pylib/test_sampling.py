@@ -0,0 +1,84 @@
+import unittest
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from llama.pylib import sampling
+
+
+class TestSampling(unittest.TestCase):
+    # ---------------------------------------------------------------------
+    def test_institution_01(self) -> None:
+        assert sampling.institution("images/tex00012345.jpg") == "TEX"
+        assert sampling.institution("images/12345.jpg") == ""
+
+    def test_stratify_01(self) -> None:
+        expects = [
+            {"source": "a.jpg", "genus": "", "family": None},
+            {"source": "b.jpg", "genus": "Quercus", "family": None},
+            {"source": "c.jpg", "genus": "Quercus", "family": "Fagaceae"},
+        ]
+        strata = sampling.stratify(expects, "filled")
+        assert len(set(strata)) == len(expects)
+
+    # ---------------------------------------------------------------------
+    def test_stratified_order_01(self) -> None:
+        """Every prefix of the order has about the same mix of strata."""
+        strata = ["a"] * 80 + ["b"] * 20
+        order = sampling.stratified_order(strata, seed=1)
+        assert sorted(order) == list(range(100))
+        counts = Counter(strata[i] for i in order[:10])
+        assert counts == {"a": 8, "b": 2}
+
+    def test_batches_01(self) -> None:
+        order = list(range(7))
+        assert list(sampling.batches(order, 3, sequential=False)) == [[0, 1, 2]]
+        assert list(sampling.batches(order, 3, sequential=True)) == [
+            [0, 1, 2],
+            [3, 4, 5],
+            [6],
+        ]
+
+    # ---------------------------------------------------------------------
+    def test_bootstrap_01(self) -> None:
+        """Unscored cells are left out and empty columns are NaN."""
+        values = np.array([[1.0, 0.0, np.nan], [1.0, np.nan, np.nan]])
+        mean, low, high = sampling.bootstrap(values, ["a", "a"], seed=1)
+        assert mean[:2].tolist() == [1.0, 0.0]
+        assert low[:2].tolist() == [1.0, 0.0]
+        assert high[:2].tolist() == [1.0, 0.0]
+        assert np.isnan([mean[2], low[2], high[2]]).all()
+
+    def test_bootstrap_02(self) -> None:
+        values = np.array([[0.0], [1.0]] * 50)
+        mean, low, high = sampling.bootstrap(values, ["a"] * 100, seed=1)
+        assert mean[0] == 0.5
+        assert 0.3 < low[0] < 0.5 < high[0] < 0.7
+
+    # ---------------------------------------------------------------------
+    def test_settled_01(self) -> None:
+        table = pd.DataFrame(
+            {
+                "file": ["a", "b"],
+                "column": ["genus", "genus"],
+                "mean": [0.9, 0.5],
+                "low": [0.8, 0.3],
+                "high": [1.0, 0.7],
+            }
+        )
+        assert sampling.settled(table, width=0.05)
+
+    def test_settled_02(self) -> None:
+        """Overlapping intervals must be narrow."""
+        table = pd.DataFrame(
+            {
+                "file": ["a", "b"],
+                "column": ["genus", "genus"],
+                "mean": [0.9, 0.85],
+                "low": [0.8, 0.75],
+                "high": [1.0, 0.95],
+            }
+        )
+        assert not sampling.settled(table, width=0.05)
+        assert sampling.settled(table, width=0.2)
@@ -0,0 +1,129 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+
+from llama.pylib import table_io
+
+DF = pd.DataFrame({"source": ["a", "b", "c"], "text": ["one", "", "three"]})
+
+
+class TestTableIo(unittest.TestCase):
+    # ---------------------------------------------------------------------
+    def test_chunks_01(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "test.csv"
+            with table_io.ChunkWriter(path) as writer:
+                writer.write(DF.iloc[:2])
+                writer.write(DF.iloc[2:])
+            chunks = list(table_io.read_chunks(path, chunk_size=2))
+            assert [len(c) for c in chunks] == [2, 1]
+            assert pd.concat(chunks, ignore_index=True).equals(DF)
+
+    def test_chunks_02(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "test.parquet"
+            with table_io.ChunkWriter(path) as writer:
+                writer.write(DF.iloc[:2])
+                writer.write(DF.iloc[2:])
+            chunks = list(table_io.read_chunks(path, chunk_size=2))
+            assert [len(c) for c in chunks] == [2, 1]
+            assert pd.concat(chunks, ignore_index=True).equals(DF)
+
+    # ---------------------------------------------------------------------
+    def test_read_column_names_01(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "test.csv"
+            DF.to_csv(path, index=False)
+            assert table_io.read_column_names(path) == ["source", "text"]
+
+    def test_read_column_names_02(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "test.arrows"
+            table_io.write_table(path, DF)
+            assert table_io.read_column_names(path) == ["source", "text"]
+
+    # ---------------------------------------------------------------------
+    def test_read_table_01(self) -> None:
+        """Only read the columns asked for, in that order."""
+        for suffix in (".csv", ".parquet", ".arrows"):
+            with tempfile.TemporaryDirectory() as temp_dir:
+                path = Path(temp_dir) / f"test{suffix}"
+                table_io.write_table(path, DF)
+                df = table_io.read_table(path, ["text", "source"])
+                assert df.equals(DF[["text", "source"]])
+
+    def test_read_table_02(self) -> None:
+        """Typed tables keep their types and read as the same strings as a CSV."""
+        df = pd.DataFrame({"source": ["a", "b"], "lat": [1.5, ""], "ok": [True, ""]})
+        types = {"lat": pa.float64(), "ok": pa.bool_()}
+        with tempfile.TemporaryDirectory() as temp_dir:
+            csv_path = Path(temp_dir) / "test.csv"
+            table_io.write_table(csv_path, df, types)
+            path = Path(temp_dir) / "test.parquet"
+            table_io.write_table(path, df, types)
+            table = table_io.read_arrow(path)
+            assert table.schema.field("lat").type == pa.float64()
+            assert table.column("ok").to_pylist() == [True, None]
+            assert table_io.read_table(path).equals(table_io.read_table(csv_path))
+
+    def test_read_arrow_01(self) -> None:
+        """CSV columns are strings with the same missing values as pandas."""
+        df = pd.DataFrame({"source": ["a", "b"], "text": ["007\nNA", "NA"]})
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "test.csv"
+            df.to_csv(path, index=False)
+            table = table_io.read_arrow(path, ["text"])
+            assert table.column_names == ["text"]
+            assert table.column("text").to_pylist() == ["007\nNA", None]
+            assert table_io.read_table(path, ["text"])["text"].tolist() == [
+                "007\nNA",
+                "",
+            ]
+
+    # ---------------------------------------------------------------------
+    def test_row_writer_01(self) -> None:
+        """Appending to a typed table keeps the old records."""
+        columns = ["source", "text"]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "test.arrows"
+            with table_io.RowWriter(path, columns, append=False) as writer:
+                writer.write({"source": "a", "text": "one", "extra": "x"})
+            with table_io.RowWriter(path, columns, append=True) as writer:
+                writer.write({"source": "b", "text": ""})
+                writer.write({"source": "c", "text": "three"})
+            assert table_io.read_table(path).equals(DF)
+            assert list(Path(temp_dir).iterdir()) == [path]
+
+    def test_row_writer_02(self) -> None:
+        """Records written before a run dies are read and kept by the next run."""
+        columns = ["source", "text"]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "test.parquet"
+            with table_io.RowWriter(path, columns, append=False) as writer:
+                writer.write({"source": "a", "text": "one"})
+
+            # A run that dies without closing its writer
+            writer = table_io.RowWriter(path, columns, append=True)
+            writer.write({"source": "b", "text": ""})
+            assert table_io.exists(path)
+            assert table_io.read_table(path).equals(DF.iloc[:2])
+
+            with table_io.RowWriter(path, columns, append=True) as writer:
+                writer.write({"source": "c", "text": "three"})
+            assert table_io.read_table(path).equals(DF)
+            assert list(Path(temp_dir).iterdir()) == [path]
+
+    def test_read_part_01(self) -> None:
+        """A part that ends in the middle of a batch keeps its whole batches."""
+        columns = ["source", "text"]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "test.arrows"
+            writer = table_io.RowWriter(path, columns, append=False)
+            for row in DF.to_dict("records"):
+                writer.write(row)
+            part = writer.part_path
+            part.write_bytes(part.read_bytes()[:-20])
+            assert table_io.read_table(path).equals(DF.iloc[:2])
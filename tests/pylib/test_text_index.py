@@ -0,0 +1,49 @@
+import unittest
+
+from llama.pylib import text_index
+from llama.pylib.text_index import TextIndex
+
+INDEX = TextIndex("Flowers WHITE; leaves white-hairy. Coll. J. Smith")
+
+
+class TestTextIndex(unittest.TestCase):
+    # ---------------------------------------------------------------------
+    def test_contains_01(self) -> None:
+        assert INDEX.contains("white")
+        assert INDEX.contains("j. SMITH")
+        assert INDEX.contains("")
+        assert not INDEX.contains("purple")
+
+    # ---------------------------------------------------------------------
+    def test_find_01(self) -> None:
+        spans = INDEX.find("White")
+        assert spans == [(8, 13), (22, 27)]
+        assert [INDEX.text[s:e] for s, e in spans] == ["WHITE", "white"]
+
+    def test_find_02(self) -> None:
+        assert INDEX.find("purple") == []
+        assert INDEX.find("") == []
+
+    def test_find_03(self) -> None:
+        """Folding the case doesn't move the spans."""
+        index = TextIndex("İstanbul, Türkiye")
+        start, end = index.find("türkiye")[0]
+        assert index.text[start:end] == "Türkiye"
+
+    # ---------------------------------------------------------------------
+    def test_fuzzy_01(self) -> None:
+        assert INDEX.fuzzy("leaves") == ((15, 21), 100.0)
+
+    def test_fuzzy_02(self) -> None:
+        """OCR errors still match."""
+        span, score = INDEX.fuzzy("white-halry", min_score=80.0)
+        assert INDEX.text[span[0] : span[1]] == "white-hairy"
+        assert 80.0 <= score < 100.0
+
+    def test_fuzzy_03(self) -> None:
+        assert INDEX.fuzzy("purple") == (None, 0.0)
+
+    # ---------------------------------------------------------------------
+    def test_index_01(self) -> None:
+        """Fields for the same record share an index."""
+        assert text_index.index("some text") is text_index.index("some text")
@@ -0,0 +1,26 @@
+import unittest
+
+import pandas as pd
+
+from llama import clean_llm_output
+from llama.calculated.event.eventDate import EventDate
+from llama.fields.event.verbatimEventDate import VerbatimEventDate
+
+
+class TestCleanLlmOutput(unittest.TestCase):
+    # ---------------------------------------------------------------------
+    def test_calculate_01(self) -> None:
+        """A date range gets through the verbatim date cleaner to the event date."""
+        df = pd.DataFrame(
+            {
+                "source": ["a.jpg"],
+                "text": [""],
+                "verbatimEventDate": ["Date: 12 Jun 1987|20 Jun 1987"],
+            }
+        )
+        out = clean_llm_output.clean_columns(
+            df, {"verbatimEventDate": VerbatimEventDate}, ["verbatimEventDate"]
+        )
+        out = clean_llm_output.calculate(out, {"eventDate": EventDate}, ["eventDate"])
+        assert out.loc[0, "verbatimEventDate"] == "12 Jun 1987 to 20 Jun 1987"
+        assert out.loc[0, "eventDate"] == "1987-06-12 to 1987-06-20"
@@ -0,0 +1,216 @@
+import math
+import unittest
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+from rapidfuzz import fuzz
+
+from llama import compare_output_gbif as gbif
+from llama.compare_output_gbif import ScoreCat
+
+COLUMNS = ["locality", "county", "habitat"]
+
+GBIF_SEARCH = {
+    "county": ["locality", "fieldNotes"],
+    "habitat": ["locality", "fieldNotes", "occurrenceRemarks"],
+}
+
+WORDS = ["oak", "woods", "near", "river", "Mt. Hood", "5 mi N", "Quercus alba", "Co."]
+
+
+def random_value(rng: np.random.Generator) -> str:
+    words = rng.choice(WORDS, size=rng.integers(0, 4), replace=False)
+    value = " ".join(words)
+    # Misspell some of the values
+    if value and rng.random() < 0.3:
+        i = rng.integers(len(value))
+        value = value[:i] + value[i + 1 :]
+    return value
+
+
+def random_data(seed: int, size: int) -> tuple[list[dict], list[dict]]:
+    """Get GBIF records and parsed records, "habitat" isn't a GBIF column."""
+    rng = np.random.default_rng(seed)
+    gbif_fields = ["locality", "county", "fieldNotes", "occurrenceRemarks"]
+    gbif_inputs = [{f: random_value(rng) for f in gbif_fields} for _ in range(size)]
+    parses = [{c: random_value(rng) for c in COLUMNS} for _ in range(size)]
+    return gbif_inputs, parses
+
+
+def calc_score(
+    col: str, actual: str, gbif_input: dict, success_threshold: float
+) -> tuple:
+    """Score one cell the way the comparison did before it scored whole columns."""
+    if col in gbif_input:
+        expect = gbif_input[col].strip()
+        if not expect and not actual:
+            return ScoreCat.aligned_both_empty.name, 1.0, "EQ", col, "", True
+        if not actual:
+            return ScoreCat.aligned_parse_empty.name, 0.0, "", "", "", True
+        if expect:
+            score = fuzz.partial_ratio(expect, actual) / 100.0
+            return ScoreCat.aligned_both_full.name, score, "FPR", col, expect, True
+
+    is_aligned = col in gbif_input
+    if not actual:
+        return ScoreCat.not_aligned_parse_empty.name, 0.0, "BLANK", "", "", is_aligned
+
+    best = (ScoreCat.search_fail.name, 0.0, "", "", "", is_aligned)
+    for search_field in GBIF_SEARCH.get(col, []):
+        expect = gbif_input.get(search_field, "")
+        if not expect:
+            continue
+        score = fuzz.partial_ratio(expect, actual) / 100.0
+        # On a tie in score and length the later search field wins
+        if score >= success_threshold and (score, -len(expect)) >= (
+            best[1],
+            -len(best[4]),
+        ):
+            best = (
+                ScoreCat.search_success.name,
+                score,
+                "FPR",
+                search_field,
+                expect,
+                is_aligned,
+            )
+    return best
+
+
+def score_table(seed: int, size: int, threshold: float) -> pd.DataFrame:
+    """Score two parse files of random records in one chunk."""
+    gbif_inputs, parses_a = random_data(seed, size)
+    _, parses_b = random_data(seed + 1, size)
+    gbif.WORKER["columns"] = COLUMNS
+    gbif.WORKER["gbif_search"] = GBIF_SEARCH
+    gbif.WORKER["success_threshold"] = threshold
+    items = [
+        (f"{i}.jpg", g, {"a": a, "b": b})
+        for i, (g, a, b) in enumerate(zip(gbif_inputs, parses_a, parses_b, strict=True))
+    ]
+    return gbif.concat_scores([gbif.score_items(items)], ["a", "b"], COLUMNS)
+
+
+def count_tallies(scores: pd.DataFrame) -> list[dict]:
+    """Tally the scores one cell at a time the way Score.tally did."""
+    counts = defaultdict(lambda: dict.fromkeys(gbif.TALLY_COLUMNS, 0))
+    sums = defaultdict(float)
+    for row in scores.to_dict("records"):
+        key = (row["file"], row["column"])
+        tally = gbif.TALLIES[(row["cat"], row["is_aligned"])]
+        counts[key][tally] += 1
+        if tally not in gbif.NOT_SCOREABLE:
+            sums[key] += row["score"]
+
+    stats = []
+    for (file, column), tallies in sorted(
+        counts.items(), key=lambda kv: (kv[0][0], COLUMNS.index(kv[0][1]))
+    ):
+        scoreable = sum(v for k, v in tallies.items() if k not in gbif.NOT_SCOREABLE)
+        stats.append(
+            {"file": f"{file} score", "column": column}
+            | {k: v or "" for k, v in tallies.items()}
+            | {
+                "total_scoreable": scoreable,
+                "total_count": sum(tallies.values()),
+                "average_score": sums[file, column] / scoreable if scoreable else 0.0,
+            }
+        )
+    return stats
+
+
+THRESHOLDS = [0.5, 0.8, 0.9, 1.0]
+
+
+class TestCompareOutputGbif(unittest.TestCase):
+    def setUp(self) -> None:
+        gbif.WORKER["score_workers"] = 1
+
+    # ---------------------------------------------------------------------
+    def test_score_column_01(self) -> None:
+        """A whole column scores the same as scoring one cell at a time."""
+        gbif_inputs, parses = random_data(seed=1, size=300)
+        for threshold in (0.0, 0.6, 0.9):
+            for col in COLUMNS:
+                actuals = [p[col] for p in parses]
+                scores = gbif.score_column(
+                    col, actuals, gbif_inputs, GBIF_SEARCH, threshold
+                )
+                got = list(zip(*scores.values(), strict=True))
+                expect = [
+                    calc_score(col, a, g, threshold)
+                    for a, g in zip(actuals, gbif_inputs, strict=True)
+                ]
+                assert got == expect, (threshold, col)
+
+    def test_score_column_02(self) -> None:
+        scores = gbif.score_column("habitat", [], [], GBIF_SEARCH, 0.9)
+        assert all(v == [] for v in scores.values())
+
+    # ---------------------------------------------------------------------
+    def test_tallies_01(self) -> None:
+        scores = pd.DataFrame(
+            {
+                "cat": ["search_fail", "search_fail", "aligned_both_full", None],
+                "is_aligned": [True, False, True, True],
+            }
+        )
+        tallies = gbif.tallies(scores)
+        assert tallies[:3].tolist() == [
+            "aligned_search_fail_count",
+            "not_aligned_search_fail_count",
+            "aligned_both_full_count",
+        ]
+        assert tallies.isna().tolist() == [False, False, False, True]
+
+    # ---------------------------------------------------------------------
+    def test_tally_01(self) -> None:
+        """Tallying whole columns is the same as tallying one cell at a time."""
+        scores = score_table(seed=2, size=300, threshold=0.9)
+        assert set(zip(scores["cat"], scores["is_aligned"], strict=True)) == set(
+            gbif.TALLIES
+        )
+        stats = gbif.tally(scores).to_dict("records")
+        expect = count_tallies(scores)
+        for got, want in zip(stats, expect, strict=True):
+            assert math.isclose(got.pop("average_score"), want.pop("average_score"))
+        assert stats == expect
+
+    # ---------------------------------------------------------------------
+    def test_apply_threshold_01(self) -> None:
+        """Applying a threshold later is the same as scoring with it."""
+        scores = score_table(seed=3, size=300, threshold=0.0)
+        for threshold in THRESHOLDS:
+            applied = gbif.apply_threshold(scores, threshold)
+            rescored = score_table(seed=3, size=300, threshold=threshold)
+            assert applied.to_dict("records") == rescored.to_dict("records")
+
+    # ---------------------------------------------------------------------
+    def test_sweep_01(self) -> None:
+        """A sweep is the same as tallying the scores at each threshold."""
+        scores = score_table(seed=4, size=300, threshold=0.0)
+        swept = gbif.sweep(scores, THRESHOLDS[::-1])
+        assert swept["threshold"].unique().tolist() == THRESHOLDS
+
+        for threshold in THRESHOLDS:
+            applied = gbif.apply_threshold(scores, threshold)
+            stats = gbif.tally(applied)
+            rows = swept[swept["threshold"] == threshold].reset_index(drop=True)
+            assert rows["file"].tolist() == stats["file"].tolist()
+            assert rows["column"].tolist() == stats["column"].tolist()
+            assert np.allclose(rows["average_score"], stats["average_score"])
+
+            groups = applied.groupby(["file", "column"], observed=True)
+            searched = applied["cat"].isin(["search_success", "search_fail"])
+            success = applied["cat"] == "search_success"
+            searches = searched.groupby(groups.ngroup()).sum()
+            successes = success.groupby(groups.ngroup()).sum()
+            means = applied["score"].where(success).groupby(groups.ngroup()).mean()
+            assert rows["search_count"].tolist() == searches.tolist()
+            assert rows["search_success_count"].tolist() == successes.tolist()
+            assert rows["search_fail_count"].tolist() == (searches - successes).tolist()
+            assert np.allclose(
+                rows["success_rate"], successes / searches, equal_nan=True
+            )
+            assert np.allclose(rows["success_mean"], means, equal_nan=True)
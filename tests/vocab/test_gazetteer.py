@@ -0,0 +1,99 @@
+import unittest
+
+from llama.calculated.location.country import Country
+from llama.calculated.location.locality import Locality
+from llama.vocab import gazetteer
+from llama.vocab.gazetteer import Gazetteer, Term
+
+SMALL = Gazetteer(
+    [
+        Term("he", "word", "He"),
+        Term("she", "word", "She"),
+        Term("hers", "word", "Hers"),
+        Term("OR", "us_state", "Oregon", match_case=True),
+        Term("new york", "us_state", "New York"),
+        Term("york", "us_county", "York"),
+    ]
+)
+
+
+class TestGazetteer(unittest.TestCase):
+    # ---------------------------------------------------------------------
+    def test_find_all_01(self) -> None:
+        """Overlapping patterns are all found, but only as whole words."""
+        found = SMALL.find_all("she hers ushers")
+        assert [(m.start, m.end, m.text) for m in found] == [
+            (0, 3, "she"),
+            (4, 8, "hers"),
+        ]
+
+    def test_find_all_02(self) -> None:
+        assert [m.text for m in SMALL.find_all("this OR that or other")] == ["OR"]
+
+    # ---------------------------------------------------------------------
+    def test_find_01(self) -> None:
+        """The longest mention wins."""
+        found = SMALL.find("near New York City")
+        assert [(m.text, m.replace) for m in found] == [("New York", "New York")]
+
+    def test_find_02(self) -> None:
+        found = SMALL.find("near New York City", labels=["us_county"])
+        assert [m.text for m in found] == ["York"]
+
+    # ---------------------------------------------------------------------
+    def test_strip_01(self) -> None:
+        text = "York, New York, OR"
+        assert gazetteer.strip(text, SMALL.find(text)) == ", , "
+
+    # ---------------------------------------------------------------------
+    def test_admin_units_01(self) -> None:
+        found = gazetteer.admin_units().find("Washoe Co., Calif., U.S.A.; AB")
+        assert {(m.label, m.replace) for m in found} == {
+            ("us_county", "Washoe"),
+            ("us_state", "California"),
+            ("country", "USA"),
+            ("ca_province", "Alberta"),
+        }
+
+    def test_admin_units_02(self) -> None:
+        """A name can be both a state and a county."""
+        found = gazetteer.admin_units().find("Delaware")
+        assert {m.label for m in found} == {"us_state", "us_county"}
+
+    # ---------------------------------------------------------------------
+    def test_locality_01(self) -> None:
+        """Abbreviations of the record's state are removed too."""
+        record = {"country": "USA", "stateProvince": "California", "county": "Kern"}
+        locality = Locality(
+            locality="Kern Co., Calif., 5 mi N of Tehachapi", record=record
+        )
+        assert locality.locality == "5 mi N of Tehachapi"
+
+    def test_locality_02(self) -> None:
+        """Other places are left alone."""
+        record = {"stateProvince": "Nevada"}
+        locality = Locality(locality="Nevada, near Calif. border", record=record)
+        assert locality.locality == "near Calif. border"
+
+    # ---------------------------------------------------------------------
+    def test_country_01(self) -> None:
+        country = Country(record={"stateProvince": "Calif., U.S.A."})
+        assert country.country == "United States"
+
+    def test_country_02(self) -> None:
+        country = Country(record={"stateProvince": "Alberta AB"})
+        assert country.country == ""
+
+    def test_country_03(self) -> None:
+        country = Country(record={"stateProvince": "Nevada (NV)"})
+        assert country.country == "United States"
+
+    def test_country_04(self) -> None:
+        """A US state inside a Mexican state's name isn't a US state."""
+        country = Country(record={"stateProvince": "Baja California Sur"}, country="")
+        assert country.country == ""
+
+    def test_country_05(self) -> None:
+        record = {"stateProvince": "Estado de Baja California"}
+        country = Country(record=record, country="")
+        assert country.country == ""
@@ -0,0 +1,66 @@
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from llama.vocab import lazy_vocab
+
+# Import every module that uses a vocabulary and report what got loaded
+IMPORTS = """
+import sys, time
+began = time.perf_counter()
+import llama.calculated.location.country
+import llama.calculated.taxon.family
+import llama.fields.taxon.family
+from llama.vocab import administrative_unit, taxon
+elapsed = time.perf_counter() - began
+loaded = taxon.GENUS_TO_FAMILY.loaded or administrative_unit.US_STATE.loaded
+print("pandas" in sys.modules, loaded, elapsed)
+"""
+
+# Importing the modules above takes well under this many seconds
+MAX_IMPORT_TIME = 2.0
+
+
+class TestLazyVocab(unittest.TestCase):
+    # ---------------------------------------------------------------------
+    def test_import_01(self) -> None:
+        """Importing the field modules doesn't load pandas or any vocabulary."""
+        result = subprocess.run(  # noqa: S603
+            [sys.executable, "-c", IMPORTS],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        pandas, loaded, elapsed = result.stdout.split()
+        assert pandas == "False"
+        assert loaded == "False"
+        assert float(elapsed) < MAX_IMPORT_TIME
+
+    # ---------------------------------------------------------------------
+    def test_lazy_vocab_01(self) -> None:
+        """The table is built once, cached, and rebuilt when the CSV changes."""
+        with tempfile.TemporaryDirectory(prefix="test_") as temp_dir:
+            path = Path(temp_dir) / "terms.csv"
+            path.write_text("pattern,replace\na,A\n")
+            builds = []
+
+            def build() -> dict[str, str]:
+                builds.append(1)
+                return {r["pattern"]: r["replace"] for r in lazy_vocab.read_rows(path)}
+
+            cache_dir = Path(temp_dir) / "cache"
+            vocab = lazy_vocab.LazyVocab("terms", [path], build, cache_dir)
+            assert not vocab.loaded
+            assert vocab.get("a") == "A"
+            assert len(builds) == 1
+
+            vocab = lazy_vocab.LazyVocab("terms", [path], build, cache_dir)
+            assert "a" in vocab
+            assert len(builds) == 1
+
+            path.write_text("pattern,replace\na,A\nb,B\n")
+            vocab = lazy_vocab.LazyVocab("terms", [path], build, cache_dir)
+            assert dict(vocab) == {"a": "A", "b": "B"}
+            assert len(builds) == 2
@@ -0,0 +1,35 @@
+import unittest
+
+from llama.vocab import taxon
+
+INDEX = taxon.GenusIndex(["Quercus", "Quercetum", "Poa", "Solanum", "Aster"])
+
+
+class TestTaxon(unittest.TestCase):
+    # ---------------------------------------------------------------------
+    def test_closest_01(self) -> None:
+        assert INDEX.closest("Quercus") == ("Quercus", 1.0)
+        assert INDEX.closest("quercus") == ("Quercus", 1.0)
+
+    def test_closest_02(self) -> None:
+        genus, score = INDEX.closest("Quercns")
+        assert genus == "Quercus"
+        assert round(score, 2) == 0.86
+
+    def test_closest_03(self) -> None:
+        """Short names must match exactly."""
+        assert INDEX.closest("Pao") == ("", 0.0)
+
+    def test_closest_04(self) -> None:
+        assert INDEX.closest("Quercus", max_distance=0) == ("Quercus", 1.0)
+        assert INDEX.closest("Quercns", max_distance=0) == ("", 0.0)
+
+    def test_closest_05(self) -> None:
+        assert INDEX.closest("Xylophage") == ("", 0.0)
+        assert INDEX.closest("") == ("", 0.0)
+
+    # ---------------------------------------------------------------------
+    def test_genus_to_family_01(self) -> None:
+        assert taxon.genus_to_family("Quercus") == "Fagaceae"
+        assert taxon.genus_to_family("Quercns") == "Fagaceae"
+        assert taxon.genus_to_family("Xyzzyq") == ""
@@ -0,0 +1,140 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from llama.fields.taxon.specificEpithet import SpecificEpithet
+from llama.vocab import taxon_names
+
+
+def name(
+    scientific_name: str, authorship: str, status: str = "accepted", accepted: str = ""
+) -> dict[str, str]:
+    genus, epithet, *infra = scientific_name.split()
+    return {
+        "scientific_name": scientific_name,
+        "genus": genus,
+        "specific_epithet": epithet,
+        "infraspecific_epithet": infra[-1] if infra else "",
+        "authorship": authorship,
+        "status": status,
+        "accepted_name": accepted,
+        "family": "Fagaceae",
+    }
+
+
+NAMES = [
+    name("Quercus alba", "L."),
+    name("Quercus alba", "Michx.", "synonym", "Quercus michauxii"),
+    name("Quercus agrifolia", "Née"),
+    name("Quercus albocincta", "Trel."),
+    name("Quercus michauxii", "Nutt."),
+    name("Quercus rubra", "L."),
+    name("Quercus rubra var. borealis", "(Michx.f.) Farw."),
+]
+
+
+class TestTaxonNames(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.temp_dir = tempfile.TemporaryDirectory()
+        cls.db = Path(cls.temp_dir.name) / "names.sqlite"
+        taxon_names.create_db(cls.db, NAMES)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        for cxn in taxon_names.CONNECTIONS.values():
+            if cxn:
+                cxn.close()
+        taxon_names.CONNECTIONS.clear()
+        cls.temp_dir.cleanup()
+
+    # ---------------------------------------------------------------------
+    def test_exact_01(self) -> None:
+        names = taxon_names.exact("quercus  ALBA", self.db)
+        assert sorted(n.authorship for n in names) == ["L.", "Michx."]
+
+    def test_exact_02(self) -> None:
+        assert taxon_names.exact("Quercus alb", self.db) == ()
+
+    # ---------------------------------------------------------------------
+    def test_prefix_01(self) -> None:
+        names = taxon_names.prefix("Quercus al", db_path=self.db)
+        assert sorted({n.scientific_name for n in names}) == [
+            "Quercus alba",
+            "Quercus albocincta",
+        ]
+
+    def test_prefix_02(self) -> None:
+        names = taxon_names.prefix("Quercus rubra", db_path=self.db)
+        assert [n.scientific_name for n in names] == [
+            "Quercus rubra",
+            "Quercus rubra var. borealis",
+        ]
+
+    def test_prefix_03(self) -> None:
+        assert taxon_names.prefix("Quercus al", limit=1, db_path=self.db)[0]
+        assert taxon_names.prefix("", db_path=self.db) == ()
+
+    # ---------------------------------------------------------------------
+    def test_fuzzy_01(self) -> None:
+        match = taxon_names.fuzzy("Quercus alba", db_path=self.db)
+        assert match.authorship == "L."
+        assert match.score == 100.0
+
+    def test_fuzzy_02(self) -> None:
+        match = taxon_names.fuzzy("Quercns rubar", db_path=self.db)
+        assert match.scientific_name == "Quercus rubra"
+        assert match.score < 100.0
+
+    def test_fuzzy_03(self) -> None:
+        assert taxon_names.fuzzy("Quercus zzyzx", db_path=self.db) is None
+        assert taxon_names.fuzzy("Xyzzyq alba", db_path=self.db) is None
+
+    # ---------------------------------------------------------------------
+    def test_correct_01(self) -> None:
+        match = taxon_names.correct("Quercus albocinta", db_path=self.db)
+        assert match.scientific_name == "Quercus albocincta"
+
+    def test_correct_02(self) -> None:
+        """A valid name that isn't in the database is not rewritten to a neighbor."""
+        assert taxon_names.fuzzy("Quercus albida", db_path=self.db)
+        assert taxon_names.correct("Quercus albida", db_path=self.db) is None
+
+    def test_correct_03(self) -> None:
+        """A name is only corrected when one name is close enough."""
+        assert taxon_names.correct("Quercus albx", min_score=80, db_path=self.db)
+        assert (
+            taxon_names.correct("Quercus albx", min_score=70, db_path=self.db) is None
+        )
+
+    # ---------------------------------------------------------------------
+    def test_clean_epithet_01(self) -> None:
+        """A misspelled name doesn't replace a correct epithet."""
+        epithet = SpecificEpithet.clean_epithet("alba", "Quercus albus", self.db)
+        assert epithet == "alba"
+
+    def test_clean_epithet_02(self) -> None:
+        """The epithet comes from the corrected name, not the name as written."""
+        epithet = SpecificEpithet.clean_epithet(
+            "albocinta", "Quercus albocinta", self.db
+        )
+        assert epithet == "albocincta"
+
+    def test_clean_epithet_03(self) -> None:
+        epithet = SpecificEpithet.clean_epithet("rubr", "Quercus rubra", self.db)
+        assert epithet == "rubra"
+
+    # ---------------------------------------------------------------------
+    def test_missing_01(self) -> None:
+        """Without a database every lookup finds nothing."""
+        missing = Path(self.temp_dir.name) / "missing.sqlite"
+        assert not taxon_names.is_available(missing)
+        assert taxon_names.exact("Quercus alba", missing) == ()
+        assert taxon_names.prefix("Quercus", db_path=missing) == ()
+        assert taxon_names.fuzzy("Quercus alba", db_path=missing) is None
+
+    # ---------------------------------------------------------------------
+    def test_accepted_first_01(self) -> None:
+        names = taxon_names.exact("Quercus alba", self.db)
+        assert taxon_names.accepted_first(names[::-1]).authorship == "L."
+        assert taxon_names.accepted_first(names).authorship == "L."